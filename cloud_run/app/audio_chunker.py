@@ -0,0 +1,214 @@
+"""
+無音区間での音声分割
+LINEAR16 PCMを逐次受け取り、低エネルギー（無音）位置で一定長のチャンクに分割する
+"""
+import io
+import logging
+import wave
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_WIDTH = 2  # LINEAR16
+MAX_AMPLITUDE = 32768.0
+
+# 重複区間の文字起こしを突き合わせる際の最大/最小一致文字数
+STITCH_MAX_OVERLAP_CHARS = 60
+STITCH_MIN_OVERLAP_CHARS = 3
+
+
+class AudioChunk:
+    """分割された音声チャンク（モノラル16bit）"""
+
+    def __init__(
+        self,
+        index: int,
+        start_sample: int,
+        samples: np.ndarray,
+        sample_rate: int,
+        overlap_samples: int = 0
+    ):
+        self.index = index
+        self.start_sample = start_sample
+        self.samples = samples
+        self.sample_rate = sample_rate
+        # 先頭のうち直前のチャンクと重複しているサンプル数
+        self.overlap_samples = overlap_samples
+
+    @property
+    def end_sample(self) -> int:
+        return self.start_sample + len(self.samples)
+
+    @property
+    def start_seconds(self) -> float:
+        return self.start_sample / self.sample_rate
+
+    @property
+    def end_seconds(self) -> float:
+        return self.end_sample / self.sample_rate
+
+    @property
+    def duration_seconds(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    def to_wav_bytes(self) -> bytes:
+        """WAV（LINEAR16・モノラル）としてエンコード"""
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(SAMPLE_WIDTH)
+            w.setframerate(self.sample_rate)
+            w.writeframes(self.samples.astype("<i2").tobytes())
+        return buf.getvalue()
+
+
+class SilenceChunker:
+    """
+    無音位置での逐次分割
+
+    feed() にPCMバイト列を順に渡すと、確定したチャンクを返す。
+    チャンク長は target_seconds 前後（最大 max_seconds）で、
+    [target - (max - target), max] の範囲で最もエネルギーの低いフレームで切る。
+    無音が見つからず発話途中で切った場合は、次のチャンクを overlap_seconds だけ
+    巻き戻して開始する（文字起こしの結合時に重複を除去する）。
+    多チャンネル音声はモノラルにダウンミックスする。
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        channels: int = 1,
+        target_seconds: float = 45.0,
+        max_seconds: float = 55.0,
+        overlap_seconds: float = 1.0,
+        silence_threshold_db: float = -40.0,
+        frame_ms: int = 20
+    ):
+        if target_seconds <= 0 or max_seconds < target_seconds:
+            raise ValueError("max_seconds must be >= target_seconds > 0")
+
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frame_len = max(1, sample_rate * frame_ms // 1000)
+        self.target_samples = int(target_seconds * sample_rate)
+        self.max_samples = int(max_seconds * sample_rate)
+        self.min_samples = max(self.frame_len, 2 * self.target_samples - self.max_samples)
+        self.overlap = int(overlap_seconds * sample_rate)
+        self.silence_threshold = MAX_AMPLITUDE * (10 ** (silence_threshold_db / 20))
+
+        self._pending = b""
+        self._buffer = np.zeros(0, dtype=np.int16)
+        self._buffer_start = 0
+        self._buffer_overlap = 0
+        self._next_index = 0
+
+    def feed(self, data: bytes) -> List[AudioChunk]:
+        """
+        PCMバイト列を追加
+
+        Args:
+            data: LINEAR16（リトルエンディアン）のPCM。サンプル境界で切れていなくてよい
+
+        Returns:
+            確定したチャンクのリスト
+        """
+        data = self._pending + data
+        frame_bytes = SAMPLE_WIDTH * self.channels
+        usable = len(data) - len(data) % frame_bytes
+        self._pending = data[usable:]
+
+        samples = np.frombuffer(data[:usable], dtype="<i2")
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1).astype(np.int16)
+
+        self._buffer = np.concatenate([self._buffer, samples])
+
+        chunks = []
+        while len(self._buffer) >= self.max_samples:
+            chunks.append(self._emit(*self._find_cut()))
+        return chunks
+
+    def flush(self) -> List[AudioChunk]:
+        """残りのサンプルを最後のチャンクとして確定"""
+        self._pending = b""
+        if len(self._buffer) <= self._buffer_overlap:
+            return []
+        return [self._emit(len(self._buffer), True)]
+
+    def _find_cut(self) -> Tuple[int, bool]:
+        """切断位置と、そこが無音かどうか"""
+        lo = self.min_samples
+        hi = min(self.max_samples, len(self._buffer))
+        n_frames = (hi - lo) // self.frame_len
+        if n_frames <= 0:
+            return hi, False
+
+        frames = self._buffer[lo:lo + n_frames * self.frame_len].astype(np.float32)
+        rms = np.sqrt(np.mean(frames.reshape(n_frames, self.frame_len) ** 2, axis=1))
+        best = int(np.argmin(rms))
+        cut = lo + best * self.frame_len + self.frame_len // 2
+        return cut, bool(rms[best] <= self.silence_threshold)
+
+    def _emit(self, cut: int, silent: bool) -> AudioChunk:
+        chunk = AudioChunk(
+            index=self._next_index,
+            start_sample=self._buffer_start,
+            samples=self._buffer[:cut].copy(),
+            sample_rate=self.sample_rate,
+            overlap_samples=self._buffer_overlap,
+        )
+        self._next_index += 1
+
+        next_start = cut if silent else max(0, cut - self.overlap)
+        self._buffer = self._buffer[next_start:]
+        self._buffer_start += next_start
+        self._buffer_overlap = cut - next_start
+        return chunk
+
+
+def split_pcm(
+    pcm: bytes,
+    sample_rate: int,
+    channels: int = 1,
+    **kwargs
+) -> List[AudioChunk]:
+    """PCM全体を一括で分割（オフライン検証用）"""
+    chunker = SilenceChunker(sample_rate, channels, **kwargs)
+    return chunker.feed(pcm) + chunker.flush()
+
+
+def _overlap_length(previous: str, text: str) -> int:
+    """previous の末尾と text の先頭で一致する最長の文字数"""
+    limit = min(len(previous), len(text), STITCH_MAX_OVERLAP_CHARS)
+    for n in range(limit, STITCH_MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(text[:n]):
+            return n
+    return 0
+
+
+def stitch_transcripts(parts: List[Tuple[str, bool]]) -> str:
+    """
+    チャンクごとの文字起こしを順に結合
+
+    Args:
+        parts: (文字起こし, 直前のチャンクと音声が重複しているか) のリスト
+
+    Returns:
+        結合した文字起こし
+    """
+    result: Optional[str] = None
+    for text, overlapped in parts:
+        text = text.strip()
+        if not text:
+            continue
+        if result is None:
+            result = text
+            continue
+        if overlapped:
+            text = text[_overlap_length(result, text):].lstrip()
+            if not text:
+                continue
+        result = f"{result} {text}"
+    return result or ""
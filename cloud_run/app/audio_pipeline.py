@@ -2,19 +2,43 @@
 音声処理パイプライン
 GCS音声 → Speech-to-Text → Claude抽出 → シート書き込み
 """
+import asyncio
 import logging
-from typing import Optional, Dict, Any
+import os
+import tempfile
+import time
+import uuid
+import wave
+from typing import Optional, Dict, Any, AsyncIterator, Callable, List, Tuple
 
 from google.cloud import speech_v1 as speech
-from google.cloud import storage
 
 from .settings import get_settings
 from .sheets_client import get_sheets_client
-from .extract_schema import extract_fields_from_transcript
+from .delta_extraction import extract_with_delta
 from .log_utils import safe_log_dict
+from .executor import run_blocking
+from .rate_limit import call_with_quota, classify_error, DOWNSTREAM_SPEECH
+from .gcs_utils import (
+    get_blob, get_storage_client, iter_object_range, parse_gcs_uri, spool_object_to_file
+)
+from .audio_probe import AudioInfo, probe_audio
+from .audio_chunker import AudioChunk, SilenceChunker, stitch_transcripts
+from .vad import OffsetMap, VoiceActivityTrimmer
+from .segments import Segment, SegmentTable, segments_from_response, resolve_field_evidence
+from .transcript_normalizer import (
+    NormalizedTranscript, normalize_transcript, restore_field_evidence
+)
+from .token_utils import estimate_tokens
+from .retrieval import RetrievalContext
+from .transcript_cache import get_transcript_cache
+from .jobs import STAGE_LABELS, STAGE_STT, STAGE_EXTRACTION, STAGE_SHEET_WRITE
 
 logger = logging.getLogger(__name__)
 
+# wave モジュールが書き出す PCM WAV のヘッダー長
+WAV_HEADER_BYTES = 44
+
 
 async def process_audio_pipeline(
     sheet_id: str,
@@ -22,7 +46,8 @@ async def process_audio_pipeline(
     gcs_uri: str,
     language_code: str = "ja-JP",
     record_id: Optional[str] = None,
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = None,
+    on_stage: Optional[Callable[[str], None]] = None
 ) -> Dict[str, Any]:
     """
     音声処理パイプライン
@@ -34,6 +59,7 @@ async def process_audio_pipeline(
         language_code: 言語コード
         record_id: レコードID
         metadata: メタデータ（CA名、SlackメンションID等）
+        on_stage: ステージ遷移時に呼ばれるコールバック（非同期ジョブの進捗記録用）
     
     Returns:
         処理結果
@@ -43,37 +69,113 @@ async def process_audio_pipeline(
     
     logger.info(f"Starting audio pipeline for: {gcs_uri}")
     
-    # 1. A列のラベル一覧を取得
-    labels = sheets_client.get_labels(sheet_id, sheet_name)
+    def enter_stage(stage: str) -> None:
+        if on_stage:
+            on_stage(stage)
+    
+    # 1. A列のラベル一覧を取得（ジョブ内でA列を読むのはここの1回のみ）
+    enter_stage(STAGE_LABELS)
+    label_index = await sheets_client.get_label_index_async(sheet_id, sheet_name, refresh=True)
+    labels = label_index.labels
     if not labels:
         raise ValueError("No labels found in sheet")
     
     logger.info(f"Found {len(labels)} labels in sheet")
     
     # 2. Speech-to-Textで文字起こし
-    transcript = await transcribe_audio(gcs_uri, language_code)
+    enter_stage(STAGE_STT)
+    transcript, segments = await transcribe_audio_with_segments(gcs_uri, language_code)
     logger.info(f"Transcription completed: {len(transcript)} characters")
     
+    # フィラー・繰り返し等を除去したテキストで抽出し、根拠は元の表記に戻して書き込む
+    normalize = _get_transcript_normalizer()
+    extraction_transcript = transcript
+    finalize_field: Callable[[Dict[str, Any]], Dict[str, Any]] = lambda data: data
+    if segments is not None and len(segments):
+        # 区間表がある場合は区間番号付きのテキストで抽出し、根拠は区間番号で受け取る
+        # （根拠は区間表の元の発話テキストと時刻で補完する）
+        extraction_transcript = segments.to_prompt_text(
+            (lambda text: normalize(text).text) if normalize is not None else None
+        )
+        finalize_field = lambda data: resolve_field_evidence(data, segments)
+    elif normalize is not None and transcript:
+        normalized = normalize(transcript)
+        extraction_transcript = normalized.text
+        finalize_field = lambda data: restore_field_evidence(data, normalized)
+    
+    transcript_tokens = estimate_tokens(transcript)
+    extraction_tokens = estimate_tokens(extraction_transcript)
+    if extraction_transcript != transcript:
+        logger.info(
+            f"Extraction input prepared: ~{transcript_tokens} -> ~{extraction_tokens} tokens"
+        )
+    
     # 3. Claude APIで項目抽出
-    extracted = await extract_fields_from_transcript(
-        transcript=transcript,
-        labels=labels,
-        metadata=metadata
+    enter_stage(STAGE_EXTRACTION)
+    retrieval = None
+    if settings.RETRIEVAL_ENABLED:
+        # ラベル群ごとの関連箇所の絞り込みに config シートの同義語を使用
+        synonyms = await sheets_client.get_label_synonyms_async(sheet_id)
+        retrieval = RetrievalContext(synonyms)
+    
+    # ストリーミング抽出で確定した項目から順にシートへ書き込む
+    write_buffer = None
+    if settings.EXTRACTION_STREAMING_ENABLED:
+        write_buffer = sheets_client.create_write_buffer(sheet_id, sheet_name, label_index)
+    
+    on_field = None
+    if write_buffer is not None:
+        on_field = lambda label, data: write_buffer.add(label, finalize_field(data))
+    
+    # 同じレコード・文字起こしの前回結果があれば、追加されたラベルのみ抽出
+    extraction_started = time.monotonic()
+    try:
+        extracted, extraction_stats = await extract_with_delta(
+            transcript=extraction_transcript,
+            labels=labels,
+            sheet_id=sheet_id,
+            sheet_name=sheet_name,
+            record_id=record_id,
+            metadata=metadata,
+            retrieval=retrieval,
+            on_field=on_field
+        )
+    finally:
+        if write_buffer is not None:
+            await write_buffer.close()
+    extraction_seconds = round(time.monotonic() - extraction_started, 3)
+    # 根拠（K列）を区間表の発話テキスト・時刻、または正規化前の表記に置き換える
+    extracted = {label: finalize_field(data) for label, data in extracted.items()}
+    logger.info(
+        f"Extraction completed: {len(extracted)} fields "
+        f"(mode={extraction_stats['mode']}, requested={extraction_stats['requested_labels']}, "
+        f"{extraction_seconds}s)"
     )
-    logger.info(f"Extraction completed: {len(extracted)} fields")
     logger.debug(f"Extracted data (masked): {safe_log_dict(extracted)}")
     
     # 4. シートに書き込み
-    updated_count = sheets_client.write_audio_results(
-        sheet_id=sheet_id,
-        sheet_name=sheet_name,
-        results=extracted
-    )
+    enter_stage(STAGE_SHEET_WRITE)
+    if write_buffer is not None:
+        # 逐次書き込み済みの項目は省略し、残り（キャッシュ・前回結果の再利用分等）のみ書き込む
+        updated_count = await write_buffer.write_remaining(extracted)
+    else:
+        updated_count = await sheets_client.write_audio_results_async(
+            sheet_id=sheet_id,
+            sheet_name=sheet_name,
+            results=extracted,
+            label_index=label_index
+        )
     
     return {
         "record_id": record_id,
         "transcript_length": len(transcript),
+        "transcript_tokens": transcript_tokens,
+        "extraction_input_tokens": extraction_tokens,
         "extracted_fields": len(extracted),
+        "extraction_mode": extraction_stats["mode"],
+        "requested_labels": extraction_stats["requested_labels"],
+        "extraction_seconds": extraction_seconds,
+        "retrieval": retrieval.stats.to_dict() if retrieval is not None else None,
         "updated_rows": updated_count,
         "metadata": metadata
     }
@@ -90,82 +192,478 @@ async def transcribe_audio(gcs_uri: str, language_code: str = "ja-JP") -> str:
     Returns:
         文字起こしテキスト
     """
+    transcript, _ = await transcribe_audio_with_segments(gcs_uri, language_code)
+    return transcript
+
+
+async def transcribe_audio_with_segments(
+    gcs_uri: str,
+    language_code: str = "ja-JP"
+) -> Tuple[str, Optional[SegmentTable]]:
+    """
+    音声を文字起こしし、区間表（認識結果ごとのテキストと元音声上の時刻）も返す
+    
+    Args:
+        gcs_uri: GCS URI (gs://bucket/path/to/file.wav)
+        language_code: 言語コード
+    
+    Returns:
+        (文字起こしテキスト, 区間表（SEGMENT_EVIDENCE_ENABLED でない場合はNone）)
+    """
     logger.info(f"Transcribing audio: {gcs_uri}")
     
-    client = speech.SpeechClient()
+    settings = get_settings()
+    options = get_recognition_options()
+    
+    # 同一内容・同一設定の文字起こし済み結果があれば STT をスキップ
+    transcript_cache = get_transcript_cache()
+    cache_key, cached = await transcript_cache.lookup(gcs_uri, language_code, options)
+    if cached is not None:
+        segments = None
+        if cached.get("segments") is not None:
+            segments = SegmentTable.from_dict(cached["segments"])
+        return cached["transcript"], segments
+    
+    # ヘッダーを範囲読み込みして形式と長さを取得（失敗時は従来の設定・試行順で処理）
+    info = await _probe_audio_safely(gcs_uri)
+    
+    # 無音区間を除去した音声を一時オブジェクトとしてアップロードし、そちらを文字起こし
+    trimmed = None
+    if _should_trim(info):
+        trimmed = await trim_silence_to_gcs(gcs_uri, info)
+    
+    offset_map = None
+    target_uri, target_info = gcs_uri, info
+    if trimmed is not None:
+        target_uri, target_info, offset_map = trimmed
+    
+    segment_list: List[Segment] = []
+    try:
+        if target_info is not None and target_info.duration_seconds == 0:
+            transcript = ""
+        elif _should_chunk(target_info):
+            transcript, segment_list = await _recognize_chunked(
+                target_uri, language_code, options, target_info
+            )
+        else:
+            transcript, segment_list = await _recognize(
+                target_uri, language_code, options, target_info
+            )
+    finally:
+        if trimmed is not None:
+            await _delete_object_safely(target_uri)
+    
+    segments = None
+    if settings.SEGMENT_EVIDENCE_ENABLED:
+        segments = SegmentTable()
+        segments.extend(segment_list)
+        if offset_map is not None:
+            # 無音トリミング後の時刻を元音声の時刻に戻す
+            segments.map_times(offset_map.to_original)
+    
+    if transcript:
+        value = {"transcript": transcript}
+        if offset_map is not None:
+            # 単語タイムスタンプを元音声の時刻に戻すための対応表
+            value["offset_map"] = offset_map.to_dict()
+        if segments is not None:
+            value["segments"] = segments.to_dict()
+        await transcript_cache.store(cache_key, gcs_uri, value)
+    
+    return transcript, segments
+
+
+def _get_transcript_normalizer() -> Optional[Callable[[str], NormalizedTranscript]]:
+    """設定に応じた文字起こしの正規化関数（TRANSCRIPT_NORMALIZE_ENABLED でない場合はNone）"""
+    settings = get_settings()
+    if not settings.TRANSCRIPT_NORMALIZE_ENABLED:
+        return None
+    fillers = [f for f in settings.TRANSCRIPT_FILLERS.split(",") if f.strip()] or None
+    return lambda text: normalize_transcript(
+        text,
+        fillers=fillers,
+        collapse_repeats=settings.TRANSCRIPT_COLLAPSE_REPEATS,
+        repeat_min_chars=settings.TRANSCRIPT_REPEAT_MIN_CHARS,
+    )
+
+
+def get_recognition_options() -> Dict[str, Any]:
+    """
+    認識設定（言語コード以外）
+    
+    文字起こしキャッシュのキーにも使用するため、認識結果に影響する設定は
+    すべてここに含める。encoding / sample_rate_hertz はヘッダーから
+    取得できなかった場合の既定値（ヘッダー由来の値はオブジェクト内容で決まるため
+    キャッシュキーには含めない）。
+    """
+    settings = get_settings()
+    options = {
+        "encoding": "LINEAR16",
+        "sample_rate_hertz": 16000,  # 必要に応じて調整
+        "enable_automatic_punctuation": True,
+        "model": "default",
+        # 区間表の時刻（根拠の音声上の位置）に単語単位の時刻を使う
+        "enable_word_time_offsets": settings.SEGMENT_EVIDENCE_ENABLED,
+    }
+    if settings.STT_CHUNKED_ENABLED:
+        # 分割位置が変わると文字起こし結果も変わるため、分割設定もキーに含める
+        options["chunking"] = {
+            "chunk_seconds": settings.STT_CHUNK_SECONDS,
+            "max_seconds": settings.STT_CHUNK_MAX_SECONDS,
+            "overlap_seconds": settings.STT_CHUNK_OVERLAP_SECONDS,
+            "silence_threshold_db": settings.STT_SILENCE_THRESHOLD_DB,
+        }
+    if settings.VAD_ENABLED:
+        options["vad"] = {
+            "threshold_db": settings.VAD_THRESHOLD_DB,
+            "min_silence_seconds": settings.VAD_MIN_SILENCE_SECONDS,
+            "padding_seconds": settings.VAD_PADDING_SECONDS,
+        }
+    return options
+
+
+async def _recognize(
+    gcs_uri: str,
+    language_code: str,
+    options: Dict[str, Any],
+    info: Optional[AudioInfo] = None
+) -> Tuple[str, List[Segment]]:
+    """Speech-to-Text APIを呼び出して文字起こし（テキストと区間）"""
+    settings = get_settings()
+    client = speech.SpeechAsyncClient()
     
     # 音声ファイルの設定
     audio = speech.RecognitionAudio(uri=gcs_uri)
     
     # 認識設定
     config = speech.RecognitionConfig(
-        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-        sample_rate_hertz=16000,  # 必要に応じて調整
         language_code=language_code,
-        enable_automatic_punctuation=True,
-        model="default",
-        # 長い音声の場合
-        enable_word_time_offsets=False,
+        enable_automatic_punctuation=options["enable_automatic_punctuation"],
+        model=options["model"],
+        enable_word_time_offsets=options["enable_word_time_offsets"],
+        **_audio_format_config(info, options),
     )
     
-    # 長時間音声の場合はlong_running_recognize
-    # 短い音声の場合はrecognize
-    try:
-        # まず短い音声として試行
-        response = client.recognize(config=config, audio=audio)
-    except Exception as e:
-        logger.info(f"Trying long_running_recognize: {e}")
-        # 長い音声の場合
-        operation = client.long_running_recognize(config=config, audio=audio)
-        response = operation.result(timeout=600)  # 10分タイムアウト
+    async def long_running():
+        operation = await client.long_running_recognize(config=config, audio=audio)
+        return await operation.result(timeout=settings.SPEECH_LONG_RUNNING_TIMEOUT_SECONDS)
+    
+    if info is not None and info.duration_seconds is not None:
+        # 長さが分かっていれば最初から適切なAPIを選択
+        if info.duration_seconds <= settings.SPEECH_SYNC_MAX_SECONDS:
+            logger.info(f"Using recognize ({info.duration_seconds:.1f}s)")
+            recognize = lambda: client.recognize(config=config, audio=audio)
+        else:
+            logger.info(f"Using long_running_recognize ({info.duration_seconds:.1f}s)")
+            recognize = long_running
+    else:
+        # 長さが不明な場合のみ、短い音声として試行してからフォールバック
+        async def recognize():
+            try:
+                return await client.recognize(config=config, audio=audio)
+            except Exception as e:
+                # クォータ超過等はフォールバックせずリトライ層に任せる
+                if classify_error(e) is not None:
+                    raise
+                logger.info(f"Trying long_running_recognize: {e}")
+                return await long_running()
     
-    # 結果を結合
+    response = await call_with_quota(DOWNSTREAM_SPEECH, recognize)
+    
+    transcript = _join_results(response)
+    
+    if not transcript:
+        logger.warning("No transcript generated from audio")
+    
+    return transcript, segments_from_response(response)
+
+
+def _join_results(response) -> str:
+    """認識結果の第1候補を結合"""
     transcript_parts = []
     for result in response.results:
         if result.alternatives:
             transcript_parts.append(result.alternatives[0].transcript)
     
-    transcript = ' '.join(transcript_parts)
+    return ' '.join(transcript_parts)
+
+
+def _should_chunk(info: Optional[AudioInfo]) -> bool:
+    """分割文字起こしの対象か（LINEAR16 WAVで同期認識の上限を超えるもの）"""
+    settings = get_settings()
+    return (
+        settings.STT_CHUNKED_ENABLED
+        and info is not None
+        and info.encoding == "LINEAR16"
+        and info.data_offset is not None
+        and info.duration_seconds is not None
+        and info.duration_seconds > settings.SPEECH_SYNC_MAX_SECONDS
+    )
+
+
+def _should_trim(info: Optional[AudioInfo]) -> bool:
+    """無音トリミングの対象か（LINEAR16 WAVのみ）"""
+    return (
+        get_settings().VAD_ENABLED
+        and info is not None
+        and info.encoding == "LINEAR16"
+        and info.data_offset is not None
+        and bool(info.data_size)
+    )
+
+
+async def trim_silence_to_gcs(
+    gcs_uri: str,
+    info: AudioInfo
+) -> Tuple[str, AudioInfo, OffsetMap]:
+    """
+    VADで長い無音を除去したWAV（モノラル）をGCSにアップロード
+    
+    元音声は範囲読み込みで順に処理し、圧縮後のPCMは一時ファイルに書き出す
+    （音声全体をメモリに載せない）。
+    
+    Args:
+        gcs_uri: 元音声のGCS URI
+        info: 元音声のヘッダー情報
+    
+    Returns:
+        (圧縮後音声のGCS URI, 圧縮後音声のヘッダー情報, 時刻の対応表)
+    """
+    settings = get_settings()
+    trimmer = VoiceActivityTrimmer(
+        sample_rate=info.sample_rate,
+        channels=info.channels,
+        threshold_db=settings.VAD_THRESHOLD_DB,
+        min_silence_seconds=settings.VAD_MIN_SILENCE_SECONDS,
+        padding_seconds=settings.VAD_PADDING_SECONDS,
+    )
+    
+    source_bucket, _ = parse_gcs_uri(gcs_uri)
+    bucket_name = settings.VAD_GCS_BUCKET or source_bucket
+    blob_name = f"{settings.VAD_GCS_PREFIX.strip('/')}/{uuid.uuid4().hex}.wav"
+    
+    with tempfile.NamedTemporaryFile(suffix=".wav") as tmp:
+        writer = wave.open(tmp, "wb")
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(info.sample_rate)
+        
+        start = info.data_offset
+        end = info.data_offset + info.data_size
+        async for data in iter_object_range(gcs_uri, start, end):
+            writer.writeframes(await run_blocking(trimmer.feed, data))
+        writer.writeframes(trimmer.flush())
+        writer.close()
+        tmp.flush()
+        
+        stats = trimmer.stats()
+        blob = get_storage_client().bucket(bucket_name).blob(blob_name)
+        await run_blocking(blob.upload_from_filename, tmp.name, content_type="audio/wav")
+    
+    logger.info(
+        f"Silence trimmed: {stats['input_seconds']}s -> {stats['output_seconds']}s "
+        f"(saved {stats['saved_seconds']}s, {stats['segments']} segments)"
+    )
+    
+    compact_info = AudioInfo(
+        container="wav",
+        encoding="LINEAR16",
+        sample_rate=info.sample_rate,
+        channels=1,
+        duration_seconds=stats["output_seconds"],
+        bits_per_sample=16,
+        data_offset=WAV_HEADER_BYTES,
+        data_size=trimmer.output_samples * 2,
+    )
+    return f"gs://{bucket_name}/{blob_name}", compact_info, trimmer.offset_map
+
+
+async def _delete_object_safely(gcs_uri: str) -> None:
+    """一時オブジェクトを削除（失敗はログのみ）"""
+    try:
+        await run_blocking(get_blob(gcs_uri).delete)
+    except Exception as e:
+        logger.warning(f"Failed to delete temporary object {gcs_uri}: {e}")
+
+
+async def _recognize_chunked(
+    gcs_uri: str,
+    language_code: str,
+    options: Dict[str, Any],
+    info: AudioInfo
+) -> Tuple[str, List[Segment]]:
+    """
+    無音位置で分割したチャンクを並列に文字起こしして結合（テキストと区間）
+    
+    GCSからPCMを範囲読み込みしながら分割し、確定したチャンクから順に
+    同期 recognize に投入する。同時に処理中のチャンク数は STT_CHUNK_CONCURRENCY
+    までに制限し、読み込みもそれに合わせて待機する（メモリ使用量を抑える）。
+    """
+    settings = get_settings()
+    client = speech.SpeechAsyncClient()
+    chunker = SilenceChunker(
+        sample_rate=info.sample_rate,
+        channels=info.channels,
+        target_seconds=settings.STT_CHUNK_SECONDS,
+        max_seconds=settings.STT_CHUNK_MAX_SECONDS,
+        overlap_seconds=settings.STT_CHUNK_OVERLAP_SECONDS,
+        silence_threshold_db=settings.STT_SILENCE_THRESHOLD_DB,
+    )
+    semaphore = asyncio.Semaphore(max(1, settings.STT_CHUNK_CONCURRENCY))
+    tasks: List[asyncio.Task] = []
+    overlapped: List[bool] = []
+    
+    async def run(chunk: AudioChunk) -> Tuple[str, List[Segment]]:
+        try:
+            return await _recognize_chunk(client, chunk, language_code, options)
+        finally:
+            semaphore.release()
+    
+    async def submit(chunks: List[AudioChunk]) -> None:
+        for chunk in chunks:
+            await semaphore.acquire()
+            overlapped.append(chunk.overlap_samples > 0)
+            tasks.append(asyncio.create_task(run(chunk)))
+    
+    start = info.data_offset
+    end = info.data_offset + info.data_size
+    try:
+        async for data in iter_object_range(gcs_uri, start, end):
+            await submit(chunker.feed(data))
+        await submit(chunker.flush())
+        chunk_results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    
+    logger.info(f"Chunked transcription completed: {len(chunk_results)} chunks")
     
+    texts = [text for text, _ in chunk_results]
+    transcript = stitch_transcripts(list(zip(texts, overlapped)))
     if not transcript:
         logger.warning("No transcript generated from audio")
     
-    return transcript
+    # 重複区間で前のチャンクと重なる区間は除く
+    segments: List[Segment] = []
+    for (_, chunk_segments), is_overlapped in zip(chunk_results, overlapped):
+        last_end = segments[-1][2] if segments else 0.0
+        for segment in chunk_segments:
+            if is_overlapped and segment[1] < last_end:
+                continue
+            segments.append(segment)
+    return transcript, segments
+
+
+async def _recognize_chunk(
+    client: speech.SpeechAsyncClient,
+    chunk: AudioChunk,
+    language_code: str,
+    options: Dict[str, Any]
+) -> Tuple[str, List[Segment]]:
+    """1チャンク（60秒未満）を同期 recognize で文字起こし（区間の時刻は音声全体での位置）"""
+    audio = speech.RecognitionAudio(content=chunk.to_wav_bytes())
+    config = speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        sample_rate_hertz=chunk.sample_rate,
+        language_code=language_code,
+        enable_automatic_punctuation=options["enable_automatic_punctuation"],
+        model=options["model"],
+        enable_word_time_offsets=options["enable_word_time_offsets"],
+    )
+    
+    response = await call_with_quota(
+        DOWNSTREAM_SPEECH,
+        lambda: client.recognize(config=config, audio=audio)
+    )
+    logger.debug(
+        f"Chunk {chunk.index} transcribed "
+        f"({chunk.start_seconds:.1f}s-{chunk.end_seconds:.1f}s)"
+    )
+    return _join_results(response), segments_from_response(response, chunk.start_seconds)
+
+
+async def _probe_audio_safely(gcs_uri: str) -> Optional[AudioInfo]:
+    """ヘッダー解析（未対応形式・読み込み失敗時はNone）"""
+    try:
+        return await run_blocking(probe_audio, gcs_uri)
+    except Exception as e:
+        logger.info(f"Audio header probe skipped: {e}")
+        return None
+
+
+def _audio_format_config(info: Optional[AudioInfo], options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    RecognitionConfig のエンコーディング関連の設定
+    
+    ヘッダーから対応エンコーディングが得られた場合はその値を使い、
+    得られない場合は認識設定の既定値を使う。
+    """
+    if info is None or info.encoding is None:
+        return {
+            "encoding": speech.RecognitionConfig.AudioEncoding[options["encoding"]],
+            "sample_rate_hertz": options["sample_rate_hertz"],
+        }
+    
+    config = {
+        "encoding": speech.RecognitionConfig.AudioEncoding[info.encoding],
+        "sample_rate_hertz": info.sample_rate,
+    }
+    if info.channels > 1:
+        config["audio_channel_count"] = info.channels
+    return config
 
 
 def get_audio_duration(gcs_uri: str) -> float:
     """
     音声ファイルの長さを取得（秒）
     
-    Note: 実際の実装では音声ファイルのメタデータから取得
+    ファイル全体はダウンロードせず、ヘッダーのみを範囲読み込みして算出する。
+    長さが取得できない場合は 0.0 を返す。
     """
-    # TODO: 実際の音声長さを取得する実装
-    return 0.0
+    try:
+        info = probe_audio(gcs_uri)
+    except Exception as e:
+        logger.warning(f"Failed to probe audio duration: {e}")
+        return 0.0
+    return info.duration_seconds or 0.0
 
 
-async def download_audio_from_gcs(gcs_uri: str) -> bytes:
+def stream_audio_from_gcs(
+    gcs_uri: str,
+    chunk_size: Optional[int] = None,
+    concurrency: Optional[int] = None
+) -> AsyncIterator[bytes]:
     """
-    GCSから音声ファイルをダウンロード
+    GCSの音声ファイルをチャンク単位で順に取得
+    
+    範囲読み込みを先読みしながら返すため、ファイルサイズによらず
+    メモリ使用量は chunk_size × concurrency 程度に収まる。
     
     Args:
         gcs_uri: GCS URI (gs://bucket/path/to/file.wav)
+        chunk_size: 1回の読み込みバイト数（省略時は GCS_READ_CHUNK_BYTES）
+        concurrency: 先読みの並列数（省略時は GCS_READ_CONCURRENCY）
     
     Returns:
-        音声ファイルのバイトデータ
+        バイト列の非同期イテレータ
     """
-    # gs://bucket/path/to/file.wav を分解
-    if not gcs_uri.startswith("gs://"):
-        raise ValueError(f"Invalid GCS URI: {gcs_uri}")
-    
-    parts = gcs_uri[5:].split("/", 1)
-    if len(parts) != 2:
-        raise ValueError(f"Invalid GCS URI format: {gcs_uri}")
+    return iter_object_range(gcs_uri, chunk_size=chunk_size, concurrency=concurrency)
+
+
+async def download_audio_from_gcs(gcs_uri: str, directory: Optional[str] = None) -> str:
+    """
+    GCSから音声ファイルを一時ファイルにダウンロード
     
-    bucket_name = parts[0]
-    blob_name = parts[1]
+    オブジェクト全体をメモリに載せず、範囲読み込みでファイルに書き出す。
+    不要になったら呼び出し側で削除すること。
     
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
+    Args:
+        gcs_uri: GCS URI (gs://bucket/path/to/file.wav)
+        directory: 書き出し先ディレクトリ（省略時は AUDIO_SPOOL_DIR）
     
-    return blob.download_as_bytes()
+    Returns:
+        一時ファイルのパス
+    """
+    suffix = os.path.splitext(gcs_uri)[1]
+    return await spool_object_to_file(gcs_uri, directory=directory, suffix=suffix)
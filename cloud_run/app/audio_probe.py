@@ -0,0 +1,252 @@
+"""
+音声ヘッダー解析
+GCSオブジェクトの先頭（OGGは末尾も）を範囲読み込みし、形式・長さ・サンプリングレート等を取得
+"""
+import logging
+import struct
+from dataclasses import dataclass
+from typing import Optional
+
+from .gcs_utils import get_existing_blob
+
+logger = logging.getLogger(__name__)
+
+# 先頭から読み込むバイト数（WAVのLIST等のチャンクが大きい場合に備えて余裕を持たせる）
+HEADER_READ_BYTES = 64 * 1024
+# OGGの最終ページ（granule position）を探すために末尾から読み込むバイト数
+OGG_TAIL_READ_BYTES = 64 * 1024
+
+# WAVのフォーマットコード
+WAV_FORMAT_PCM = 0x0001
+WAV_FORMAT_MULAW = 0x0007
+WAV_FORMAT_EXTENSIBLE = 0xFFFE
+
+OPUS_GRANULE_RATE = 48000
+
+
+@dataclass
+class AudioInfo:
+    """音声ファイルのヘッダー情報"""
+    container: str                      # wav / flac / ogg
+    encoding: Optional[str]             # Speech-to-Text の AudioEncoding 名（未対応形式は None）
+    sample_rate: int
+    channels: int
+    duration_seconds: Optional[float] = None
+    bits_per_sample: Optional[int] = None
+    data_offset: Optional[int] = None   # WAV: PCMデータの開始位置
+    data_size: Optional[int] = None     # WAV: PCMデータのバイト数
+
+
+def parse_wav_header(data: bytes, total_size: Optional[int] = None) -> AudioInfo:
+    """RIFF/WAVEヘッダーを解析"""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+
+    fmt = None
+    data_offset = None
+    data_size = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        chunk_size = struct.unpack_from("<I", data, pos + 4)[0]
+        body = pos + 8
+
+        if chunk_id == b"fmt " and body + 16 <= len(data):
+            audio_format, channels, sample_rate, byte_rate, block_align, bits = struct.unpack_from(
+                "<HHIIHH", data, body
+            )
+            if audio_format == WAV_FORMAT_EXTENSIBLE and chunk_size >= 40 and body + 26 <= len(data):
+                # サブフォーマットGUIDの先頭2バイトが実際のフォーマットコード
+                audio_format = struct.unpack_from("<H", data, body + 24)[0]
+            fmt = (audio_format, channels, sample_rate, byte_rate, block_align, bits)
+        elif chunk_id == b"data":
+            data_offset = body
+            data_size = chunk_size
+            break
+
+        # チャンクは2バイト境界に揃えられる
+        pos = body + chunk_size + (chunk_size & 1)
+
+    if fmt is None:
+        raise ValueError("WAV fmt chunk not found in header bytes")
+
+    audio_format, channels, sample_rate, byte_rate, block_align, bits = fmt
+
+    # ストリーミング書き出しのWAVは data サイズが 0 / 0xFFFFFFFF のことがある
+    if total_size is not None:
+        if data_offset is None:
+            data_offset = min(pos, total_size)
+        if not data_size or data_size == 0xFFFFFFFF or data_offset + data_size > total_size:
+            data_size = total_size - data_offset
+
+    encoding = None
+    if audio_format == WAV_FORMAT_PCM and bits == 16:
+        encoding = "LINEAR16"
+    elif audio_format == WAV_FORMAT_MULAW:
+        encoding = "MULAW"
+
+    duration = data_size / byte_rate if data_size and byte_rate else None
+
+    return AudioInfo(
+        container="wav",
+        encoding=encoding,
+        sample_rate=sample_rate,
+        channels=channels,
+        duration_seconds=duration,
+        bits_per_sample=bits,
+        data_offset=data_offset,
+        data_size=data_size,
+    )
+
+
+def _skip_id3(data: bytes) -> int:
+    """ID3v2タグがあればその長さを返す"""
+    if len(data) >= 10 and data[:3] == b"ID3":
+        size = 0
+        for b in data[6:10]:
+            size = (size << 7) | (b & 0x7F)
+        return 10 + size
+    return 0
+
+
+def parse_flac_header(data: bytes) -> AudioInfo:
+    """FLACのSTREAMINFOブロックを解析"""
+    start = _skip_id3(data)
+    if data[start:start + 4] != b"fLaC":
+        raise ValueError("Not a FLAC file")
+
+    block = start + 4
+    if len(data) < block + 4 + 18:
+        raise ValueError("FLAC header is truncated")
+
+    block_type = data[block] & 0x7F
+    if block_type != 0:
+        raise ValueError("FLAC STREAMINFO block not found")
+
+    info = data[block + 4:block + 4 + 18]
+    # 10バイト目以降: サンプリングレート(20bit) / チャンネル数-1(3bit) / ビット数-1(5bit) / 総サンプル数(36bit)
+    packed = int.from_bytes(info[10:18], "big")
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x07) + 1
+    bits = ((packed >> 36) & 0x1F) + 1
+    total_samples = packed & 0xFFFFFFFFF
+
+    duration = total_samples / sample_rate if total_samples and sample_rate else None
+
+    return AudioInfo(
+        container="flac",
+        encoding="FLAC",
+        sample_rate=sample_rate,
+        channels=channels,
+        duration_seconds=duration,
+        bits_per_sample=bits,
+    )
+
+
+def _parse_ogg_page(data: bytes, pos: int):
+    """OGGページヘッダーを解析し (granule, 先頭パケット位置, 次ページ位置) を返す"""
+    if data[pos:pos + 4] != b"OggS" or pos + 27 > len(data):
+        return None
+    granule = struct.unpack_from("<q", data, pos + 6)[0]
+    segments = data[pos + 26]
+    table_end = pos + 27 + segments
+    if table_end > len(data):
+        return None
+    body_size = sum(data[pos + 27:table_end])
+    return granule, table_end, table_end + body_size
+
+
+def parse_ogg_header(head: bytes, tail: Optional[bytes] = None) -> AudioInfo:
+    """OGG（Opus / Vorbis）の識別ヘッダーと最終ページを解析"""
+    page = _parse_ogg_page(head, 0)
+    if page is None:
+        raise ValueError("Not an OGG file")
+    _, packet_start, _ = page
+    packet = head[packet_start:packet_start + 19]
+
+    if packet[:8] == b"OpusHead":
+        channels = packet[9]
+        pre_skip = struct.unpack_from("<H", packet, 10)[0]
+        input_rate = struct.unpack_from("<I", packet, 12)[0]
+        encoding = "OGG_OPUS"
+        granule_rate = OPUS_GRANULE_RATE
+        sample_rate = input_rate or OPUS_GRANULE_RATE
+    elif packet[:7] == b"\x01vorbis":
+        channels = packet[11]
+        sample_rate = struct.unpack_from("<I", packet, 12)[0]
+        pre_skip = 0
+        # Speech-to-Text v1 は Vorbis 非対応
+        encoding = None
+        granule_rate = sample_rate
+    else:
+        raise ValueError("Unsupported OGG codec")
+
+    duration = None
+    if tail:
+        last_granule = None
+        pos = tail.rfind(b"OggS")
+        while pos >= 0:
+            parsed = _parse_ogg_page(tail, pos)
+            if parsed is not None and parsed[0] >= 0:
+                last_granule = parsed[0]
+                break
+            pos = tail.rfind(b"OggS", 0, pos)
+        if last_granule is not None and granule_rate:
+            duration = max(0, last_granule - pre_skip) / granule_rate
+
+    return AudioInfo(
+        container="ogg",
+        encoding=encoding,
+        sample_rate=sample_rate,
+        channels=channels,
+        duration_seconds=duration,
+    )
+
+
+def parse_audio_header(
+    head: bytes,
+    total_size: Optional[int] = None,
+    tail: Optional[bytes] = None
+) -> AudioInfo:
+    """先頭バイト列から形式を判定して解析"""
+    if head[:4] == b"RIFF":
+        return parse_wav_header(head, total_size)
+    if head[:4] == b"OggS":
+        return parse_ogg_header(head, tail)
+    if head[_skip_id3(head):][:4] == b"fLaC":
+        return parse_flac_header(head)
+    raise ValueError("Unsupported audio format")
+
+
+def probe_audio(gcs_uri: str) -> AudioInfo:
+    """
+    GCS上の音声ファイルのヘッダーを範囲読み込みで解析
+
+    オブジェクト全体はダウンロードしない（先頭 HEADER_READ_BYTES、
+    OGGの場合は末尾 OGG_TAIL_READ_BYTES のみ）。
+
+    Args:
+        gcs_uri: GCS URI (gs://bucket/path/to/file.wav)
+
+    Returns:
+        AudioInfo
+    """
+    blob = get_existing_blob(gcs_uri)
+
+    total_size = blob.size
+    if not total_size:
+        raise ValueError(f"GCS object is empty: {gcs_uri}")
+    head = blob.download_as_bytes(start=0, end=min(HEADER_READ_BYTES, total_size) - 1)
+
+    tail = None
+    if head[:4] == b"OggS":
+        tail_start = max(0, total_size - OGG_TAIL_READ_BYTES)
+        tail = blob.download_as_bytes(start=tail_start, end=total_size - 1)
+
+    info = parse_audio_header(head, total_size, tail)
+    logger.info(
+        f"Audio probed: container={info.container}, encoding={info.encoding}, "
+        f"sample_rate={info.sample_rate}, channels={info.channels}, "
+        f"duration={info.duration_seconds}"
+    )
+    return info
@@ -0,0 +1,137 @@
+"""
+永続キャッシュストア
+JSON値をキー単位で保存するローカルディスク / GCS バックエンド
+"""
+import json
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Optional, Dict, Any
+
+from google.api_core import exceptions as google_exceptions
+
+from .settings import get_settings
+from .executor import run_blocking
+from .gcs_utils import get_storage_client
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND_NONE = "none"
+CACHE_BACKEND_LOCAL = "local"
+CACHE_BACKEND_GCS = "gcs"
+
+
+class CacheStore(ABC):
+    """キャッシュストアの共通インターフェース"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """値を取得（無い場合はNone）"""
+
+    @abstractmethod
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """値を保存"""
+
+    async def get_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """get の非同期版（読み込み失敗はミス扱い）"""
+        try:
+            return await run_blocking(self.get, key)
+        except Exception as e:
+            logger.warning(f"Cache read failed ({self.namespace}/{key}): {e}")
+            return None
+
+    async def put_async(self, key: str, value: Dict[str, Any]) -> None:
+        """put の非同期版（書き込み失敗はログのみ）"""
+        try:
+            await run_blocking(self.put, key, value)
+        except Exception as e:
+            logger.warning(f"Cache write failed ({self.namespace}/{key}): {e}")
+
+
+class LocalDiskCacheStore(CacheStore):
+    """ローカルディスク上のJSONファイルに保存"""
+
+    def __init__(self, namespace: str, directory: str):
+        super().__init__(namespace)
+        self.directory = os.path.join(directory, namespace)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        # 一時ファイルに書いてから置き換え、読み込み側に書きかけを見せない
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class GCSCacheStore(CacheStore):
+    """GCSバケット上のJSONオブジェクトに保存（インスタンス間で共有）"""
+
+    def __init__(self, namespace: str, bucket_name: str, prefix: str):
+        super().__init__(namespace)
+        self.bucket_name = bucket_name
+        self.prefix = prefix.strip("/")
+
+    def _blob(self, key: str):
+        bucket = get_storage_client().bucket(self.bucket_name)
+        return bucket.blob(f"{self.prefix}/{self.namespace}/{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            data = self._blob(key).download_as_bytes()
+        except google_exceptions.NotFound:
+            return None
+        return json.loads(data.decode("utf-8"))
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        self._blob(key).upload_from_string(
+            json.dumps(value, ensure_ascii=False),
+            content_type="application/json"
+        )
+
+
+def create_cache_store(namespace: str, backend: str) -> Optional[CacheStore]:
+    """
+    設定に応じたキャッシュストアを生成
+
+    Args:
+        namespace: 用途ごとの名前空間（transcripts 等）
+        backend: none / local / gcs
+
+    Returns:
+        CacheStore（無効の場合はNone）
+    """
+    settings = get_settings()
+    backend = (backend or CACHE_BACKEND_NONE).lower()
+
+    if backend == CACHE_BACKEND_LOCAL:
+        return LocalDiskCacheStore(namespace, settings.CACHE_DIR)
+
+    if backend == CACHE_BACKEND_GCS:
+        if not settings.CACHE_GCS_BUCKET:
+            logger.warning(f"CACHE_GCS_BUCKET is not set - {namespace} cache disabled")
+            return None
+        return GCSCacheStore(namespace, settings.CACHE_GCS_BUCKET, settings.CACHE_GCS_PREFIX)
+
+    if backend != CACHE_BACKEND_NONE:
+        logger.warning(f"Unknown cache backend '{backend}' - {namespace} cache disabled")
+    return None
@@ -0,0 +1,70 @@
+"""
+抽出結果のコンパクト出力形式
+ラベルを番号付きで送り、モデルは [番号, 値, 確信度, 根拠] の行のみを返す（ラベル名を出力しない）
+"""
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMAT_JSON = "json"
+OUTPUT_FORMAT_COMPACT = "compact"
+
+# 行に含まれなかったラベルの値
+EMPTY_FIELD = {"value": None, "confidence": 0.0, "evidence": ""}
+
+
+def number_labels(labels: List[str]) -> str:
+    """ラベル一覧を1始まりの番号付きリストにする（"1. ラベル" の行）"""
+    return "\n".join(f"{i}. {label}" for i, label in enumerate(labels, start=1))
+
+
+def decode_compact_row(row: Any, labels: List[str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    1行 [番号, 値, 確信度, 根拠] を (label, {value, confidence, evidence}) に変換
+
+    確信度・根拠は省略可。番号が範囲外の行や形式が不正な行はNone。
+    """
+    if not isinstance(row, list) or len(row) < 2:
+        return None
+    try:
+        index = int(row[0])
+    except (TypeError, ValueError):
+        return None
+    if not 1 <= index <= len(labels):
+        return None
+
+    return labels[index - 1], {
+        "value": row[1],
+        "confidence": row[2] if len(row) > 2 and row[2] is not None else 0.0,
+        "evidence": row[3] if len(row) > 3 and row[3] is not None else "",
+    }
+
+
+def decode_compact_rows(rows: List[Any], labels: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    コンパクト形式の行一覧を {label: {value, confidence, evidence}} に変換
+
+    行に含まれないラベルは値なし（EMPTY_FIELD）とする。同じ番号の行が複数ある場合は先の行を採用。
+
+    Args:
+        rows: [[番号, 値, 確信度, 根拠], ...]
+        labels: プロンプトで番号を付けたラベル一覧（番号 - 1 がインデックス）
+
+    Returns:
+        {label: {value, confidence, evidence}}（labels の全ラベルを含む）
+    """
+    decoded: Dict[str, Dict[str, Any]] = {}
+    skipped = 0
+    for row in rows:
+        field = decode_compact_row(row, labels)
+        if field is None:
+            skipped += 1
+            continue
+        label, data = field
+        decoded.setdefault(label, data)
+
+    if skipped:
+        logger.warning(f"Skipped {skipped} malformed rows in compact extraction output")
+
+    return {label: decoded.get(label, dict(EMPTY_FIELD)) for label in labels}
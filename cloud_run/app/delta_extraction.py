@@ -0,0 +1,200 @@
+"""
+差分抽出
+レコード×文字起こし単位で前回の抽出結果を保持し、ラベル追加時は追加分のみをClaudeに問い合わせる
+"""
+import json
+import logging
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+from .settings import get_settings
+from .ttl_cache import TTLCache, MISSING
+from .cache_store import create_cache_store
+from .extraction_cache import hash_text, get_failed_labels
+from .extract_schema import (
+    extract_fields_from_transcript, get_extraction_options, FieldCallback
+)
+from .retrieval import RetrievalContext
+
+logger = logging.getLogger(__name__)
+
+# 保存形式を変更した場合は上げる
+SNAPSHOT_VERSION = 1
+
+# 抽出モード
+EXTRACTION_MODE_FULL = "full"
+EXTRACTION_MODE_DELTA = "delta"
+EXTRACTION_MODE_REUSE = "reuse"
+
+
+def make_snapshot_key(
+    sheet_id: str,
+    sheet_name: str,
+    record_id: Optional[str],
+    transcript: str,
+    metadata: Optional[Dict[str, Any]]
+) -> str:
+    """レコード×文字起こし×抽出設定ごとのスナップショットキー"""
+    key_source = {
+        "version": SNAPSHOT_VERSION,
+        "sheet_id": sheet_id,
+        "sheet_name": sheet_name,
+        "record_id": record_id or "",
+        "transcript": hash_text(transcript),
+        "metadata": metadata or {},
+        "options": get_extraction_options(),
+    }
+    canonical = json.dumps(key_source, ensure_ascii=False, sort_keys=True, default=str)
+    return hash_text(canonical)
+
+
+def diff_labels(extracted_labels: List[str], labels: List[str]) -> List[str]:
+    """
+    前回抽出済みのラベルとの差分
+
+    ラベル名を変更した場合も新しいラベルとして扱う。
+
+    Returns:
+        今回新たに抽出が必要なラベル（シート上の順序を維持）
+    """
+    extracted = set(extracted_labels)
+    return [label for label in labels if label not in extracted]
+
+
+class ExtractionSnapshotStore:
+    """前回の抽出結果（スナップショット）の保存先"""
+
+    def __init__(self):
+        settings = get_settings()
+        self._memory = TTLCache(
+            maxsize=settings.EXTRACTION_CACHE_MAX_SIZE,
+            ttl=settings.EXTRACTION_CACHE_TTL_SECONDS
+        )
+        self._store = create_cache_store(
+            "extraction_snapshots", settings.EXTRACTION_SNAPSHOT_BACKEND
+        )
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        snapshot = self._memory.get(key)
+        if snapshot is not MISSING:
+            return snapshot
+        if self._store is None:
+            return None
+
+        snapshot = await self._store.get_async(key)
+        if snapshot is not None:
+            self._memory.set(key, snapshot)
+        return snapshot
+
+    async def put(self, key: str, extracted_labels: List[str], results: Dict[str, Any]) -> None:
+        snapshot = {
+            "extracted_labels": extracted_labels,
+            "results": results,
+            "updated_at": time.time(),
+        }
+        self._memory.set(key, snapshot)
+        if self._store is not None:
+            await self._store.put_async(key, snapshot)
+
+
+async def extract_with_delta(
+    transcript: str,
+    labels: List[str],
+    sheet_id: str,
+    sheet_name: str,
+    record_id: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    retrieval: Optional[RetrievalContext] = None,
+    on_field: Optional[FieldCallback] = None
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    """
+    前回の抽出結果を再利用して差分のみ抽出
+
+    Args:
+        transcript: 文字起こしテキスト
+        labels: 現在のシートのラベル一覧
+        sheet_id: スプレッドシートID
+        sheet_name: シート名
+        record_id: レコードID
+        metadata: メタデータ
+        retrieval: 関連箇所絞り込みの同義語・統計
+        on_field: ストリーミング抽出で項目が確定するたびに呼ばれるコールバック
+
+    Returns:
+        ({label: {value, confidence, evidence}}, {mode, requested_labels})
+    """
+    settings = get_settings()
+    if not settings.EXTRACTION_DELTA_ENABLED or not transcript:
+        results = await extract_fields_from_transcript(
+            transcript, labels, metadata, retrieval, on_field
+        )
+        return results, {"mode": EXTRACTION_MODE_FULL, "requested_labels": len(labels)}
+
+    store = get_snapshot_store()
+    key = make_snapshot_key(sheet_id, sheet_name, record_id, transcript, metadata)
+    snapshot = await store.get(key)
+
+    previous_results: Dict[str, Dict[str, Any]] = {}
+    extracted_labels: List[str] = []
+    if snapshot is not None:
+        previous_results = snapshot["results"]
+        extracted_labels = snapshot["extracted_labels"]
+
+    new_labels = diff_labels(extracted_labels, labels)
+    if snapshot is None:
+        mode = EXTRACTION_MODE_FULL
+    elif new_labels:
+        mode = EXTRACTION_MODE_DELTA
+    else:
+        mode = EXTRACTION_MODE_REUSE
+
+    delta_results: Dict[str, Dict[str, Any]] = {}
+    if new_labels:
+        logger.info(
+            f"Extraction mode={mode}: requesting {len(new_labels)}/{len(labels)} labels"
+        )
+        delta_results = await extract_fields_from_transcript(
+            transcript, new_labels, metadata, retrieval, on_field
+        )
+
+        # 解析に成功した応答に含まれたラベルのみ抽出済みとして記録（失敗分は次回再抽出）
+        failed_labels = get_failed_labels(delta_results)
+        succeeded = [
+            label for label in new_labels
+            if label in delta_results and label not in failed_labels
+        ]
+        if failed_labels:
+            logger.warning(
+                f"Extraction failed for {len(failed_labels)} labels, "
+                f"not recording them in the snapshot"
+            )
+        if succeeded:
+            all_results = {
+                **previous_results,
+                **{label: delta_results[label] for label in succeeded},
+            }
+            await store.put(key, extracted_labels + succeeded, all_results)
+    else:
+        logger.info(f"Extraction mode={mode}: all {len(labels)} labels reused from previous run")
+
+    # 現在シートに存在するラベルのみを返す（削除されたラベルは書き込まない）
+    merged = {}
+    for label in labels:
+        if label in delta_results:
+            merged[label] = delta_results[label]
+        elif label in previous_results:
+            merged[label] = previous_results[label]
+
+    return merged, {"mode": mode, "requested_labels": len(new_labels)}
+
+
+# シングルトンインスタンス
+_snapshot_store: Optional[ExtractionSnapshotStore] = None
+
+
+def get_snapshot_store() -> ExtractionSnapshotStore:
+    """ExtractionSnapshotStoreのシングルトンインスタンスを取得"""
+    global _snapshot_store
+    if _snapshot_store is None:
+        _snapshot_store = ExtractionSnapshotStore()
+    return _snapshot_store
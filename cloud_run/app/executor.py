@@ -0,0 +1,57 @@
+"""
+ブロッキング処理用スレッドプール
+同期SDK（gspread, Secret Manager, GCS等）の呼び出しをイベントループ外で実行
+"""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from .settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# シングルトンインスタンス
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """ブロッキングI/O用スレッドプールを取得（遅延初期化）"""
+    global _executor
+    if _executor is None:
+        max_workers = get_settings().BLOCKING_IO_MAX_WORKERS
+        _executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="blocking-io"
+        )
+        logger.info(f"Blocking I/O executor initialized: max_workers={max_workers}")
+    return _executor
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    同期関数をスレッドプールで実行し、結果を待機
+
+    Args:
+        func: 実行する同期関数
+        *args, **kwargs: 関数に渡す引数
+
+    Returns:
+        関数の戻り値
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(),
+        functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown_executor() -> None:
+    """スレッドプールを停止"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
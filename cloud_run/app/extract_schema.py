@@ -2,33 +2,153 @@
 Claude API を使用した項目抽出
 文字起こしテキストから指定されたラベルに対応する値を抽出
 """
+import asyncio
 import json
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable, AsyncIterator, Set
 
 import anthropic
-from google.cloud import secretmanager
 
 from .settings import get_settings
+from .secret_provider import get_secret_provider
+from .rate_limit import call_with_quota, DOWNSTREAM_ANTHROPIC
+from .extraction_cache import (
+    get_extraction_cache, make_extraction_cache_key, PartialExtractionResult,
+    get_failed_labels
+)
+from .token_utils import estimate_tokens
+from .windowed_extraction import extract_windowed
+from .retrieval import BM25Index, RetrievalContext, narrow_transcript
+from .streaming_json import IncrementalObjectParser, IncrementalArrayParser, record_streamed_extraction
+from .segments import has_segment_numbers
+from .field_coalescer import SingleFieldCoalescer
+from .model_tiering import (
+    TIER_FAST, TIER_STRONG, needs_escalation, select_escalation_labels, merge_escalated,
+    record_tier_pass, record_tiered_job
+)
+from .compact_output import (
+    OUTPUT_FORMAT_COMPACT, number_labels, decode_compact_row, decode_compact_rows
+)
 
 logger = logging.getLogger(__name__)
 
+# プロンプトの内容を変更した場合は上げる（抽出キャッシュを無効化）
+EXTRACTION_PROMPT_VERSION = 2
+
+EXTRACTION_MAX_TOKENS = 4096
+
+# ストリーミング時に項目が確定するたびに呼ばれるコールバック (label, {value, confidence, evidence})
+FieldCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class ExtractionResponseError(ValueError):
+    """抽出レスポンスをJSONとして解析できない"""
+
+
+# 長寿命のClaudeクライアント（APIキーのローテーション時のみ再生成）
+_anthropic_client: Optional[anthropic.AsyncAnthropic] = None
+_anthropic_client_key: Optional[str] = None
+_anthropic_client_lock = asyncio.Lock()
+# クライアントごとの実行中リクエスト数と、ローテーション後に実行中のリクエストを待っているクライアント
+_anthropic_client_users: Dict[anthropic.AsyncAnthropic, int] = {}
+_retired_anthropic_clients: Set[anthropic.AsyncAnthropic] = set()
+
+# 単一項目抽出のコアレッサー（初回使用時に生成）
+_single_field_coalescer: Optional[SingleFieldCoalescer] = None
+
 
 def get_anthropic_api_key() -> str:
-    """Secret ManagerからAnthropic APIキーを取得"""
+    """Secret ManagerからAnthropic APIキーを取得（キャッシュ経由）"""
     settings = get_settings()
+    return get_secret_provider().get(settings.ANTHROPIC_API_KEY_SECRET_NAME)
+
+
+async def get_anthropic_api_key_async() -> str:
+    """Secret ManagerからAnthropic APIキーを取得（キャッシュ経由・非同期版）"""
+    settings = get_settings()
+    return await get_secret_provider().get_async(settings.ANTHROPIC_API_KEY_SECRET_NAME)
+
+
+async def get_anthropic_client() -> anthropic.AsyncAnthropic:
+    """
+    共有Claudeクライアントを取得
     
-    client = secretmanager.SecretManagerServiceClient()
-    name = f"projects/{settings.GCP_PROJECT}/secrets/{settings.ANTHROPIC_API_KEY_SECRET_NAME}/versions/latest"
+    コネクションプールを再利用するため、APIキーが変わらない限り同じ
+    インスタンスを返す。リクエストに使う場合は use_anthropic_client() を使う
+    （ローテーション時に実行中のリクエストを中断しないため）。
+    """
+    api_key = await get_anthropic_api_key_async()
+    async with _anthropic_client_lock:
+        return await _current_anthropic_client(api_key)
+
+
+async def _current_anthropic_client(api_key: str) -> anthropic.AsyncAnthropic:
+    """APIキーに対応するクライアント（_anthropic_client_lock を保持して呼ぶ）"""
+    global _anthropic_client, _anthropic_client_key
+    
+    if _anthropic_client is None or api_key != _anthropic_client_key:
+        if _anthropic_client is not None:
+            logger.info("Anthropic API key changed, recreating client")
+            await _retire_anthropic_client(_anthropic_client)
+        # リトライは rate_limit 層で行うため SDK 側のリトライは無効化
+        _anthropic_client = anthropic.AsyncAnthropic(api_key=api_key, max_retries=0)
+        _anthropic_client_key = api_key
+    return _anthropic_client
+
+
+async def _retire_anthropic_client(client: anthropic.AsyncAnthropic) -> None:
+    """旧クライアントをクローズ（実行中のリクエストがあれば、その完了後にクローズ）"""
+    if _anthropic_client_users.get(client):
+        _retired_anthropic_clients.add(client)
+        return
+    await client.close()
+
+
+@asynccontextmanager
+async def use_anthropic_client() -> AsyncIterator[anthropic.AsyncAnthropic]:
+    """
+    リクエスト1回分の共有Claudeクライアントを取得
     
-    response = client.access_secret_version(request={"name": name})
-    return response.payload.data.decode("UTF-8")
+    ブロック内で APIキーがローテーションされても、ブロックを抜けるまで
+    このクライアントはクローズしない。
+    """
+    api_key = await get_anthropic_api_key_async()
+    async with _anthropic_client_lock:
+        client = await _current_anthropic_client(api_key)
+        _anthropic_client_users[client] = _anthropic_client_users.get(client, 0) + 1
+    try:
+        yield client
+    finally:
+        remaining = _anthropic_client_users[client] - 1
+        if remaining:
+            _anthropic_client_users[client] = remaining
+        else:
+            del _anthropic_client_users[client]
+            if client in _retired_anthropic_clients:
+                _retired_anthropic_clients.discard(client)
+                await client.close()
+
+
+async def close_anthropic_client() -> None:
+    """共有Claudeクライアントをクローズ（アプリ終了時）"""
+    global _anthropic_client, _anthropic_client_key
+    for client in list(_retired_anthropic_clients):
+        await client.close()
+    _retired_anthropic_clients.clear()
+    if _anthropic_client is not None:
+        await _anthropic_client.close()
+        _anthropic_client = None
+        _anthropic_client_key = None
 
 
 async def extract_fields_from_transcript(
     transcript: str,
     labels: List[str],
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = None,
+    retrieval: Optional[RetrievalContext] = None,
+    on_field: Optional[FieldCallback] = None
 ) -> Dict[str, Dict[str, Any]]:
     """
     Claude APIを使用してトランスクリプトから項目を抽出
@@ -37,96 +157,510 @@ async def extract_fields_from_transcript(
         transcript: 文字起こしテキスト
         labels: 抽出する項目のラベル一覧
         metadata: メタデータ（CA名、SlackメンションID等）
+        retrieval: 関連箇所絞り込みの同義語・統計（RETRIEVAL_ENABLED 時のみ使用）
+        on_field: 項目が確定するたびに呼ばれるコールバック（ストリーミング時のみ。
+            キャッシュヒット時やウィンドウ分割時は呼ばれないため、最終結果は戻り値を使う）
     
     Returns:
         {label: {value, confidence, evidence}} 形式の辞書
     """
-    settings = get_settings()
-    
     if not transcript:
         logger.warning("Empty transcript provided")
         return {}
     
-    # APIキーを取得
-    api_key = get_anthropic_api_key()
+    settings = get_settings()
+    options = get_extraction_options()
+    if settings.RETRIEVAL_ENABLED:
+        retrieval = retrieval or RetrievalContext()
+        # 絞り込み結果はプロンプトに影響するため、設定と同義語もキーに含める
+        options["retrieval"] = {
+            "top_k": settings.RETRIEVAL_TOP_K,
+            "min_score": settings.RETRIEVAL_MIN_SCORE,
+            "min_coverage": settings.RETRIEVAL_MIN_COVERAGE,
+            "synonyms": {
+                label: retrieval.synonyms[label]
+                for label in labels if label in retrieval.synonyms
+            },
+        }
+    else:
+        retrieval = None
     
-    # Claudeクライアント初期化
-    client = anthropic.Anthropic(api_key=api_key)
+    # 入力が同一なら前回の抽出結果を再利用（LLM呼び出しなし）
+    cache_key = make_extraction_cache_key(transcript, labels, metadata, options)
+    return await get_extraction_cache().get_or_compute(
+        cache_key,
+        lambda: _extract_fields_uncached(transcript, labels, metadata, retrieval, on_field)
+    )
+
+
+def get_extraction_options() -> Dict[str, Any]:
+    """抽出結果に影響する設定（抽出キャッシュのキーに使用）"""
+    settings = get_settings()
+    options = {
+        "prompt_version": EXTRACTION_PROMPT_VERSION,
+        "model": settings.CLAUDE_MODEL,
+        "max_tokens": EXTRACTION_MAX_TOKENS,
+        "output_format": settings.EXTRACTION_OUTPUT_FORMAT,
+    }
+    if is_tiering_enabled():
+        options["tiering"] = {
+            "fast_model": settings.CLAUDE_FAST_MODEL,
+            "escalation_confidence": settings.EXTRACTION_ESCALATION_CONFIDENCE,
+            "escalate_missing": settings.EXTRACTION_ESCALATE_MISSING,
+        }
+    return options
+
+
+def is_tiering_enabled() -> bool:
+    """高速モデル → 高精度モデルの2段階抽出を行うか（CLAUDE_FAST_MODEL が設定されている場合）"""
+    settings = get_settings()
+    return bool(settings.CLAUDE_FAST_MODEL) and settings.CLAUDE_FAST_MODEL != settings.CLAUDE_MODEL
+
+
+async def _extract_fields_uncached(
+    transcript: str,
+    labels: List[str],
+    metadata: Optional[Dict[str, Any]] = None,
+    retrieval: Optional[RetrievalContext] = None,
+    on_field: Optional[FieldCallback] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Claude APIを呼び出して抽出（キャッシュなし）"""
+    if is_tiering_enabled():
+        return await _extract_tiered(transcript, labels, metadata, retrieval, on_field)
+    return await _extract_with_model(transcript, labels, metadata, retrieval, on_field)
+
+
+async def _extract_tiered(
+    transcript: str,
+    labels: List[str],
+    metadata: Optional[Dict[str, Any]] = None,
+    retrieval: Optional[RetrievalContext] = None,
+    on_field: Optional[FieldCallback] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    2段階抽出
+    
+    全ラベルを CLAUDE_FAST_MODEL で抽出し、確信度が EXTRACTION_ESCALATION_CONFIDENCE
+    未満の項目（と取得できなかった項目）のみを CLAUDE_MODEL でまとめて再抽出する。
+    on_field は高速モデルの確信度が十分な項目と、高精度モデルの結果で呼ぶ。
+    """
+    settings = get_settings()
+    threshold = settings.EXTRACTION_ESCALATION_CONFIDENCE
+    escalate_missing = settings.EXTRACTION_ESCALATE_MISSING
+    
+    fast_on_field = None
+    if on_field is not None:
+        async def fast_on_field(label: str, data: Dict[str, Any]) -> None:
+            if not needs_escalation(data, threshold, escalate_missing):
+                await on_field(label, data)
+    
+    started = time.monotonic()
+    fast_results = await _extract_with_model(
+        transcript, labels, metadata, retrieval, fast_on_field, settings.CLAUDE_FAST_MODEL
+    )
+    record_tier_pass(TIER_FAST, time.monotonic() - started)
+    
+    escalated = select_escalation_labels(fast_results, labels, threshold, escalate_missing)
+    record_tiered_job(len(labels), len(escalated))
+    if not escalated:
+        return fast_results
+    
+    logger.info(
+        f"Escalating {len(escalated)}/{len(labels)} labels to {settings.CLAUDE_MODEL} "
+        f"(confidence < {threshold})"
+    )
+    started = time.monotonic()
+    strong_results = await _extract_with_model(
+        transcript, escalated, metadata, retrieval, on_field, settings.CLAUDE_MODEL
+    )
+    record_tier_pass(TIER_STRONG, time.monotonic() - started)
+    
+    return merge_escalated(fast_results, strong_results, escalated)
+
+
+async def _extract_with_model(
+    transcript: str,
+    labels: List[str],
+    metadata: Optional[Dict[str, Any]] = None,
+    retrieval: Optional[RetrievalContext] = None,
+    on_field: Optional[FieldCallback] = None,
+    model: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """指定モデルで抽出（長い文字起こしはウィンドウ分割）"""
+    settings = get_settings()
+    window_tokens = settings.EXTRACTION_WINDOW_TOKENS
+    
+    # 長い文字起こしはウィンドウに分割して map-reduce
+    # （ウィンドウ単位の結果は reduce まで確定しないため on_field は使わない）
+    if window_tokens > 0 and estimate_tokens(transcript) > window_tokens:
+        return await extract_windowed(
+            transcript,
+            labels,
+            metadata,
+            extract=lambda window, window_labels, window_metadata: _extract_labels(
+                window, window_labels, window_metadata, retrieval, model=model
+            ),
+            window_tokens=window_tokens,
+            overlap_tokens=settings.EXTRACTION_WINDOW_OVERLAP_TOKENS,
+            concurrency=settings.EXTRACTION_WINDOW_CONCURRENCY,
+        )
+    
+    return await _extract_labels(transcript, labels, metadata, retrieval, on_field, model)
+
+
+async def _extract_labels(
+    transcript: str,
+    labels: List[str],
+    metadata: Optional[Dict[str, Any]] = None,
+    retrieval: Optional[RetrievalContext] = None,
+    on_field: Optional[FieldCallback] = None,
+    model: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """1つの文字起こし（ウィンドウ）からラベルを抽出（必要に応じてシャード分割）"""
+    settings = get_settings()
+    shard_size = settings.EXTRACTION_SHARD_SIZE
+    
+    # ラベル群ごとに関連する文のみを送る（索引は文字起こし1つにつき1回構築）
+    narrow: Callable[[List[str]], str] = lambda group: transcript
+    if retrieval is not None:
+        index = BM25Index.from_transcript(transcript)
+        narrow = lambda group: narrow_transcript(
+            transcript,
+            index,
+            group,
+            retrieval,
+            top_k=settings.RETRIEVAL_TOP_K,
+            min_score=settings.RETRIEVAL_MIN_SCORE,
+            min_coverage=settings.RETRIEVAL_MIN_COVERAGE,
+        )
+    
+    if shard_size > 0 and len(labels) > shard_size:
+        return await _extract_sharded(narrow, labels, metadata, shard_size, on_field, model)
+    
+    response_text, _ = await _request_extraction(
+        narrow(labels), labels, metadata, on_field, model
+    )
+    
+    # JSONを抽出（解析できない応答は部分的な結果として扱い、キャッシュしない）
+    try:
+        return parse_extraction_json(response_text, labels)
+    except ExtractionResponseError as e:
+        logger.error(f"Failed to parse JSON response ({len(labels)} labels not extracted): {e}")
+        logger.error(f"Response text: {response_text[:500]}")
+        return PartialExtractionResult(failed_labels=labels)
+
+
+def split_labels(labels: List[str], shard_size: int) -> List[List[str]]:
+    """ラベル一覧を shard_size 件ずつに分割（順序は維持）"""
+    return [labels[i:i + shard_size] for i in range(0, len(labels), shard_size)]
+
+
+async def _extract_sharded(
+    narrow: Callable[[List[str]], str],
+    labels: List[str],
+    metadata: Optional[Dict[str, Any]],
+    shard_size: int,
+    on_field: Optional[FieldCallback] = None,
+    model: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    ラベルをシャードに分割して並列に抽出し、結果をマージ
+    
+    narrow はシャードのラベル群に対して送信する文字起こしを返す関数。
+    同時実行数は EXTRACTION_SHARD_CONCURRENCY まで。失敗したシャードは
+    そのシャードのみ再試行し、最終的に失敗したシャードのラベルは結果に含めない
+    （その場合の結果はキャッシュしない）。全シャードが失敗した場合は最後の例外を送出する。
+    """
+    settings = get_settings()
+    shards = split_labels(labels, shard_size)
+    semaphore = asyncio.Semaphore(max(1, settings.EXTRACTION_SHARD_CONCURRENCY))
+    errors: List[Exception] = []
+    
+    logger.info(f"Sharded extraction: {len(labels)} labels in {len(shards)} shards")
+    
+    async def run(shard: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        async with semaphore:
+            try:
+                return await _extract_shard(narrow(shard), shard, metadata, on_field, model)
+            except Exception as e:
+                # 1シャードの失敗で他のシャードの結果を失わないようにする
+                errors.append(e)
+                return None
+    
+    shard_results = await asyncio.gather(*(run(shard) for shard in shards))
+    
+    failed = [shard for shard, result in zip(shards, shard_results) if result is None]
+    if len(failed) == len(shards):
+        raise errors[-1]
+    
+    partial = bool(failed) or any(
+        isinstance(result, PartialExtractionResult) for result in shard_results
+    )
+    failed_labels = [label for shard in failed for label in shard]
+    for result in shard_results:
+        if result is not None:
+            failed_labels.extend(get_failed_labels(result))
+    merged: Dict[str, Dict[str, Any]] = (
+        PartialExtractionResult(failed_labels=failed_labels) if partial else {}
+    )
+    for result in shard_results:
+        if result:
+            merged.update(result)
+    
+    if failed:
+        failed_labels = sum(len(shard) for shard in failed)
+        logger.error(
+            f"Sharded extraction: {len(failed)}/{len(shards)} shards failed "
+            f"({failed_labels} labels not extracted)"
+        )
+    
+    return merged
+
+
+async def _extract_shard(
+    transcript: str,
+    labels: List[str],
+    metadata: Optional[Dict[str, Any]],
+    on_field: Optional[FieldCallback] = None,
+    model: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    1シャード分を抽出（API呼び出し・解析の失敗時は再試行）
+    
+    出力が max_tokens で打ち切られた場合は、シャードを半分に分けて抽出する
+    （片方のみ失敗した場合は部分的な結果を返す）。
+    
+    Returns:
+        抽出結果
+    
+    Raises:
+        EXTRACTION_SHARD_MAX_ATTEMPTS 回試行しても失敗した場合は最後の例外
+    """
+    settings = get_settings()
+    attempts = max(1, settings.EXTRACTION_SHARD_MAX_ATTEMPTS)
+    last_error: Optional[Exception] = None
+    
+    for attempt in range(1, attempts + 1):
+        try:
+            response_text, stop_reason = await _request_extraction(
+                transcript, labels, metadata, on_field, model
+            )
+            if stop_reason != "max_tokens" or len(labels) <= 1:
+                return parse_extraction_json(response_text, labels)
+        except Exception as e:
+            last_error = e
+            logger.warning(
+                f"Shard extraction failed (attempt {attempt}/{attempts}): {type(e).__name__}: {e}"
+            )
+            continue
+        
+        # 各半分はそれぞれ再試行するため、ここでは再試行しない
+        logger.warning(f"Shard output truncated, splitting {len(labels)} labels")
+        half = len(labels) // 2
+        halves = await asyncio.gather(
+            _extract_shard(transcript, labels[:half], metadata, on_field, model),
+            _extract_shard(transcript, labels[half:], metadata, on_field, model),
+            return_exceptions=True,
+        )
+        errors = [result for result in halves if isinstance(result, BaseException)]
+        if len(errors) == len(halves):
+            raise errors[0]
+        partial = bool(errors) or any(
+            isinstance(result, PartialExtractionResult) for result in halves
+        )
+        failed_labels: List[str] = []
+        for half_labels, result in zip((labels[:half], labels[half:]), halves):
+            if isinstance(result, BaseException):
+                failed_labels.extend(half_labels)
+            else:
+                failed_labels.extend(get_failed_labels(result))
+        merged: Dict[str, Dict[str, Any]] = (
+            PartialExtractionResult(failed_labels=failed_labels) if partial else {}
+        )
+        for result in halves:
+            if not isinstance(result, BaseException):
+                merged.update(result)
+        return merged
+    
+    raise last_error
+
+
+async def _request_extraction(
+    transcript: str,
+    labels: List[str],
+    metadata: Optional[Dict[str, Any]] = None,
+    on_field: Optional[FieldCallback] = None,
+    model: Optional[str] = None
+) -> Tuple[str, Optional[str]]:
+    """
+    抽出リクエストを1回送信（model 省略時は CLAUDE_MODEL）
+    
+    on_field が指定され EXTRACTION_STREAMING_ENABLED の場合はストリーミングAPIを使い、
+    ラベルのオブジェクトが閉じた時点で on_field(label, {value, confidence, evidence}) を呼ぶ。
+    
+    Returns:
+        (レスポンステキスト, stop_reason)
+    """
+    settings = get_settings()
     
     # プロンプト作成
-    prompt = create_extraction_prompt(transcript, labels, metadata)
+    # 指示文とラベル一覧は毎回同一のため system に置いてプロンプトキャッシュ対象とし、
+    # 可変部分（メタデータ・文字起こし）のみを user メッセージに置く
+    compact = settings.EXTRACTION_OUTPUT_FORMAT == OUTPUT_FORMAT_COMPACT
+    # 区間番号付きの文字起こしでは、根拠を引用ではなく区間番号で出力させる
+    segment_evidence = has_segment_numbers(transcript)
+    system_prompt = create_extraction_system_prompt(labels, compact, segment_evidence)
+    user_prompt = create_extraction_user_prompt(transcript, metadata)
     
-    logger.info(f"Sending extraction request to Claude ({settings.CLAUDE_MODEL})")
+    model = model or settings.CLAUDE_MODEL
+    logger.info(f"Sending extraction request to Claude ({model})")
     
-    # Claude API呼び出し
-    message = client.messages.create(
-        model=settings.CLAUDE_MODEL,
-        max_tokens=4096,
-        messages=[
+    request = {
+        "model": model,
+        "max_tokens": EXTRACTION_MAX_TOKENS,
+        "system": [
+            {
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }
+        ],
+        "messages": [
             {
                 "role": "user",
-                "content": prompt
+                "content": user_prompt
             }
-        ]
-    )
+        ],
+    }
+    
+    async with use_anthropic_client() as client:
+        if on_field is not None and settings.EXTRACTION_STREAMING_ENABLED:
+            call = lambda: _stream_extraction(client, request, labels, on_field, compact)
+        else:
+            call = lambda: client.messages.create(**request)
+        
+        # Claude API呼び出し
+        message = await call_with_quota(
+            DOWNSTREAM_ANTHROPIC,
+            call,
+            tokens=estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+        )
+    log_usage(message)
     
     # レスポンス解析
-    response_text = message.content[0].text
+    return message.content[0].text, getattr(message, "stop_reason", None)
+
+
+async def _stream_extraction(
+    client: anthropic.AsyncAnthropic,
+    request: Dict[str, Any],
+    labels: List[str],
+    on_field: FieldCallback,
+    compact: bool = False
+) -> Any:
+    """
+    ストリーミングAPIで抽出し、完結したラベル（行）から順に on_field を呼ぶ
+
+    リクエスト開始から最初の項目の確定までの秒数を /metrics 用に記録する。
+    """
+    parser = IncrementalArrayParser() if compact else IncrementalObjectParser()
+    wanted = set(labels)
+    emitted = 0
+    started = time.monotonic()
+    first_field_seconds: Optional[float] = None
     
-    # JSONを抽出
-    extracted = parse_extraction_response(response_text, labels)
+    async with client.messages.stream(**request) as stream:
+        async for text in stream.text_stream:
+            for member in parser.feed(text):
+                if compact:
+                    field = decode_compact_row(member, labels)
+                    if field is None:
+                        continue
+                    label, data = field
+                else:
+                    label, data = member
+                    if label not in wanted or not isinstance(data, dict):
+                        continue
+                    data = normalize_field(data)
+                if first_field_seconds is None:
+                    first_field_seconds = time.monotonic() - started
+                emitted += 1
+                await on_field(label, data)
+        message = await stream.get_final_message()
     
-    return extracted
+    total_seconds = time.monotonic() - started
+    record_streamed_extraction(first_field_seconds, total_seconds, emitted)
+    first_field_text = f"{first_field_seconds:.2f}s" if first_field_seconds is not None else "-"
+    logger.info(
+        f"Streamed extraction completed: {emitted} fields emitted progressively "
+        f"(first field {first_field_text}, total {total_seconds:.2f}s)"
+    )
+    return message
 
 
-def create_extraction_prompt(
-    transcript: str,
+def log_usage(message: Any) -> None:
+    """トークン使用量（プロンプトキャッシュの作成/読み込み分を含む）をログ出力"""
+    usage = getattr(message, "usage", None)
+    if usage is None:
+        return
+    
+    logger.info(
+        f"Claude usage - "
+        f"input_tokens={getattr(usage, 'input_tokens', None)}, "
+        f"output_tokens={getattr(usage, 'output_tokens', None)}, "
+        f"cache_creation_input_tokens={getattr(usage, 'cache_creation_input_tokens', None)}, "
+        f"cache_read_input_tokens={getattr(usage, 'cache_read_input_tokens', None)}"
+    )
+
+
+def create_extraction_system_prompt(
     labels: List[str],
-    metadata: Optional[Dict[str, Any]] = None
+    compact: bool = False,
+    segment_evidence: bool = False
 ) -> str:
-    """抽出用プロンプトを作成"""
+    """
+    抽出用システムプロンプト（静的部分）を作成
     
-    labels_json = json.dumps(labels, ensure_ascii=False, indent=2)
+    指示文とラベル一覧のみで構成し、同じラベル一覧であれば常に同一の
+    文字列になるようにする（プロンプトキャッシュのプレフィックス）。
     
-    metadata_info = ""
-    if metadata:
-        metadata_info = f"""
-## メタデータ（参考情報）
-```json
-{json.dumps(metadata, ensure_ascii=False, indent=2)}
-```
-"""
+    Args:
+        labels: 抽出する項目のラベル一覧
+        compact: 番号付きラベルと [番号, 値, 確信度, 根拠] の行で出力させる
+        segment_evidence: 根拠を文字起こしの区間番号の配列で出力させる
+    """
+    if compact:
+        return create_compact_extraction_system_prompt(labels, segment_evidence)
+    
+    labels_json = json.dumps(labels, ensure_ascii=False, indent=2)
+    evidence_rule, evidence_example = _evidence_instructions(segment_evidence)
+    empty_evidence = "[]" if segment_evidence else '""'
     
     prompt = f"""あなたは面談記録から情報を抽出するエキスパートです。
-以下の文字起こしテキストから、指定された項目の情報を抽出してください。
+ユーザーから渡される文字起こしテキストから、指定された項目の情報を抽出してください。
 
 ## 抽出する項目
 ```json
 {labels_json}
 ```
-{metadata_info}
-## 文字起こしテキスト
-```
-{transcript}
-```
 
 ## 出力形式
 以下のJSON形式で出力してください。各項目について：
 - value: 抽出した値（見つからない場合はnull）
 - confidence: 確信度（0.0〜1.0）
-- evidence: 値の根拠となるテキストの一部（短く）
+- evidence: {evidence_rule}
 
 ```json
 {{
   "項目名1": {{
     "value": "抽出した値",
     "confidence": 0.85,
-    "evidence": "テキストから引用..."
+    "evidence": {evidence_example}
   }},
   "項目名2": {{
     "value": null,
     "confidence": 0.0,
-    "evidence": ""
+    "evidence": {empty_evidence}
   }}
 }}
 ```
@@ -136,7 +670,52 @@ def create_extraction_prompt(
 2. テキストに明確な情報がない場合は value を null にしてください
 3. 推測や幻覚は避け、テキストに基づいた抽出のみ行ってください
 4. confidence は、値の確実性を0.0〜1.0で表現してください
-5. evidence は、値の根拠となる発話の一部を短く引用してください
+5. evidence は、{evidence_rule}としてください
+
+JSONのみを出力してください（説明文は不要）。
+"""
+    
+    return prompt
+
+
+def create_compact_extraction_system_prompt(
+    labels: List[str],
+    segment_evidence: bool = False
+) -> str:
+    """
+    コンパクト出力形式の抽出用システムプロンプトを作成
+    
+    ラベル名の代わりに番号で出力させ、値が見つからない項目は出力させない
+    （出力トークン数の削減）。
+    """
+    evidence_rule, evidence_example = _evidence_instructions(segment_evidence)
+    
+    prompt = f"""あなたは面談記録から情報を抽出するエキスパートです。
+ユーザーから渡される文字起こしテキストから、指定された項目の情報を抽出してください。
+
+## 抽出する項目
+{number_labels(labels)}
+
+## 出力形式
+値が見つかった項目のみ、1項目を1行 [項目番号, 値, 確信度, 根拠] とするJSON配列で出力してください：
+- 項目番号: 上記一覧の番号
+- 値: 抽出した値
+- 確信度: 0.0〜1.0
+- 根拠: {evidence_rule}
+
+```json
+[
+  [1, "抽出した値", 0.85, {evidence_example}],
+  [3, "抽出した値", 0.6, {evidence_example}]
+]
+```
+
+## 注意事項
+1. 必ずJSON配列の形式で出力してください
+2. テキストに明確な情報がない項目は出力しないでください
+3. 推測や幻覚は避け、テキストに基づいた抽出のみ行ってください
+4. 確信度は、値の確実性を0.0〜1.0で表現してください
+5. 根拠は、{evidence_rule}としてください
 
 JSONのみを出力してください（説明文は不要）。
 """
@@ -144,11 +723,66 @@ JSONのみを出力してください（説明文は不要）。
     return prompt
 
 
+def _evidence_instructions(segment_evidence: bool) -> Tuple[str, str]:
+    """根拠の出力ルールと出力例（区間番号 / 引用）"""
+    if segment_evidence:
+        return (
+            "値の根拠となる発話の区間番号（文字起こし各行の先頭の [番号]）の配列",
+            "[12, 13]",
+        )
+    return "値の根拠となる発話の一部の短い引用", '"テキストから引用..."'
+
+
+def create_extraction_user_prompt(
+    transcript: str,
+    metadata: Optional[Dict[str, Any]] = None
+) -> str:
+    """抽出用ユーザープロンプト（可変部分）を作成"""
+    
+    metadata_info = ""
+    if metadata:
+        metadata_info = f"""## メタデータ（参考情報）
+```json
+{json.dumps(metadata, ensure_ascii=False, indent=2)}
+```
+
+"""
+    
+    prompt = f"""{metadata_info}## 文字起こしテキスト
+```
+{transcript}
+```
+"""
+    
+    return prompt
+
+
 def parse_extraction_response(
     response_text: str,
     labels: List[str]
 ) -> Dict[str, Dict[str, Any]]:
-    """Claude APIのレスポンスを解析"""
+    """Claude APIのレスポンスを解析（解析失敗時は空の辞書）"""
+    try:
+        return parse_extraction_json(response_text, labels)
+    except ExtractionResponseError as e:
+        logger.error(f"Failed to parse JSON response: {e}")
+        logger.error(f"Response text: {response_text[:500]}")
+        return {}
+
+
+def parse_extraction_json(
+    response_text: str,
+    labels: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Claude APIのレスポンスを解析
+    
+    ラベル名をキーとするJSONオブジェクトと、コンパクト形式の行の配列
+    （[[番号, 値, 確信度, 根拠], ...]）のどちらにも対応する。
+    
+    Raises:
+        ExtractionResponseError: JSONとして解析できない場合
+    """
     
     # JSONブロックを抽出
     json_text = response_text.strip()
@@ -170,24 +804,32 @@ def parse_extraction_response(
     try:
         extracted = json.loads(json_text)
     except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse JSON response: {e}")
-        logger.error(f"Response text: {response_text[:500]}")
-        return {}
+        raise ExtractionResponseError(str(e)) from e
+    
+    if isinstance(extracted, list):
+        return decode_compact_rows(extracted, labels)
+    
+    if not isinstance(extracted, dict):
+        raise ExtractionResponseError("Response is not a JSON object or array")
     
     # ラベルに存在するもののみフィルタリング
     result = {}
     for label in labels:
-        if label in extracted:
-            data = extracted[label]
-            result[label] = {
-                "value": data.get("value"),
-                "confidence": data.get("confidence", 0.0),
-                "evidence": data.get("evidence", "")
-            }
+        if label in extracted and isinstance(extracted[label], dict):
+            result[label] = normalize_field(extracted[label])
     
     return result
 
 
+def normalize_field(data: Dict[str, Any]) -> Dict[str, Any]:
+    """1項目分の応答を {value, confidence, evidence} に揃える"""
+    return {
+        "value": data.get("value"),
+        "confidence": data.get("confidence", 0.0),
+        "evidence": data.get("evidence", "")
+    }
+
+
 async def extract_single_field(
     transcript: str,
     label: str,
@@ -196,6 +838,9 @@ async def extract_single_field(
     """
     単一の項目を抽出（軽量版）
     
+    同じ文字起こし・メタデータに対する要求が EXTRACTION_COALESCE_WINDOW_MS 以内に
+    続いた場合は、まとめて1回の抽出（抽出キャッシュ経由）で処理する。
+    
     Args:
         transcript: 文字起こしテキスト
         label: 抽出する項目のラベル
@@ -204,6 +849,10 @@ async def extract_single_field(
     Returns:
         {value, confidence, evidence} 形式の辞書
     """
+    coalescer = get_single_field_coalescer()
+    if coalescer is not None:
+        return await coalescer.extract(transcript, label, metadata)
+    
     results = await extract_fields_from_transcript(
         transcript=transcript,
         labels=[label],
@@ -211,3 +860,20 @@ async def extract_single_field(
     )
     
     return results.get(label, {"value": None, "confidence": 0.0, "evidence": ""})
+
+
+def get_single_field_coalescer() -> Optional[SingleFieldCoalescer]:
+    """単一項目抽出のコアレッサーを取得（EXTRACTION_COALESCE_WINDOW_MS が0の場合はNone）"""
+    global _single_field_coalescer
+    settings = get_settings()
+    if settings.EXTRACTION_COALESCE_WINDOW_MS <= 0:
+        return None
+    if _single_field_coalescer is None:
+        _single_field_coalescer = SingleFieldCoalescer(
+            extract=lambda transcript, labels, metadata: extract_fields_from_transcript(
+                transcript=transcript, labels=labels, metadata=metadata
+            ),
+            window_seconds=settings.EXTRACTION_COALESCE_WINDOW_MS / 1000,
+            max_labels=settings.EXTRACTION_COALESCE_MAX_LABELS,
+        )
+    return _single_field_coalescer
@@ -0,0 +1,153 @@
+"""
+抽出結果キャッシュ
+文字起こし・ラベル一覧・モデル・メタデータが同一の抽出を再利用し、LLM呼び出しを省略
+"""
+import hashlib
+import json
+import logging
+import time
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Iterable, Set
+
+from .settings import get_settings
+from .ttl_cache import TTLCache, SingleFlight, MISSING
+from .cache_store import create_cache_store
+
+logger = logging.getLogger(__name__)
+
+# 保存形式を変更した場合は上げる（旧エントリを自動的に無効化）
+EXTRACTION_CACHE_VERSION = 1
+
+ExtractionResult = Dict[str, Dict[str, Any]]
+
+
+class PartialExtractionResult(dict):
+    """
+    一部のラベルの抽出に失敗した結果（キャッシュしない）
+
+    failed_labels は解析に成功した応答から得られなかったラベル。
+    他のウィンドウ等の結果として値を含む場合も、確定した値としては扱わない。
+    """
+
+    def __init__(self, results: Optional[ExtractionResult] = None, failed_labels: Iterable[str] = ()):
+        super().__init__(results or {})
+        self.failed_labels: Set[str] = set(failed_labels)
+
+
+def get_failed_labels(result: ExtractionResult) -> Set[str]:
+    """抽出に失敗したラベル（部分的な結果でなければ空）"""
+    if isinstance(result, PartialExtractionResult):
+        return set(result.failed_labels)
+    return set()
+
+
+def hash_text(text: str) -> str:
+    """テキストのSHA-256ハッシュ"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_extraction_cache_key(
+    transcript: str,
+    labels: List[str],
+    metadata: Optional[Dict[str, Any]],
+    options: Dict[str, Any]
+) -> str:
+    """
+    プロンプト入力から安定したキャッシュキーを生成
+
+    Args:
+        transcript: 文字起こしテキスト
+        labels: 抽出する項目のラベル一覧
+        metadata: メタデータ
+        options: 出力に影響する設定（モデル名・プロンプト版数等）
+    """
+    key_source = {
+        "version": EXTRACTION_CACHE_VERSION,
+        "transcript": hash_text(transcript),
+        "labels": labels,
+        "metadata": metadata or {},
+        "options": options,
+    }
+    canonical = json.dumps(key_source, ensure_ascii=False, sort_keys=True, default=str)
+    return hash_text(canonical)
+
+
+class ExtractionCache:
+    """
+    抽出結果のキャッシュ
+
+    インメモリLRU（EXTRACTION_CACHE_MAX_SIZE / EXTRACTION_CACHE_TTL_SECONDS）を一次キャッシュ、
+    EXTRACTION_CACHE_BACKEND（none / local / gcs）を二次キャッシュとして使用する。
+    同一キーの同時呼び出しは1回のLLM呼び出しにまとめる。
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        self._memory = TTLCache(
+            maxsize=settings.EXTRACTION_CACHE_MAX_SIZE,
+            ttl=settings.EXTRACTION_CACHE_TTL_SECONDS
+        )
+        self._store = create_cache_store("extractions", settings.EXTRACTION_CACHE_BACKEND)
+        self._flight = SingleFlight()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[ExtractionResult]]
+    ) -> ExtractionResult:
+        """
+        キャッシュから取得し、無ければ compute() で抽出して保存
+
+        空の結果（解析失敗等）と一部失敗の結果はキャッシュしない。
+        """
+        cached = self._memory.get(key)
+        if cached is not MISSING:
+            self.memory_hits += 1
+            logger.info(f"Extraction cache hit (memory): {key[:12]}")
+            return cached
+
+        async def load_or_compute() -> ExtractionResult:
+            if self._store is not None:
+                stored = await self._store.get_async(key)
+                if stored is not None:
+                    self.persistent_hits += 1
+                    logger.info(f"Extraction cache hit (persistent): {key[:12]}")
+                    self._memory.set(key, stored["result"])
+                    return stored["result"]
+
+            self.misses += 1
+            result = await compute()
+            if result and not isinstance(result, PartialExtractionResult):
+                self._memory.set(key, result)
+                if self._store is not None:
+                    await self._store.put_async(key, {"result": result, "cached_at": time.time()})
+            return result
+
+        return await self._flight.do(key, load_or_compute)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        hits = self.memory_hits + self.persistent_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_size": self._memory.stats()["size"],
+            "coalesced": self._flight.coalesced,
+            "persistent_backend": self._store is not None,
+        }
+
+
+# シングルトンインスタンス
+_extraction_cache: Optional[ExtractionCache] = None
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """ExtractionCacheのシングルトンインスタンスを取得"""
+    global _extraction_cache
+    if _extraction_cache is None:
+        _extraction_cache = ExtractionCache()
+    return _extraction_cache
@@ -0,0 +1,141 @@
+"""
+単一項目抽出のマイクロバッチ
+同じ文字起こし・メタデータに対する単一項目の抽出要求を短い時間窓でまとめ、1回の抽出で処理する
+"""
+import asyncio
+import json
+import logging
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Set
+
+from .extraction_cache import hash_text
+from .ttl_cache import LeaderCancelledError
+
+logger = logging.getLogger(__name__)
+
+# (transcript, labels, metadata) -> {label: {value, confidence, evidence}}
+BatchExtractFunc = Callable[
+    [str, List[str], Optional[Dict[str, Any]]], Awaitable[Dict[str, Dict[str, Any]]]
+]
+
+EMPTY_FIELD = {"value": None, "confidence": 0.0, "evidence": ""}
+
+
+class _Batch:
+    """収集中の1バッチ（同じ文字起こし・メタデータ）"""
+
+    def __init__(self, transcript: str, metadata: Optional[Dict[str, Any]]):
+        self.transcript = transcript
+        self.metadata = metadata
+        self.futures: Dict[str, asyncio.Future] = {}
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class SingleFieldCoalescer:
+    """
+    単一項目の抽出要求をまとめるコアレッサー（dataloader 方式）
+
+    最初の要求から window_seconds 待つ間（または max_labels 件に達するまで）に届いた
+    同じ文字起こし・メタデータの要求を1回の extract 呼び出しにまとめ、
+    各呼び出し元にそのラベルの結果を返す。同じラベルの要求は1件として扱う。
+    まとめた抽出がキャンセルされた場合、待機中の要求は新しいバッチで再実行する。
+    """
+
+    def __init__(self, extract: BatchExtractFunc, window_seconds: float, max_labels: int):
+        self._extract = extract
+        self._window = window_seconds
+        self._max_labels = max(1, max_labels)
+        self._batches: Dict[str, _Batch] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.batches = 0
+
+    async def extract(
+        self,
+        transcript: str,
+        label: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """1項目を抽出（他の要求とまとめて実行）"""
+        self.requests += 1
+        key = self._batch_key(transcript, metadata)
+        while True:
+            future = self._enqueue(key, transcript, label, metadata)
+            try:
+                # 1件の呼び出し元のキャンセルが同じラベルの他の待機者に波及しないようにする
+                return await asyncio.shield(future)
+            except LeaderCancelledError:
+                continue
+
+    def _enqueue(
+        self,
+        key: str,
+        transcript: str,
+        label: str,
+        metadata: Optional[Dict[str, Any]]
+    ) -> asyncio.Future:
+        """収集中のバッチにラベルを追加し、そのラベルの結果を待つ Future を返す"""
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = _Batch(transcript, metadata)
+            self._batches[key] = batch
+            batch.timer = asyncio.get_running_loop().call_later(
+                self._window, self._dispatch, key, batch
+            )
+
+        future = batch.futures.get(label)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            batch.futures[label] = future
+            if len(batch.futures) >= self._max_labels:
+                self._dispatch(key, batch)
+        return future
+
+    def _batch_key(self, transcript: str, metadata: Optional[Dict[str, Any]]) -> str:
+        canonical = json.dumps(metadata or {}, ensure_ascii=False, sort_keys=True, default=str)
+        return hash_text(f"{hash_text(transcript)}:{canonical}")
+
+    def _dispatch(self, key: str, batch: _Batch) -> None:
+        """バッチの収集を締め切って抽出を開始"""
+        if self._batches.get(key) is not batch:
+            return
+        del self._batches[key]
+        if batch.timer is not None:
+            batch.timer.cancel()
+        self.batches += 1
+
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: _Batch) -> None:
+        # 到着順によらず同じラベル集合は同じ抽出（キャッシュキー）になるよう並べる
+        labels = sorted(batch.futures)
+        if len(labels) > 1:
+            logger.info(f"Coalesced {len(labels)} single-field requests into one extraction")
+        try:
+            results = await self._extract(batch.transcript, labels, batch.metadata)
+        except asyncio.CancelledError:
+            # 待機者にはキャンセルを伝播させず、新しいバッチで再実行させる
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(LeaderCancelledError())
+                    future.exception()
+            raise
+        except Exception as e:
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # 待機者がいない場合の "exception was never retrieved" を抑止
+                    future.exception()
+            return
+
+        for label, future in batch.futures.items():
+            if not future.done():
+                future.set_result(results.get(label, dict(EMPTY_FIELD)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "collecting": len(self._batches),
+        }
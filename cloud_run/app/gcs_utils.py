@@ -0,0 +1,182 @@
+"""
+GCSユーティリティ
+GCS URIの分解、共有ストレージクライアント、オブジェクトメタデータ取得
+"""
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, Tuple, AsyncIterator
+
+from google.cloud import storage
+
+from .settings import get_settings
+from .executor import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# シングルトンインスタンス
+_storage_client: Optional[storage.Client] = None
+_storage_client_lock = threading.Lock()
+
+
+def parse_gcs_uri(gcs_uri: str) -> Tuple[str, str]:
+    """
+    GCS URIをバケット名とオブジェクト名に分解
+
+    Args:
+        gcs_uri: GCS URI (gs://bucket/path/to/file.wav)
+
+    Returns:
+        (bucket_name, blob_name)
+    """
+    if not gcs_uri.startswith("gs://"):
+        raise ValueError(f"Invalid GCS URI: {gcs_uri}")
+
+    parts = gcs_uri[5:].split("/", 1)
+    if len(parts) != 2 or not parts[0] or not parts[1]:
+        raise ValueError(f"Invalid GCS URI format: {gcs_uri}")
+
+    return parts[0], parts[1]
+
+
+def get_storage_client() -> storage.Client:
+    """GCSクライアントを取得（遅延初期化・スレッドセーフ）"""
+    global _storage_client
+    with _storage_client_lock:
+        if _storage_client is None:
+            _storage_client = storage.Client()
+        return _storage_client
+
+
+def get_blob(gcs_uri: str) -> storage.Blob:
+    """GCS URIからBlobを取得（メタデータは未取得）"""
+    bucket_name, blob_name = parse_gcs_uri(gcs_uri)
+    return get_storage_client().bucket(bucket_name).blob(blob_name)
+
+
+def get_existing_blob(gcs_uri: str) -> storage.Blob:
+    """
+    メタデータ（サイズ・世代等）を読み込んだBlobを取得
+
+    Raises:
+        FileNotFoundError: オブジェクトが存在しない場合
+    """
+    bucket_name, blob_name = parse_gcs_uri(gcs_uri)
+    blob = get_storage_client().bucket(bucket_name).get_blob(blob_name)
+    if blob is None:
+        raise FileNotFoundError(f"GCS object not found: {gcs_uri}")
+    return blob
+
+
+def get_object_metadata(gcs_uri: str) -> Dict[str, Any]:
+    """
+    オブジェクトのメタデータのみを取得（本体はダウンロードしない）
+
+    Returns:
+        {bucket, name, generation, md5_hash, size, content_type}
+
+    Raises:
+        FileNotFoundError: オブジェクトが存在しない場合
+    """
+    blob = get_existing_blob(gcs_uri)
+
+    return {
+        "bucket": blob.bucket.name,
+        "name": blob.name,
+        "generation": blob.generation,
+        "md5_hash": blob.md5_hash,
+        "size": blob.size,
+        "content_type": blob.content_type,
+    }
+
+
+async def iter_object_range(
+    gcs_uri: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    concurrency: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """
+    オブジェクトの [start, end) を chunk_size ずつ範囲読み込みして順に返す
+
+    最大 concurrency 個の範囲読み込みを先読みで並列に発行する。
+    保持するのは先読み分（chunk_size × concurrency）のみで、
+    オブジェクトの大きさによらずメモリ使用量は一定。
+    読み込み中にオブジェクトが上書きされた場合は世代の不一致でエラーになる。
+
+    Args:
+        gcs_uri: GCS URI
+        start: 開始バイト位置
+        end: 終了バイト位置（この位置は含まない。省略時はオブジェクト末尾）
+        chunk_size: 1回の読み込みバイト数（省略時は GCS_READ_CHUNK_BYTES）
+        concurrency: 先読みの並列数（省略時は GCS_READ_CONCURRENCY）
+    """
+    settings = get_settings()
+    chunk_size = chunk_size or settings.GCS_READ_CHUNK_BYTES
+    concurrency = max(1, concurrency or settings.GCS_READ_CONCURRENCY)
+
+    blob = await run_blocking(get_existing_blob, gcs_uri)
+    end = blob.size if end is None else min(end, blob.size)
+
+    def read(pos: int) -> bytes:
+        return blob.download_as_bytes(
+            start=pos,
+            end=min(pos + chunk_size, end) - 1,
+            if_generation_match=blob.generation
+        )
+
+    positions = iter(range(start, end, chunk_size))
+    pending: "deque[asyncio.Future]" = deque()
+
+    def schedule() -> None:
+        for pos in positions:
+            pending.append(asyncio.ensure_future(run_blocking(read, pos)))
+            if len(pending) >= concurrency:
+                break
+
+    try:
+        schedule()
+        while pending:
+            data = await pending.popleft()
+            schedule()
+            yield data
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def spool_object_to_file(
+    gcs_uri: str,
+    directory: Optional[str] = None,
+    suffix: str = ""
+) -> str:
+    """
+    オブジェクトを範囲読み込みで一時ファイルに書き出す
+
+    ランダムアクセスが必要な処理（mmap 等）向け。呼び出し側で削除すること。
+
+    Args:
+        gcs_uri: GCS URI
+        directory: 書き出し先ディレクトリ（省略時は AUDIO_SPOOL_DIR / システム既定）
+        suffix: ファイル名の拡張子
+
+    Returns:
+        一時ファイルのパス
+    """
+    directory = directory or get_settings().AUDIO_SPOOL_DIR or None
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    fd, path = tempfile.mkstemp(dir=directory, suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for data in iter_object_range(gcs_uri):
+                await run_blocking(f.write, data)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
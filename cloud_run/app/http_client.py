@@ -0,0 +1,102 @@
+"""
+共有HTTPクライアント
+Webhook/Slack送信で使用するアプリスコープの httpx.AsyncClient（コネクションプール）
+"""
+import logging
+from typing import Optional
+
+import httpx
+
+from .settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 送信先ごとのタイムアウトプロファイル名
+TIMEOUT_PROFILE_WEBHOOK = "webhook"
+TIMEOUT_PROFILE_SLACK = "slack"
+
+# シングルトンインスタンス
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    """HTTP/2用の h2 パッケージが利用可能か"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _build_client() -> httpx.AsyncClient:
+    settings = get_settings()
+
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+    http2 = settings.HTTP2_ENABLED
+    if http2 and not _http2_available():
+        logger.warning("HTTP2_ENABLED is set but 'h2' is not installed - falling back to HTTP/1.1")
+        http2 = False
+
+    logger.info(
+        f"HTTP client initialized: max_connections={settings.HTTP_MAX_CONNECTIONS}, "
+        f"max_keepalive={settings.HTTP_MAX_KEEPALIVE_CONNECTIONS}, http2={http2}"
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        http2=http2,
+        timeout=get_timeout(TIMEOUT_PROFILE_WEBHOOK),
+    )
+
+
+def get_timeout(profile: str) -> httpx.Timeout:
+    """
+    送信先ごとのタイムアウト設定を取得
+
+    Args:
+        profile: TIMEOUT_PROFILE_WEBHOOK / TIMEOUT_PROFILE_SLACK
+
+    Returns:
+        httpx.Timeout
+    """
+    settings = get_settings()
+
+    if profile == TIMEOUT_PROFILE_SLACK:
+        return httpx.Timeout(
+            settings.SLACK_TIMEOUT_SECONDS,
+            connect=settings.SLACK_CONNECT_TIMEOUT_SECONDS,
+        )
+
+    return httpx.Timeout(
+        settings.WEBHOOK_TIMEOUT_SECONDS,
+        connect=settings.WEBHOOK_CONNECT_TIMEOUT_SECONDS,
+    )
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """共有HTTPクライアントを生成（アプリ起動時）"""
+    global _http_client
+    if _http_client is None:
+        _http_client = _build_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """共有HTTPクライアントをクローズ（アプリ終了時）"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        logger.info("HTTP client closed")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """共有HTTPクライアントを取得（未生成の場合は生成）"""
+    global _http_client
+    if _http_client is None:
+        _http_client = _build_client()
+    return _http_client
@@ -0,0 +1,78 @@
+"""
+idempotency_key 応答キャッシュ
+同じキーの再送には保存済みの応答を返し、同時に届いた重複は1回の処理にまとめる
+"""
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .settings import get_settings
+from .ttl_cache import TTLCache, SingleFlight, MISSING, cache_stats
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyCache:
+    """idempotency_key → 応答 のTTL付きLRUキャッシュ"""
+
+    def __init__(self):
+        settings = get_settings()
+        self._cache = TTLCache(
+            maxsize=settings.IDEMPOTENCY_CACHE_MAX_SIZE,
+            ttl=settings.IDEMPOTENCY_CACHE_TTL_SECONDS
+        )
+        self._flight = SingleFlight()
+
+    async def run(
+        self,
+        key: Optional[str],
+        func: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        key に対する処理を1回だけ実行
+
+        Args:
+            key: idempotency_key（Noneの場合はキャッシュせず毎回実行）
+            func: 応答を返すコルーチン関数
+
+        Returns:
+            (応答, 重複呼び出しだったか)
+        """
+        if not key:
+            return await func(), False
+
+        cached = self._cache.get(key)
+        if cached is not MISSING:
+            logger.info(f"[AUDIT] Duplicate request served from cache - idempotency_key={key}")
+            return cached, True
+
+        duplicate = self._flight.is_inflight(key)
+
+        async def execute():
+            result = await func()
+            # 例外時はキャッシュしない（再送で再実行される）
+            self._cache.set(key, result)
+            return result
+
+        result = await self._flight.do(key, execute)
+        if duplicate:
+            logger.info(f"[AUDIT] Concurrent duplicate request coalesced - idempotency_key={key}")
+        return result, duplicate
+
+    def invalidate(self, key: str) -> None:
+        """保存済みの応答を破棄（状態が変わったキーの再送で最新の状態を返すため）"""
+        self._cache.pop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return cache_stats(self._cache, self._flight)
+
+
+# シングルトンインスタンス
+_idempotency_cache: Optional[IdempotencyCache] = None
+
+
+def get_idempotency_cache() -> IdempotencyCache:
+    """IdempotencyCacheのシングルトンインスタンスを取得"""
+    global _idempotency_cache
+    if _idempotency_cache is None:
+        _idempotency_cache = IdempotencyCache()
+    return _idempotency_cache
@@ -0,0 +1,243 @@
+"""
+非同期ジョブ管理
+/process_audio の非同期モード用ジョブキューとバックグラウンドワーカー
+"""
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+from .settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+# ジョブの状態
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_SUCCEEDED = "succeeded"
+JOB_STATUS_FAILED = "failed"
+
+# パイプラインのステージ（labels → STT → extraction → sheet write）
+STAGE_LABELS = "labels"
+STAGE_STT = "stt"
+STAGE_EXTRACTION = "extraction"
+STAGE_SHEET_WRITE = "sheet_write"
+
+
+class JobQueueFullError(Exception):
+    """ジョブキューが満杯の場合の例外"""
+
+
+class Job:
+    """非同期ジョブ"""
+
+    def __init__(self, kind: str, params: Dict[str, Any]):
+        self.job_id: str = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status: str = JOB_STATUS_QUEUED
+        self.stage: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at: datetime = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.stage_timings: Dict[str, float] = {}
+        self._stage_started: Optional[float] = None
+        self._finished_monotonic: Optional[float] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JOB_STATUS_SUCCEEDED, JOB_STATUS_FAILED)
+
+    def enter_stage(self, stage: str) -> None:
+        """次のステージへ遷移し、直前のステージの所要時間を記録"""
+        self._close_stage()
+        self.stage = stage
+        self._stage_started = time.monotonic()
+        logger.info(f"Job {self.job_id} entered stage: {stage}")
+
+    def _close_stage(self) -> None:
+        if self.stage and self._stage_started is not None:
+            elapsed = time.monotonic() - self._stage_started
+            self.stage_timings[self.stage] = round(elapsed, 3)
+        self._stage_started = None
+
+    def mark_running(self) -> None:
+        self.status = JOB_STATUS_RUNNING
+        self.started_at = datetime.now()
+
+    def mark_succeeded(self, result: Dict[str, Any]) -> None:
+        self._close_stage()
+        self.status = JOB_STATUS_SUCCEEDED
+        self.result = result
+        self._mark_finished()
+
+    def mark_failed(self, error: str) -> None:
+        self._close_stage()
+        self.status = JOB_STATUS_FAILED
+        self.error = error
+        self._mark_finished()
+
+    def _mark_finished(self) -> None:
+        self.finished_at = datetime.now()
+        self._finished_monotonic = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """ステータス応答用の辞書に変換"""
+        total_seconds = None
+        if self.started_at and self.finished_at:
+            total_seconds = round((self.finished_at - self.started_at).total_seconds(), 3)
+
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "stage_timings": dict(self.stage_timings),
+            "total_seconds": total_seconds,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+JobHandler = Callable[[Job], Awaitable[Dict[str, Any]]]
+
+
+class JobManager:
+    """
+    有界キュー＋固定数ワーカーによるジョブ実行管理
+
+    ワーカー数で同時実行数を、キューサイズで受付可能なジョブ数を制限する。
+    完了済みジョブは JOB_RESULT_TTL_SECONDS 経過後に破棄される。
+    """
+
+    def __init__(self):
+        self._settings = get_settings()
+        self._jobs: Dict[str, Job] = {}
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def register_handler(self, kind: str, handler: JobHandler) -> None:
+        """ジョブ種別ごとの処理関数を登録"""
+        self._handlers[kind] = handler
+
+    async def start(self) -> None:
+        """ワーカーを起動"""
+        if self._workers:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self._settings.JOB_QUEUE_MAX_SIZE)
+        worker_count = max(1, self._settings.JOB_WORKER_COUNT)
+        for i in range(worker_count):
+            self._workers.append(asyncio.create_task(self._worker(i)))
+
+        logger.info(
+            f"Job manager started: workers={worker_count}, "
+            f"queue_max_size={self._settings.JOB_QUEUE_MAX_SIZE}"
+        )
+
+    async def stop(self) -> None:
+        """ワーカーを停止（実行中のジョブはキャンセルし、未実行のジョブは失敗扱い）"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        # キューに残ったジョブは実行されないため、ポーリング中のクライアントに失敗を返す
+        abandoned = 0
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            job.mark_failed("Instance shutting down")
+            abandoned += 1
+        self._queue = None
+        logger.info(f"Job manager stopped ({abandoned} queued jobs marked failed)")
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Job:
+        """
+        ジョブを投入
+
+        Args:
+            kind: ジョブ種別（register_handlerで登録済みのもの）
+            params: ジョブのパラメータ
+
+        Returns:
+            投入されたジョブ
+
+        Raises:
+            JobQueueFullError: キューが満杯の場合
+        """
+        if self._queue is None:
+            raise RuntimeError("Job manager is not started")
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        self._purge_expired()
+
+        job = Job(kind, params)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError("Job queue is full")
+
+        self._jobs[job.job_id] = job
+        logger.info(f"Job queued: {job.job_id} ({kind}), queue_size={self._queue.qsize()}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """ジョブを取得"""
+        self._purge_expired()
+        return self._jobs.get(job_id)
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run_job(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job: Job) -> None:
+        handler = self._handlers[job.kind]
+        job.mark_running()
+        logger.info(f"Job started: {job.job_id}")
+
+        try:
+            result = await handler(job)
+            job.mark_succeeded(result)
+            logger.info(f"Job succeeded: {job.job_id} ({job.stage_timings})")
+        except asyncio.CancelledError:
+            job.mark_failed("Job cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Job failed: {job.job_id}: {e}")
+            job.mark_failed(str(e))
+
+    def _purge_expired(self) -> None:
+        ttl = self._settings.JOB_RESULT_TTL_SECONDS
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job._finished_monotonic is not None and now - job._finished_monotonic > ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+# シングルトンインスタンス
+_job_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """JobManagerのシングルトンインスタンスを取得"""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = JobManager()
+    return _job_manager
@@ -6,14 +6,27 @@ import logging
 from datetime import datetime
 from typing import Optional
 
-from fastapi import FastAPI, HTTPException, Header, Depends
+from fastapi import FastAPI, HTTPException, Header, Depends, Response
 from pydantic import BaseModel, Field
 
 from .settings import get_settings, Settings
 from .audio_pipeline import process_audio_pipeline
-from .webhook_sender import send_webhook, send_slack_notification
+from .webhook_sender import send_slack_notification
+from .webhook_outbox import get_webhook_outbox, OUTBOX_STATUS_DEAD_LETTER
+from .idempotency import get_idempotency_cache
+from .transcript_cache import get_transcript_cache
+from .extraction_cache import get_extraction_cache
 from .porters_client import import_porters_data
 from .sheets_client import get_sheets_client
+from .jobs import get_job_manager, Job, JobQueueFullError
+from .executor import shutdown_executor
+from .secret_provider import get_secret_provider
+from .http_client import start_http_client, close_http_client
+from .extract_schema import close_anthropic_client, get_single_field_coalescer
+from .rate_limit import get_rate_limit_stats
+from .retrieval import get_retrieval_stats
+from .model_tiering import get_tiering_stats
+from .streaming_json import get_streaming_stats
 
 # ロギング設定
 logging.basicConfig(
@@ -41,6 +54,7 @@ class ProcessAudioRequest(BaseModel):
     language_code: str = Field(default="ja-JP", description="言語コード")
     record_id: Optional[str] = Field(default=None, description="レコードID")
     metadata: Optional[dict] = Field(default=None, description="メタデータ（CA名、SlackメンションID等）")
+    async_mode: bool = Field(default=False, description="Trueの場合はジョブIDを即時返却し、バックグラウンドで処理")
 
 
 class ImportPortersRequest(BaseModel):
@@ -55,6 +69,7 @@ class SendWebhookRequest(BaseModel):
     record_id: Optional[str] = Field(default=None, description="レコードID")
     merged_at: str = Field(..., description="マージ日時")
     fields: list = Field(..., description="フィールドデータ")
+    idempotency_key: Optional[str] = Field(default=None, description="送信ID（重複送信防止キー）")
 
 
 class HealthResponse(BaseModel):
@@ -103,9 +118,29 @@ async def health_check():
     )
 
 
+@app.get("/metrics")
+async def metrics(
+    _: bool = Depends(verify_api_key)
+):
+    """運用メトリクス（下流サービスごとのスロットリング・リトライ件数等）"""
+    coalescer = get_single_field_coalescer()
+    return {
+        "rate_limits": get_rate_limit_stats(),
+        "webhook_outbox": await get_webhook_outbox().get_stats(),
+        "idempotency_cache": get_idempotency_cache().stats(),
+        "transcript_cache": get_transcript_cache().stats(),
+        "extraction_cache": get_extraction_cache().stats(),
+        "retrieval": get_retrieval_stats(),
+        "model_tiering": get_tiering_stats(),
+        "extraction_streaming": get_streaming_stats(),
+        "single_field_coalescer": coalescer.stats() if coalescer else None
+    }
+
+
 @app.post("/process_audio", response_model=ProcessResponse)
 async def process_audio(
     request: ProcessAudioRequest,
+    response: Response,
     _: bool = Depends(verify_api_key),
     settings: Settings = Depends(get_settings)
 ):
@@ -116,9 +151,31 @@ async def process_audio(
     2. Speech-to-Textで文字起こし
     3. Claude APIで項目抽出
     4. スプレッドシートのE列に書き込み
+    
+    async_mode=True の場合はジョブを投入して 202 とジョブIDを即時返却する。
+    進捗と結果は GET /jobs/{job_id} で確認する。
     """
     logger.info(f"Processing audio: {request.gcs_uri}")
     
+    if request.async_mode:
+        try:
+            job = get_job_manager().submit(
+                "process_audio",
+                request.model_dump(exclude={"async_mode"})
+            )
+        except JobQueueFullError:
+            raise HTTPException(status_code=503, detail="Job queue is full, retry later")
+        
+        response.status_code = 202
+        return ProcessResponse(
+            status="accepted",
+            message="音声処理ジョブを受け付けました",
+            data={
+                "job_id": job.job_id,
+                "status_url": f"/jobs/{job.job_id}"
+            }
+        )
+    
     try:
         result = await process_audio_pipeline(
             sheet_id=request.sheet_id,
@@ -140,6 +197,27 @@ async def process_audio(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/jobs/{job_id}", response_model=ProcessResponse)
+async def get_job_status(
+    job_id: str,
+    _: bool = Depends(verify_api_key)
+):
+    """
+    ジョブ状態確認エンドポイント
+    
+    ステージ（labels → stt → extraction → sheet_write）、所要時間、最終結果を返す
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    return ProcessResponse(
+        status=job.status,
+        message=f"ジョブ状態: {job.status}",
+        data=job.to_dict()
+    )
+
+
 @app.post("/import_porters", response_model=ProcessResponse)
 async def import_porters(
     request: ImportPortersRequest,
@@ -173,37 +251,45 @@ async def import_porters(
 @app.post("/send_webhook", response_model=ProcessResponse)
 async def send_webhook_endpoint(
     request: SendWebhookRequest,
+    response: Response,
     _: bool = Depends(verify_api_key)
 ):
     """
     Webhook送信エンドポイント
     
-    Secret ManagerからURL/Token取得し、Webhookへ送信
+    ペイロードをアウトボックスに登録した時点で 202 を返す。
+    送信・再送はバックグラウンドワーカーが行い、失敗し続けたものはデッドレターへ移動する。
+    同じ idempotency_key の再送は保存済みの応答をそのまま返し、
+    同時に届いた重複リクエストは1回の登録処理を共有する。
     """
     logger.info(f"Sending webhook for record: {request.record_id}")
     
-    try:
-        result = await send_webhook(
+    async def enqueue() -> ProcessResponse:
+        result = await get_webhook_outbox().enqueue(
             payload=request.model_dump()
         )
-        
-        # 送信失敗時にSlack通知（任意）
-        if not result.get("success", False):
-            try:
-                await send_slack_notification(
-                    message=f"⚠️ Webhook送信エラー\n"
-                            f"Record ID: {request.record_id}\n"
-                            f"Status: {result.get('status_code', 'unknown')}\n"
-                            f"Error: {result.get('error', result.get('response_preview', 'unknown'))[:200]}"
-                )
-            except Exception as slack_error:
-                logger.warning(f"Slack notification failed: {slack_error}")
-        
+        if result["status"] == OUTBOX_STATUS_DEAD_LETTER:
+            return ProcessResponse(
+                status="dead_letter",
+                message="このidempotency_keyはデッドレターに移動済みです。再送はreplay_pathを使用してください",
+                data=result
+            )
         return ProcessResponse(
             status="success",
-            message="Webhook送信が完了しました",
+            message="Webhook送信をキューに登録しました",
             data=result
         )
+    
+    try:
+        result, duplicate = await get_idempotency_cache().run(
+            request.idempotency_key, enqueue
+        )
+        
+        # デッドレター済みのキーは再登録していないため 409
+        response.status_code = 409 if result.status == "dead_letter" else 202
+        if duplicate:
+            response.headers["Idempotent-Replayed"] = "true"
+        return result
         
     except Exception as e:
         logger.error(f"Webhook send error: {str(e)}")
@@ -221,6 +307,49 @@ async def send_webhook_endpoint(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/webhook/dead_letters", response_model=ProcessResponse)
+async def list_dead_letters(
+    limit: int = 50,
+    _: bool = Depends(verify_api_key)
+):
+    """デッドレター一覧（ペイロードはマスキング済み）"""
+    dead_letters = await get_webhook_outbox().list_dead_letters(limit=limit)
+    return ProcessResponse(
+        status="success",
+        message=f"{len(dead_letters)}件のデッドレター",
+        data={"dead_letters": dead_letters}
+    )
+
+
+@app.post("/webhook/dead_letters/{dead_letter_id}/replay", response_model=ProcessResponse)
+async def replay_dead_letter(
+    dead_letter_id: int,
+    _: bool = Depends(verify_api_key)
+):
+    """デッドレターを再送キューに戻す"""
+    result = await get_webhook_outbox().replay_dead_letter(dead_letter_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Dead letter not found: {dead_letter_id}")
+    
+    return ProcessResponse(
+        status="success",
+        message="デッドレターを再送キューに戻しました",
+        data=result
+    )
+
+
+# ============================================
+# 非同期ジョブ
+# ============================================
+
+async def run_process_audio_job(job: Job) -> dict:
+    """非同期ジョブとして音声処理パイプラインを実行"""
+    return await process_audio_pipeline(
+        **job.params,
+        on_stage=job.enter_stage
+    )
+
+
 # ============================================
 # アプリ起動時の処理
 # ============================================
@@ -232,9 +361,31 @@ async def startup_event():
     settings = get_settings()
     logger.info(f"GCP Project: {settings.GCP_PROJECT}")
     logger.info(f"Claude Model: {settings.CLAUDE_MODEL}")
+    if settings.CLAUDE_FAST_MODEL:
+        logger.info(f"Claude Fast Model: {settings.CLAUDE_FAST_MODEL}")
+    
+    # シークレットを事前取得（リクエスト処理中のSecret Manager呼び出しを回避）
+    await get_secret_provider().preload([
+        settings.ANTHROPIC_API_KEY_SECRET_NAME,
+        settings.WEBHOOK_URL_SECRET_NAME,
+        settings.WEBHOOK_TOKEN_SECRET_NAME,
+        settings.SLACK_WEBHOOK_URL_SECRET_NAME,
+    ])
+    
+    await start_http_client()
+    await get_webhook_outbox().start()
+    
+    job_manager = get_job_manager()
+    job_manager.register_handler("process_audio", run_process_audio_job)
+    await job_manager.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """アプリ終了時のクリーンアップ"""
     logger.info("TechnoBrain-MENDAN API shutting down...")
+    await get_job_manager().stop()
+    await get_webhook_outbox().stop()
+    await close_http_client()
+    await close_anthropic_client()
+    shutdown_executor()
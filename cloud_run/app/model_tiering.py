@@ -0,0 +1,145 @@
+"""
+モデルの2段階抽出（高速モデル → 確信度の低い項目のみ高精度モデル）
+エスカレーション対象の選定、結果のマージ、段階ごとの所要時間・エスカレーション率の統計
+"""
+import logging
+import threading
+from typing import List, Dict, Any
+
+from .extraction_cache import PartialExtractionResult, get_failed_labels
+
+logger = logging.getLogger(__name__)
+
+TIER_FAST = "fast"
+TIER_STRONG = "strong"
+
+
+def needs_escalation(data: Dict[str, Any], threshold: float, escalate_missing: bool) -> bool:
+    """
+    高精度モデルで再抽出すべき項目か
+
+    値がある項目は確信度が threshold 未満の場合、値がない項目は escalate_missing の場合に対象とする。
+    """
+    if data.get("value") is None:
+        return escalate_missing
+    try:
+        confidence = float(data.get("confidence") or 0.0)
+    except (TypeError, ValueError):
+        confidence = 0.0
+    return confidence < threshold
+
+
+def select_escalation_labels(
+    results: Dict[str, Dict[str, Any]],
+    labels: List[str],
+    threshold: float,
+    escalate_missing: bool = False
+) -> List[str]:
+    """
+    高速モデルの結果からエスカレーション対象のラベルを選ぶ（ラベルの順序を維持）
+
+    結果に含まれないラベル（シャードの失敗等）は常に対象とする。
+    """
+    return [
+        label for label in labels
+        if label not in results or needs_escalation(results[label], threshold, escalate_missing)
+    ]
+
+
+def merge_escalated(
+    fast_results: Dict[str, Dict[str, Any]],
+    strong_results: Dict[str, Dict[str, Any]],
+    escalated: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    高速モデルの結果に高精度モデルの結果を上書き
+
+    高精度モデルで取得できなかったラベルは高速モデルの結果を残す。
+    高精度モデルの結果が部分的な場合や、高速モデルで失敗したラベルが再抽出されずに
+    残る場合は、マージ結果も部分的（キャッシュしない）とする。
+    """
+    escalated_set = set(escalated)
+    failed_labels = (
+        {label for label in get_failed_labels(fast_results) if label not in escalated_set}
+        | get_failed_labels(strong_results)
+    )
+    partial = bool(failed_labels) or isinstance(strong_results, PartialExtractionResult)
+    merged: Dict[str, Dict[str, Any]] = (
+        PartialExtractionResult(failed_labels=failed_labels) if partial else {}
+    )
+    merged.update(fast_results)
+    for label in escalated:
+        if label in strong_results:
+            merged[label] = strong_results[label]
+    return merged
+
+
+class TieringStats:
+    """段階ごとの呼び出し回数・所要時間とエスカレーション率"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.escalated_jobs = 0
+        self.labels = 0
+        self.escalated_labels = 0
+        self._calls = {TIER_FAST: 0, TIER_STRONG: 0}
+        self._seconds = {TIER_FAST: 0.0, TIER_STRONG: 0.0}
+
+    def record_pass(self, tier: str, seconds: float) -> None:
+        with self._lock:
+            self._calls[tier] += 1
+            self._seconds[tier] += seconds
+
+    def record_job(self, labels: int, escalated: int) -> None:
+        with self._lock:
+            self.jobs += 1
+            self.escalated_jobs += int(escalated > 0)
+            self.labels += labels
+            self.escalated_labels += escalated
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            tiers = {
+                tier: {
+                    "calls": self._calls[tier],
+                    "total_seconds": round(self._seconds[tier], 3),
+                    "avg_seconds": (
+                        round(self._seconds[tier] / self._calls[tier], 3)
+                        if self._calls[tier] else None
+                    ),
+                }
+                for tier in (TIER_FAST, TIER_STRONG)
+            }
+            return {
+                "jobs": self.jobs,
+                "escalated_jobs": self.escalated_jobs,
+                "job_escalation_rate": (
+                    round(self.escalated_jobs / self.jobs, 4) if self.jobs else None
+                ),
+                "labels": self.labels,
+                "escalated_labels": self.escalated_labels,
+                "label_escalation_rate": (
+                    round(self.escalated_labels / self.labels, 4) if self.labels else None
+                ),
+                "tiers": tiers,
+            }
+
+
+# プロセス全体の累計（/metrics 用）
+_global_stats = TieringStats()
+
+
+def record_tier_pass(tier: str, seconds: float) -> None:
+    """1段階分の抽出の所要時間を記録"""
+    _global_stats.record_pass(tier, seconds)
+
+
+def record_tiered_job(labels: int, escalated: int) -> None:
+    """1件の2段階抽出のラベル数・エスカレーション数を記録"""
+    _global_stats.record_job(labels, escalated)
+
+
+def get_tiering_stats() -> Dict[str, Any]:
+    """2段階抽出の累計統計"""
+    return _global_stats.to_dict()
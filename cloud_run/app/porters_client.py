@@ -123,7 +123,7 @@ async def import_porters_data(
     porters_data = record["data"]
     
     # シートに書き込み
-    updated_count = sheets_client.write_porters_results(
+    updated_count = await sheets_client.write_porters_results_async(
         sheet_id=sheet_id,
         sheet_name=sheet_name,
         results=porters_data
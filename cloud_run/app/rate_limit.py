@@ -0,0 +1,278 @@
+"""
+クォータ制御・リトライ
+下流サービス（Sheets / Speech / Anthropic / Webhook）ごとのトークンバケットと
+ジッター付き指数バックオフによる共通リトライ層
+"""
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Callable, Awaitable, TypeVar
+
+import anthropic
+import gspread
+import httpx
+from google.api_core import exceptions as google_exceptions
+
+from .settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 下流サービス名
+DOWNSTREAM_SHEETS_READ = "sheets_read"
+DOWNSTREAM_SHEETS_WRITE = "sheets_write"
+DOWNSTREAM_SPEECH = "speech"
+DOWNSTREAM_ANTHROPIC = "anthropic"
+DOWNSTREAM_WEBHOOK = "webhook"
+
+# リトライ対象のHTTPステータス
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504, 529}
+
+# バースト許容量（何秒分のトークンを溜められるか）
+BUCKET_BURST_SECONDS = 10
+
+
+class TokenBucket:
+    """
+    非同期トークンバケット
+
+    待機中の呼び出しはロック順（FIFO）に処理される。
+    """
+
+    def __init__(self, rate_per_minute: float, burst_seconds: float = BUCKET_BURST_SECONDS):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, cost: float = 1.0) -> float:
+        """
+        トークンを取得（不足時は補充まで待機）
+
+        容量を超えるコストはバケットが満杯になるまで待ってから全額を消費し、
+        不足分は負債として後続の呼び出しの待機で返済する。
+
+        Returns:
+            待機した秒数
+        """
+        required = min(cost, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= required:
+                    self._tokens -= cost
+                    return waited
+                wait = (required - self._tokens) / self.rate
+                await asyncio.sleep(wait)
+                waited += wait
+
+
+class DownstreamLimiter:
+    """下流サービス1つ分のリミッタ（リクエスト数・トークン数・同時実行数）"""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_concurrency: int = 0
+    ):
+        self.name = name
+        self._request_bucket = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stats: Dict[str, float] = {
+            "calls": 0,
+            "throttled": 0,
+            "throttled_seconds": 0.0,
+            "retried": 0,
+            "failed": 0,
+        }
+
+    def _get_semaphore(self) -> Optional[asyncio.Semaphore]:
+        if self._max_concurrency > 0 and self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        return self._semaphore
+
+    async def _wait_for_quota(self, tokens: float) -> None:
+        waited = 0.0
+        if self._request_bucket:
+            waited += await self._request_bucket.acquire(1.0)
+        if self._token_bucket and tokens > 0:
+            waited += await self._token_bucket.acquire(tokens)
+
+        if waited > 0:
+            self.stats["throttled"] += 1
+            self.stats["throttled_seconds"] = round(self.stats["throttled_seconds"] + waited, 3)
+            logger.info(f"Throttled {self.name} call for {waited:.2f}s")
+
+    async def run(self, func: Callable[[], Awaitable[T]], tokens: float = 0) -> T:
+        """クォータを確保してから func() を実行"""
+        await self._wait_for_quota(tokens)
+        self.stats["calls"] += 1
+
+        semaphore = self._get_semaphore()
+        if semaphore is None:
+            return await func()
+        async with semaphore:
+            return await func()
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-Afterヘッダー（秒数 or HTTP日付）を秒数に変換"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(exc: BaseException) -> Optional[float]:
+    """
+    例外がリトライ対象かを判定
+
+    Returns:
+        リトライ対象でなければ None、対象なら Retry-After 秒数（指定なしは 0.0）
+    """
+    # Google API（Speech, Secret Manager等のgRPC）
+    if isinstance(exc, (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+    )):
+        return 0.0
+
+    response = None
+    status_code = None
+
+    # gspread
+    if isinstance(exc, gspread.exceptions.APIError):
+        response = getattr(exc, "response", None)
+        status_code = getattr(response, "status_code", None)
+
+    # Anthropic
+    elif isinstance(exc, anthropic.APIConnectionError):
+        return 0.0
+    elif isinstance(exc, anthropic.APIStatusError):
+        response = exc.response
+        status_code = exc.status_code
+
+    # httpx（Webhook）: 送達していないことが確実な接続エラーのみ再送する
+    elif isinstance(exc, httpx.ConnectError):
+        return 0.0
+    elif isinstance(exc, httpx.HTTPStatusError):
+        response = exc.response
+        status_code = exc.response.status_code
+
+    if status_code not in RETRYABLE_STATUS_CODES:
+        return None
+
+    headers = getattr(response, "headers", None) or {}
+    return _parse_retry_after(headers.get("retry-after")) or 0.0
+
+
+def backoff_delay(attempt: int, retry_after: float = 0.0) -> float:
+    """
+    ジッター付き指数バックオフの待機秒数（Full Jitter）
+
+    Retry-Afterが指定されている場合はそれ以上待機する。
+    """
+    settings = get_settings()
+    cap = min(settings.RETRY_MAX_DELAY_SECONDS, settings.RETRY_BASE_DELAY_SECONDS * (2 ** attempt))
+    delay = random.uniform(0, cap)
+    return max(delay, retry_after)
+
+
+# 下流サービスごとのリミッタ
+_limiters: Dict[str, DownstreamLimiter] = {}
+
+
+def get_limiter(downstream: str) -> DownstreamLimiter:
+    """下流サービスのリミッタを取得（設定値から遅延生成）"""
+    limiter = _limiters.get(downstream)
+    if limiter is not None:
+        return limiter
+
+    settings = get_settings()
+    if downstream == DOWNSTREAM_SHEETS_READ:
+        limiter = DownstreamLimiter(downstream, requests_per_minute=settings.SHEETS_READ_PER_MINUTE)
+    elif downstream == DOWNSTREAM_SHEETS_WRITE:
+        limiter = DownstreamLimiter(downstream, requests_per_minute=settings.SHEETS_WRITE_PER_MINUTE)
+    elif downstream == DOWNSTREAM_SPEECH:
+        limiter = DownstreamLimiter(downstream, max_concurrency=settings.SPEECH_MAX_CONCURRENCY)
+    elif downstream == DOWNSTREAM_ANTHROPIC:
+        limiter = DownstreamLimiter(
+            downstream,
+            requests_per_minute=settings.ANTHROPIC_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.ANTHROPIC_INPUT_TOKENS_PER_MINUTE,
+        )
+    elif downstream == DOWNSTREAM_WEBHOOK:
+        limiter = DownstreamLimiter(downstream, requests_per_minute=settings.WEBHOOK_REQUESTS_PER_MINUTE)
+    else:
+        raise ValueError(f"Unknown downstream: {downstream}")
+
+    _limiters[downstream] = limiter
+    return limiter
+
+
+async def call_with_quota(
+    downstream: str,
+    func: Callable[[], Awaitable[T]],
+    tokens: float = 0
+) -> T:
+    """
+    クォータ制御とリトライ付きで下流サービスを呼び出す
+
+    Args:
+        downstream: 下流サービス名（DOWNSTREAM_*）
+        func: 呼び出しを行うコルーチンを返す関数（リトライ毎に呼ばれる）
+        tokens: トークンバケットで消費するトークン数（Anthropicの入力トークン見積り等）
+
+    Returns:
+        func() の戻り値
+    """
+    settings = get_settings()
+    limiter = get_limiter(downstream)
+    max_attempts = max(1, settings.RETRY_MAX_ATTEMPTS)
+
+    for attempt in range(max_attempts):
+        try:
+            return await limiter.run(func, tokens=tokens)
+        except Exception as e:
+            retry_after = classify_error(e)
+            if retry_after is None or attempt == max_attempts - 1:
+                limiter.stats["failed"] += 1
+                raise
+
+            delay = backoff_delay(attempt, retry_after)
+            limiter.stats["retried"] += 1
+            logger.warning(
+                f"Retrying {downstream} call in {delay:.2f}s "
+                f"(attempt {attempt + 1}/{max_attempts}): {e}"
+            )
+            await asyncio.sleep(delay)
+
+    raise RuntimeError("unreachable")
+
+
+def get_rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+    """下流サービスごとの呼び出し・スロットリング・リトライ件数"""
+    return {name: dict(limiter.stats) for name, limiter in _limiters.items()}
@@ -0,0 +1,230 @@
+"""
+抽出前の関連箇所絞り込み
+文字起こしの文を文字n-gramのBM25で索引し、ラベル（＋同義語）ごとに関連する文のみをプロンプトに含める
+"""
+import logging
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from .token_utils import estimate_tokens
+from .windowed_extraction import split_sentences
+
+logger = logging.getLogger(__name__)
+
+# 抜き出した文の間が連続していない箇所の区切り
+SEGMENT_GAP_MARKER = "\n…\n"
+
+_NON_WORD = re.compile(r"[\s\W_]+")
+
+
+def normalize_text(text: str) -> str:
+    """NFKC正規化・小文字化し、空白と記号を除去"""
+    return _NON_WORD.sub("", unicodedata.normalize("NFKC", text).lower())
+
+
+def char_ngrams(text: str, n: int = 2) -> List[str]:
+    """文字n-gram（正規化後の文字列が n 未満の場合はその文字列自体）"""
+    normalized = normalize_text(text)
+    if len(normalized) < n:
+        return [normalized] if normalized else []
+    return [normalized[i:i + n] for i in range(len(normalized) - n + 1)]
+
+
+class BM25Index:
+    """
+    文単位の文字n-gram BM25索引
+
+    日本語は単語境界がないため、形態素解析の代わりに文字bigramを語として扱う。
+    """
+
+    def __init__(self, segments: List[str], n: int = 2, k1: float = 1.5, b: float = 0.75):
+        self.segments = segments
+        self.n = n
+        self.k1 = k1
+
+        term_freqs = [Counter(char_ngrams(segment, n)) for segment in segments]
+        lengths = [sum(tf.values()) for tf in term_freqs]
+        avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        # 文ごとの長さ正規化項
+        self._norms = [
+            k1 * (1 - b + b * length / avg_length) if avg_length else k1
+            for length in lengths
+        ]
+
+        # 転置索引: term -> [(文インデックス, 出現回数), ...]
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        for i, tf in enumerate(term_freqs):
+            for term, freq in tf.items():
+                self._postings.setdefault(term, []).append((i, freq))
+
+        total = len(segments)
+        self._idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    @classmethod
+    def from_transcript(cls, transcript: str, **kwargs) -> "BM25Index":
+        return cls(split_sentences(transcript), **kwargs)
+
+    def score(self, query: str) -> Dict[int, float]:
+        """クエリに一致した文のスコア {文インデックス: スコア}"""
+        scores: Dict[int, float] = {}
+        for term in set(char_ngrams(query, self.n)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for i, freq in self._postings[term]:
+                scores[i] = scores.get(i, 0.0) + idf * freq * (self.k1 + 1) / (freq + self._norms[i])
+        return scores
+
+    def top_k(self, queries: List[str], k: int, min_score: float) -> List[int]:
+        """複数クエリ（ラベルと同義語）の最大スコアで上位 k 文のインデックス"""
+        best: Dict[int, float] = {}
+        for query in queries:
+            for i, score in self.score(query).items():
+                if score > best.get(i, 0.0):
+                    best[i] = score
+        ranked = sorted(best, key=lambda i: (-best[i], i))
+        return [i for i in ranked[:k] if best[i] >= min_score]
+
+
+class RetrievalStats:
+    """絞り込みの統計（送信を省略したトークン数等）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.groups = 0
+        self.fallbacks = 0
+        self.full_tokens = 0
+        self.sent_tokens = 0
+
+    def record(self, full_tokens: int, sent_tokens: int, fallback: bool) -> None:
+        with self._lock:
+            self.groups += 1
+            self.fallbacks += int(fallback)
+            self.full_tokens += full_tokens
+            self.sent_tokens += sent_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "groups": self.groups,
+                "fallbacks": self.fallbacks,
+                "full_tokens": self.full_tokens,
+                "sent_tokens": self.sent_tokens,
+                "tokens_saved": self.full_tokens - self.sent_tokens,
+            }
+
+
+# プロセス全体の累計（/metrics 用）
+_global_stats = RetrievalStats()
+
+
+class RetrievalContext:
+    """
+    1ジョブ分の絞り込み設定と統計
+
+    同義語マップ（config シートの synonyms 列）を保持し、
+    ジョブ単位の統計とプロセス全体の累計の両方に記録する。
+    """
+
+    def __init__(self, synonyms: Optional[Dict[str, List[str]]] = None):
+        self.synonyms = synonyms or {}
+        self.stats = RetrievalStats()
+
+    def record(self, full_tokens: int, sent_tokens: int, fallback: bool) -> None:
+        self.stats.record(full_tokens, sent_tokens, fallback)
+        _global_stats.record(full_tokens, sent_tokens, fallback)
+
+
+def select_relevant_transcript(
+    index: BM25Index,
+    labels: List[str],
+    synonyms: Dict[str, List[str]],
+    top_k: int,
+    min_score: float,
+    min_coverage: float,
+    context_sentences: int = 1
+) -> Optional[str]:
+    """
+    ラベル群に関連する文のみを元の順序で連結
+
+    各ラベル（と同義語）で上位 top_k 文を選び、前後 context_sentences 文を加える。
+    min_score 以上の文が見つかったラベルの割合が min_coverage 未満の場合は
+    絞り込まない（None を返し、呼び出し側は全文を使う）。
+
+    Args:
+        index: 文字起こしの索引
+        labels: ラベル群
+        synonyms: {label: [同義語, ...]}
+        top_k: ラベルあたりの選択文数
+        min_score: 関連ありとみなす最小スコア
+        min_coverage: 関連文が見つかったラベルの最小割合
+        context_sentences: 選択文の前後に含める文数
+
+    Returns:
+        絞り込んだ文字起こし（絞り込まない場合はNone）
+    """
+    if not labels or not index.segments:
+        return None
+
+    selected: Set[int] = set()
+    covered = 0
+    for label in labels:
+        hits = index.top_k([label] + synonyms.get(label, []), top_k, min_score)
+        if hits:
+            covered += 1
+            selected.update(hits)
+
+    if covered / len(labels) < min_coverage:
+        return None
+
+    expanded: Set[int] = set()
+    last = len(index.segments) - 1
+    for i in selected:
+        expanded.update(range(max(0, i - context_sentences), min(last, i + context_sentences) + 1))
+
+    parts: List[str] = []
+    previous = None
+    for i in sorted(expanded):
+        if previous is not None and i != previous + 1:
+            parts.append(SEGMENT_GAP_MARKER)
+        parts.append(index.segments[i])
+        previous = i
+    return "".join(parts)
+
+
+def narrow_transcript(
+    transcript: str,
+    index: BM25Index,
+    labels: List[str],
+    context: RetrievalContext,
+    top_k: int,
+    min_score: float,
+    min_coverage: float
+) -> str:
+    """ラベル群向けに絞り込んだ文字起こし（絞り込めない場合は全文）を返し、統計を記録"""
+    narrowed = select_relevant_transcript(
+        index, labels, context.synonyms, top_k, min_score, min_coverage
+    )
+    full_tokens = estimate_tokens(transcript)
+    if narrowed is None or estimate_tokens(narrowed) >= full_tokens:
+        context.record(full_tokens, full_tokens, fallback=True)
+        return transcript
+
+    sent_tokens = estimate_tokens(narrowed)
+    context.record(full_tokens, sent_tokens, fallback=False)
+    logger.info(
+        f"Retrieval: {len(labels)} labels, ~{sent_tokens}/{full_tokens} transcript tokens sent"
+    )
+    return narrowed
+
+
+def get_retrieval_stats() -> Dict[str, Any]:
+    """絞り込みの累計統計"""
+    return _global_stats.to_dict()
@@ -0,0 +1,212 @@
+"""
+Secret Manager キャッシュ付きプロバイダ
+TTL・stale-while-revalidate・存在しないシークレットのネガティブキャッシュに対応
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional, Dict, List, Set
+
+from google.api_core import exceptions as google_exceptions
+from google.cloud import secretmanager
+
+from .settings import get_settings
+from .executor import get_executor, run_blocking
+from .ttl_cache import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class SecretNotFoundError(LookupError):
+    """シークレットが存在しない場合の例外"""
+
+
+class _SecretEntry:
+    """キャッシュエントリ（value=None は存在しないシークレット）"""
+
+    def __init__(self, name: str, value: Optional[str]):
+        self.name = name
+        self.value = value
+        self.fetched_at = time.monotonic()
+
+    @property
+    def is_missing(self) -> bool:
+        return self.value is None
+
+    def resolve(self) -> str:
+        if self.value is None:
+            raise SecretNotFoundError(f"Secret not found: {self.name}")
+        return self.value
+
+
+class SecretProvider:
+    """
+    Secret Managerのシークレットをプロセス内でキャッシュするプロバイダ
+
+    - TTL内: キャッシュを返す（ネットワーク呼び出しなし）
+    - TTL超過〜TTL+STALE: 古い値を返しつつバックグラウンドで更新
+    - それ以降: 同期的に再取得
+    存在しないシークレット（NotFound）は SECRET_NEGATIVE_CACHE_TTL_SECONDS の間
+    ネガティブキャッシュされ、SecretNotFoundError を送出する。
+    同一シークレットの同時の再取得は1回にまとめる（非同期は SingleFlight、同期はロック）。
+    """
+
+    def __init__(self):
+        self._settings = get_settings()
+        self._client: Optional[secretmanager.SecretManagerServiceClient] = None
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _SecretEntry] = {}
+        self._refreshing: Set[str] = set()
+        self._flight = SingleFlight()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+
+    def _get_client(self) -> secretmanager.SecretManagerServiceClient:
+        """Secret Managerクライアントを取得（遅延初期化）"""
+        with self._lock:
+            if self._client is None:
+                self._client = secretmanager.SecretManagerServiceClient()
+            return self._client
+
+    def _ttl_for(self, entry: _SecretEntry) -> float:
+        if entry.is_missing:
+            return self._settings.SECRET_NEGATIVE_CACHE_TTL_SECONDS
+        return self._settings.SECRET_CACHE_TTL_SECONDS
+
+    def _fetch(self, secret_name: str) -> _SecretEntry:
+        """Secret Managerから取得してキャッシュに格納"""
+        name = (
+            f"projects/{self._settings.GCP_PROJECT}/secrets/"
+            f"{secret_name}/versions/latest"
+        )
+        try:
+            response = self._get_client().access_secret_version(request={"name": name})
+            entry = _SecretEntry(secret_name, response.payload.data.decode("UTF-8"))
+        except google_exceptions.NotFound:
+            logger.info(f"Secret {secret_name} not found (negative-cached)")
+            entry = _SecretEntry(secret_name, None)
+
+        with self._lock:
+            self._entries[secret_name] = entry
+        return entry
+
+    def _lookup(self, secret_name: str) -> Optional[_SecretEntry]:
+        """
+        キャッシュからエントリを引く
+
+        TTL超過かつ STALE 期間内の場合はバックグラウンド更新を予約した上で
+        古いエントリを返す。
+
+        Returns:
+            キャッシュエントリ（再取得が必要な場合はNone）
+        """
+        entry = self._entries.get(secret_name)
+        if entry is None:
+            return None
+
+        age = time.monotonic() - entry.fetched_at
+        ttl = self._ttl_for(entry)
+        if age < ttl:
+            return entry
+        if age < ttl + self._settings.SECRET_STALE_TTL_SECONDS:
+            self._schedule_refresh(secret_name)
+            return entry
+        return None
+
+    def _schedule_refresh(self, secret_name: str) -> None:
+        """バックグラウンド更新をスレッドプールに投入（同一シークレットは1本のみ）"""
+        with self._lock:
+            if secret_name in self._refreshing:
+                return
+            self._refreshing.add(secret_name)
+        get_executor().submit(self._refresh, secret_name)
+
+    def _refresh(self, secret_name: str) -> None:
+        try:
+            self._fetch(secret_name)
+            logger.debug(f"Secret refreshed in background: {secret_name}")
+        except Exception as e:
+            # 更新失敗時は古い値を返し続ける
+            logger.warning(f"Background refresh failed for secret {secret_name}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(secret_name)
+
+    def _load(self, secret_name: str) -> _SecretEntry:
+        """
+        キャッシュミス時に取得
+
+        同一シークレットを同時に取得するスレッドは1つにし、他のスレッドは
+        ロック取得後にキャッシュを引き直す。
+        """
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(secret_name, threading.Lock())
+
+        with fetch_lock:
+            entry = self._lookup(secret_name)
+            if entry is not None:
+                return entry
+            try:
+                return self._fetch(secret_name)
+            except Exception as e:
+                logger.error(f"Failed to get secret {secret_name}: {e}")
+                raise
+
+    def get(self, secret_name: str) -> str:
+        """
+        シークレットを取得（同期版）
+
+        Raises:
+            SecretNotFoundError: シークレットが存在しない場合
+        """
+        entry = self._lookup(secret_name)
+        if entry is None:
+            entry = self._load(secret_name)
+        return entry.resolve()
+
+    async def get_async(self, secret_name: str) -> str:
+        """
+        シークレットを取得（非同期版）
+
+        キャッシュヒット時はスレッドプールを経由せずに返す。
+        キャッシュミス・期限切れ時の取得は SingleFlight で1回にまとめる。
+        """
+        entry = self._lookup(secret_name)
+        if entry is None:
+            entry = await self._flight.do(
+                secret_name, lambda: run_blocking(self._load, secret_name)
+            )
+        return entry.resolve()
+
+    async def preload(self, secret_names: List[str]) -> None:
+        """起動時にシークレットを事前取得（ウォームアップ）"""
+        results = await asyncio.gather(
+            *(self.get_async(name) for name in secret_names),
+            return_exceptions=True
+        )
+        for name, result in zip(secret_names, results):
+            if isinstance(result, SecretNotFoundError):
+                logger.info(f"Secret not configured: {name}")
+            elif isinstance(result, Exception):
+                logger.warning(f"Failed to preload secret {name}: {result}")
+        logger.info(f"Secrets preloaded: {len(secret_names)}")
+
+    def invalidate(self, secret_name: Optional[str] = None) -> None:
+        """キャッシュを破棄（secret_name省略時は全件）"""
+        with self._lock:
+            if secret_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(secret_name, None)
+
+
+# シングルトンインスタンス
+_secret_provider: Optional[SecretProvider] = None
+
+
+def get_secret_provider() -> SecretProvider:
+    """SecretProviderのシングルトンインスタンスを取得"""
+    global _secret_provider
+    if _secret_provider is None:
+        _secret_provider = SecretProvider()
+    return _secret_provider
@@ -0,0 +1,247 @@
+"""
+文字起こしの区間表
+Speech-to-Text の認識結果ごとのテキストと音声上の時刻を保持し、抽出結果の根拠（区間番号）をテキストと時刻に解決する
+"""
+import logging
+import re
+from array import array
+from typing import List, Dict, Any, Optional, Tuple, Callable
+
+logger = logging.getLogger(__name__)
+
+# (テキスト, 開始秒, 終了秒)
+Segment = Tuple[str, float, float]
+
+# プロンプト用テキストの各行の先頭に付ける区間番号
+_SEGMENT_LINE = re.compile(r"^\[\d+\] ", re.MULTILINE)
+_INDEX_RANGE = re.compile(r"(\d+)\s*[-〜~]\s*(\d+)|(\d+)")
+
+# 区間の変換後に句読点・空白のみとなった区間は省く
+_PUNCTUATION = " \t\n、。，,．.！？!?"
+
+# 1項目の根拠として解決する最大区間数
+MAX_EVIDENCE_SEGMENTS = 5
+
+
+class SegmentTable:
+    """
+    区間表
+
+    テキストは1つの文字列に連結し、区間ごとのテキスト位置と時刻は array で保持する
+    （区間ごとのオブジェクトを作らない）。
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._text: Optional[str] = None
+        self._offsets = array("l", [0])
+        self._starts = array("d")
+        self._ends = array("d")
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def append(self, text: str, start_seconds: float, end_seconds: float) -> None:
+        self._parts.append(text)
+        self._text = None
+        self._offsets.append(self._offsets[-1] + len(text))
+        self._starts.append(start_seconds)
+        self._ends.append(end_seconds)
+
+    def extend(self, segments: List[Segment]) -> None:
+        for text, start, end in segments:
+            self.append(text, start, end)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(self._parts)
+            self._parts = [self._text]
+        return self._text
+
+    def segment_text(self, index: int) -> str:
+        return self.text[self._offsets[index]:self._offsets[index + 1]]
+
+    def time_range(self, index: int) -> Tuple[float, float]:
+        return self._starts[index], self._ends[index]
+
+    @property
+    def last_end(self) -> float:
+        return self._ends[-1] if len(self) else 0.0
+
+    def map_times(self, func: Callable[[float], float]) -> None:
+        """時刻を変換（無音トリミング後の時刻 → 元音声の時刻）"""
+        for i in range(len(self)):
+            self._starts[i] = func(self._starts[i])
+            self._ends[i] = func(self._ends[i])
+
+    def to_prompt_text(self, transform: Optional[Callable[[str], str]] = None) -> str:
+        """
+        区間番号付きのテキスト（1区間1行、"[番号] テキスト"）
+
+        transform を指定した場合は各区間のテキストを変換し、空になった区間は省く
+        （区間番号は変えない）。
+        """
+        lines = []
+        for i in range(len(self)):
+            text = self.segment_text(i)
+            if transform is not None:
+                text = transform(text)
+                if not text.strip(_PUNCTUATION):
+                    continue
+            lines.append(f"[{i}] {text}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "text": self.text,
+            "offsets": self._offsets.tolist(),
+            "starts": [round(t, 3) for t in self._starts],
+            "ends": [round(t, 3) for t in self._ends],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SegmentTable":
+        table = cls()
+        table._parts = [data["text"]]
+        table._offsets = array("l", data["offsets"])
+        table._starts = array("d", data["starts"])
+        table._ends = array("d", data["ends"])
+        return table
+
+
+def has_segment_numbers(transcript: str) -> bool:
+    """区間番号付きのテキスト（SegmentTable.to_prompt_text の出力）か"""
+    return _SEGMENT_LINE.search(transcript) is not None
+
+
+def segment_prefix(line: str) -> str:
+    """区間番号付きの行の先頭 "[番号] "（区間番号がない場合は空文字）"""
+    match = _SEGMENT_LINE.match(line)
+    return match.group() if match else ""
+
+
+def segments_from_response(response: Any, time_offset: float = 0.0) -> List[Segment]:
+    """
+    認識結果から区間を作成（認識結果1件 = 1区間）
+
+    単語の時刻（enable_word_time_offsets）があればその範囲、なければ
+    直前の結果の終了時刻〜 result_end_time を区間の時刻とする。
+
+    Args:
+        response: recognize / long_running_recognize のレスポンス
+        time_offset: 時刻に加える秒数（分割文字起こしのチャンク開始位置）
+
+    Returns:
+        [(テキスト, 開始秒, 終了秒), ...]
+    """
+    segments: List[Segment] = []
+    previous_end = 0.0
+    for result in response.results:
+        if not result.alternatives:
+            continue
+        alternative = result.alternatives[0]
+        result_end = _seconds(getattr(result, "result_end_time", None))
+        words = list(getattr(alternative, "words", []) or [])
+        if words:
+            start = _seconds(words[0].start_time)
+            end = _seconds(words[-1].end_time)
+        else:
+            start = previous_end
+            end = result_end if result_end is not None else previous_end
+        previous_end = result_end if result_end is not None else end
+        text = alternative.transcript.strip()
+        if text:
+            segments.append((text, start + time_offset, end + time_offset))
+    return segments
+
+
+def _seconds(value: Any) -> Optional[float]:
+    """Duration（timedelta）を秒数に変換"""
+    if value is None:
+        return None
+    if hasattr(value, "total_seconds"):
+        return value.total_seconds()
+    return float(value)
+
+
+def parse_segment_indices(evidence: Any) -> Optional[List[int]]:
+    """
+    根拠として返された区間番号を解釈
+
+    12 / [12, 13] / "12" / "12-14" 形式に対応する。
+    区間番号でない値（引用テキスト等）の場合はNone。
+    """
+    if isinstance(evidence, bool):
+        return None
+    if isinstance(evidence, int):
+        return [evidence]
+    if isinstance(evidence, str):
+        if not evidence.strip():
+            return []
+        if not re.fullmatch(r"[\s\d,、\-〜~\[\]]+", evidence):
+            return None
+        indices: List[int] = []
+        for start, end, single in _INDEX_RANGE.findall(evidence):
+            if single:
+                indices.append(int(single))
+            else:
+                indices.extend(range(int(start), int(end) + 1))
+        return indices
+    if isinstance(evidence, list):
+        indices = []
+        for item in evidence:
+            parsed = parse_segment_indices(item)
+            if parsed is None:
+                return None
+            indices.extend(parsed)
+        return indices
+    return None
+
+
+def format_timestamp(seconds: float) -> str:
+    """秒数を m:ss（1時間以上は h:mm:ss）形式に変換"""
+    total = int(seconds)
+    hours, rest = divmod(total, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+
+def resolve_field_evidence(data: Dict[str, Any], table: SegmentTable) -> Dict[str, Any]:
+    """
+    1項目の根拠（区間番号）を区間表のテキストと時刻に置き換える
+
+    evidence は "[m:ss-m:ss] 発話テキスト" 形式になり、evidence_start_seconds /
+    evidence_end_seconds に元音声上の時刻を加える。区間番号でない根拠はそのまま返す。
+    """
+    indices = parse_segment_indices(data.get("evidence"))
+    if indices is None:
+        return data
+
+    valid = sorted({i for i in indices if 0 <= i < len(table)})
+    if len(valid) < len(indices):
+        logger.debug(f"Ignoring out-of-range evidence segments: {indices}")
+    valid = valid[:MAX_EVIDENCE_SEGMENTS]
+
+    resolved = dict(data)
+    if not valid:
+        resolved["evidence"] = ""
+        return resolved
+
+    start = min(table.time_range(i)[0] for i in valid)
+    end = max(table.time_range(i)[1] for i in valid)
+    text = " ".join(table.segment_text(i) for i in valid)
+    resolved["evidence"] = f"[{format_timestamp(start)}-{format_timestamp(end)}] {text}"
+    resolved["evidence_start_seconds"] = round(start, 3)
+    resolved["evidence_end_seconds"] = round(end, 3)
+    return resolved
+
+
+def resolve_evidence(
+    results: Dict[str, Dict[str, Any]],
+    table: SegmentTable
+) -> Dict[str, Dict[str, Any]]:
+    """抽出結果全体の根拠を解決（{label: {value, confidence, evidence, ...}}）"""
+    return {label: resolve_field_evidence(data, table) for label, data in results.items()}
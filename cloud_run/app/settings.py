@@ -20,6 +20,16 @@ class Settings:
         "anthropic-api-key"
     )
     CLAUDE_MODEL: str = os.getenv("CLAUDE_MODEL", "claude-sonnet-4-20250514")
+    # 2段階抽出の1段目に使う高速モデル（未設定の場合は CLAUDE_MODEL のみで抽出）
+    CLAUDE_FAST_MODEL: str = os.getenv("CLAUDE_FAST_MODEL", "")
+    # 1段目の確信度がこの値未満の項目を CLAUDE_MODEL で再抽出
+    EXTRACTION_ESCALATION_CONFIDENCE: float = float(
+        os.getenv("EXTRACTION_ESCALATION_CONFIDENCE", "0.7")
+    )
+    # 1段目で値が見つからなかった項目も再抽出する
+    EXTRACTION_ESCALATE_MISSING: bool = os.getenv(
+        "EXTRACTION_ESCALATE_MISSING", "false"
+    ).lower() == "true"
     
     # Webhook
     WEBHOOK_URL_SECRET_NAME: str = os.getenv(
@@ -30,14 +40,172 @@ class Settings:
         "WEBHOOK_TOKEN_SECRET_NAME", 
         "webhook-token"
     )
+    SLACK_WEBHOOK_URL_SECRET_NAME: str = os.getenv(
+        "SLACK_WEBHOOK_URL_SECRET_NAME",
+        "slack-webhook-url"
+    )
+    
+    # 共有HTTPクライアント（Webhook/Slack送信）
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+    WEBHOOK_TIMEOUT_SECONDS: float = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "30"))
+    WEBHOOK_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("WEBHOOK_CONNECT_TIMEOUT_SECONDS", "5"))
+    SLACK_TIMEOUT_SECONDS: float = float(os.getenv("SLACK_TIMEOUT_SECONDS", "10"))
+    SLACK_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("SLACK_CONNECT_TIMEOUT_SECONDS", "5"))
+    
+    # Webhookアウトボックス（SQLite。Cloud Runではボリュームをマウントして永続化）
+    OUTBOX_DB_PATH: str = os.getenv("OUTBOX_DB_PATH", "/tmp/mendan/webhook_outbox.sqlite3")
+    OUTBOX_WORKER_COUNT: int = int(os.getenv("OUTBOX_WORKER_COUNT", "2"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    OUTBOX_BASE_BACKOFF_SECONDS: float = float(os.getenv("OUTBOX_BASE_BACKOFF_SECONDS", "5"))
+    OUTBOX_MAX_BACKOFF_SECONDS: float = float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "900"))
+    OUTBOX_POLL_INTERVAL_SECONDS: float = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "5"))
+    OUTBOX_DELIVERED_RETENTION_SECONDS: int = int(
+        os.getenv("OUTBOX_DELIVERED_RETENTION_SECONDS", str(7 * 24 * 3600))
+    )
+    
+    # idempotency_key 応答キャッシュ
+    IDEMPOTENCY_CACHE_MAX_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_MAX_SIZE", "10000"))
+    IDEMPOTENCY_CACHE_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_CACHE_TTL_SECONDS", "86400"))
+    
+    # Secret Manager キャッシュ
+    SECRET_CACHE_TTL_SECONDS: int = int(os.getenv("SECRET_CACHE_TTL_SECONDS", "300"))
+    SECRET_STALE_TTL_SECONDS: int = int(os.getenv("SECRET_STALE_TTL_SECONDS", "3600"))
+    SECRET_NEGATIVE_CACHE_TTL_SECONDS: int = int(
+        os.getenv("SECRET_NEGATIVE_CACHE_TTL_SECONDS", "300")
+    )
     
     # Speech-to-Text
     SPEECH_LANGUAGE_CODE: str = os.getenv("SPEECH_LANGUAGE_CODE", "ja-JP")
+    # ヘッダーから取得した長さがこの秒数以下なら同期 recognize を使用（API上限は60秒）
+    SPEECH_SYNC_MAX_SECONDS: float = float(os.getenv("SPEECH_SYNC_MAX_SECONDS", "55"))
+    SPEECH_LONG_RUNNING_TIMEOUT_SECONDS: float = float(
+        os.getenv("SPEECH_LONG_RUNNING_TIMEOUT_SECONDS", "600")
+    )
+    # 長時間のLINEAR16音声を無音位置で分割して並列に文字起こし
+    STT_CHUNKED_ENABLED: bool = os.getenv("STT_CHUNKED_ENABLED", "false").lower() == "true"
+    STT_CHUNK_SECONDS: float = float(os.getenv("STT_CHUNK_SECONDS", "45"))
+    STT_CHUNK_MAX_SECONDS: float = float(os.getenv("STT_CHUNK_MAX_SECONDS", "55"))
+    STT_CHUNK_OVERLAP_SECONDS: float = float(os.getenv("STT_CHUNK_OVERLAP_SECONDS", "1.0"))
+    STT_CHUNK_CONCURRENCY: int = int(os.getenv("STT_CHUNK_CONCURRENCY", "8"))
+    STT_SILENCE_THRESHOLD_DB: float = float(os.getenv("STT_SILENCE_THRESHOLD_DB", "-40"))
+    # 文字起こし前に長い無音を除去（LINEAR16 WAVのみ）
+    VAD_ENABLED: bool = os.getenv("VAD_ENABLED", "false").lower() == "true"
+    VAD_THRESHOLD_DB: float = float(os.getenv("VAD_THRESHOLD_DB", "-45"))
+    VAD_MIN_SILENCE_SECONDS: float = float(os.getenv("VAD_MIN_SILENCE_SECONDS", "1.0"))
+    VAD_PADDING_SECONDS: float = float(os.getenv("VAD_PADDING_SECONDS", "0.25"))
+    VAD_GCS_BUCKET: str = os.getenv("VAD_GCS_BUCKET", "")
+    VAD_GCS_PREFIX: str = os.getenv("VAD_GCS_PREFIX", "mendan-vad")
+    
+    # GCSの範囲読み込み1回あたりのバイト数
+    GCS_READ_CHUNK_BYTES: int = int(os.getenv("GCS_READ_CHUNK_BYTES", str(4 * 1024 * 1024)))
+    # 範囲読み込みの先読み並列数（メモリ上限は GCS_READ_CHUNK_BYTES × この値）
+    GCS_READ_CONCURRENCY: int = int(os.getenv("GCS_READ_CONCURRENCY", "4"))
+    # 音声を一時ファイルに書き出す場合の保存先（空の場合はシステム既定）
+    AUDIO_SPOOL_DIR: str = os.getenv("AUDIO_SPOOL_DIR", "")
+    
+    # ブロッキングI/O用スレッドプール（gspread, Secret Manager, GCS等）
+    BLOCKING_IO_MAX_WORKERS: int = int(os.getenv("BLOCKING_IO_MAX_WORKERS", "32"))
+    
+    # クォータ制御（0 は無制限）
+    SHEETS_READ_PER_MINUTE: float = float(os.getenv("SHEETS_READ_PER_MINUTE", "60"))
+    SHEETS_WRITE_PER_MINUTE: float = float(os.getenv("SHEETS_WRITE_PER_MINUTE", "60"))
+    SPEECH_MAX_CONCURRENCY: int = int(os.getenv("SPEECH_MAX_CONCURRENCY", "10"))
+    ANTHROPIC_REQUESTS_PER_MINUTE: float = float(os.getenv("ANTHROPIC_REQUESTS_PER_MINUTE", "50"))
+    ANTHROPIC_INPUT_TOKENS_PER_MINUTE: float = float(
+        os.getenv("ANTHROPIC_INPUT_TOKENS_PER_MINUTE", "40000")
+    )
+    WEBHOOK_REQUESTS_PER_MINUTE: float = float(os.getenv("WEBHOOK_REQUESTS_PER_MINUTE", "300"))
+    
+    # リトライ（ジッター付き指数バックオフ）
+    RETRY_MAX_ATTEMPTS: int = int(os.getenv("RETRY_MAX_ATTEMPTS", "5"))
+    RETRY_BASE_DELAY_SECONDS: float = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "1.0"))
+    RETRY_MAX_DELAY_SECONDS: float = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "60"))
+    
+    # 非同期ジョブ（/process_audio の async_mode）
+    JOB_WORKER_COUNT: int = int(os.getenv("JOB_WORKER_COUNT", "4"))
+    JOB_QUEUE_MAX_SIZE: int = int(os.getenv("JOB_QUEUE_MAX_SIZE", "100"))
+    JOB_RESULT_TTL_SECONDS: int = int(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+    
+    # キャッシュ（TRANSCRIPT_CACHE_BACKEND: none / local / gcs）
+    CACHE_DIR: str = os.getenv("CACHE_DIR", "/tmp/mendan/cache")
+    CACHE_GCS_BUCKET: str = os.getenv("CACHE_GCS_BUCKET", "")
+    CACHE_GCS_PREFIX: str = os.getenv("CACHE_GCS_PREFIX", "mendan-cache")
+    TRANSCRIPT_CACHE_BACKEND: str = os.getenv("TRANSCRIPT_CACHE_BACKEND", "local")
+    
+    # ラベルをシャードに分けて並列に抽出（0で無効）
+    EXTRACTION_SHARD_SIZE: int = int(os.getenv("EXTRACTION_SHARD_SIZE", "25"))
+    EXTRACTION_SHARD_CONCURRENCY: int = int(os.getenv("EXTRACTION_SHARD_CONCURRENCY", "4"))
+    EXTRACTION_SHARD_MAX_ATTEMPTS: int = int(os.getenv("EXTRACTION_SHARD_MAX_ATTEMPTS", "3"))
+    
+    # 長い文字起こしを重なりのあるウィンドウに分割して抽出（0で無効）
+    EXTRACTION_WINDOW_TOKENS: int = int(os.getenv("EXTRACTION_WINDOW_TOKENS", "30000"))
+    EXTRACTION_WINDOW_OVERLAP_TOKENS: int = int(os.getenv("EXTRACTION_WINDOW_OVERLAP_TOKENS", "500"))
+    EXTRACTION_WINDOW_CONCURRENCY: int = int(os.getenv("EXTRACTION_WINDOW_CONCURRENCY", "4"))
+    
+    # ラベル群ごとに関連する文のみを送信（文字bigramのBM25）
+    RETRIEVAL_ENABLED: bool = os.getenv("RETRIEVAL_ENABLED", "false").lower() == "true"
+    RETRIEVAL_TOP_K: int = int(os.getenv("RETRIEVAL_TOP_K", "3"))
+    RETRIEVAL_MIN_SCORE: float = float(os.getenv("RETRIEVAL_MIN_SCORE", "2.0"))
+    RETRIEVAL_MIN_COVERAGE: float = float(os.getenv("RETRIEVAL_MIN_COVERAGE", "0.5"))
+    
+    # 抽出前の文字起こしの正規化（全角/半角・空白の整理、フィラー・繰り返しの除去）
+    TRANSCRIPT_NORMALIZE_ENABLED: bool = os.getenv(
+        "TRANSCRIPT_NORMALIZE_ENABLED", "true"
+    ).lower() == "true"
+    # 除去するフィラー（カンマ区切り、未設定の場合は既定の一覧）
+    TRANSCRIPT_FILLERS: str = os.getenv("TRANSCRIPT_FILLERS", "")
+    TRANSCRIPT_COLLAPSE_REPEATS: bool = os.getenv(
+        "TRANSCRIPT_COLLAPSE_REPEATS", "false"
+    ).lower() == "true"
+    TRANSCRIPT_REPEAT_MIN_CHARS: int = int(os.getenv("TRANSCRIPT_REPEAT_MIN_CHARS", "3"))
+    
+    # 文字起こしの区間番号で根拠を受け取り、区間表から発話テキストと時刻を補完する
+    SEGMENT_EVIDENCE_ENABLED: bool = os.getenv(
+        "SEGMENT_EVIDENCE_ENABLED", "false"
+    ).lower() == "true"
+    
+    # 抽出結果の出力形式（"compact": 番号付きの行 / "json": ラベル名をキーとするオブジェクト）
+    EXTRACTION_OUTPUT_FORMAT: str = os.getenv("EXTRACTION_OUTPUT_FORMAT", "json").lower()
+    
+    # ストリーミングAPIで抽出し、確定した項目から順にシートへ書き込む
+    EXTRACTION_STREAMING_ENABLED: bool = os.getenv(
+        "EXTRACTION_STREAMING_ENABLED", "true"
+    ).lower() == "true"
+    SHEETS_WRITE_BUFFER_SIZE: int = int(os.getenv("SHEETS_WRITE_BUFFER_SIZE", "10"))
+    SHEETS_WRITE_FLUSH_INTERVAL_SECONDS: float = float(
+        os.getenv("SHEETS_WRITE_FLUSH_INTERVAL_SECONDS", "2.0")
+    )
+    
+    # 単一項目抽出の要求をまとめる時間窓（ミリ秒、0でまとめない）と1回にまとめる最大ラベル数
+    EXTRACTION_COALESCE_WINDOW_MS: int = int(os.getenv("EXTRACTION_COALESCE_WINDOW_MS", "0"))
+    EXTRACTION_COALESCE_MAX_LABELS: int = int(os.getenv("EXTRACTION_COALESCE_MAX_LABELS", "25"))
+    
+    # 抽出結果キャッシュ（EXTRACTION_CACHE_BACKEND: none / local / gcs）
+    EXTRACTION_CACHE_MAX_SIZE: int = int(os.getenv("EXTRACTION_CACHE_MAX_SIZE", "256"))
+    EXTRACTION_CACHE_TTL_SECONDS: int = int(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", "86400"))
+    EXTRACTION_CACHE_BACKEND: str = os.getenv("EXTRACTION_CACHE_BACKEND", "none")
+    
+    # 差分抽出（ラベル追加時は追加分のみ抽出）
+    EXTRACTION_DELTA_ENABLED: bool = os.getenv("EXTRACTION_DELTA_ENABLED", "true").lower() == "true"
+    EXTRACTION_SNAPSHOT_BACKEND: str = os.getenv("EXTRACTION_SNAPSHOT_BACKEND", "local")
     
     # シート設定
     DEFAULT_SHEET_NAME: str = "merge_ui"
     DATA_START_ROW: int = 3
     
+    # シートキャッシュ（ワークシートハンドル / A列ラベル）
+    SHEETS_WORKSHEET_CACHE_TTL_SECONDS: int = int(
+        os.getenv("SHEETS_WORKSHEET_CACHE_TTL_SECONDS", "600")
+    )
+    SHEETS_LABEL_CACHE_TTL_SECONDS: int = int(os.getenv("SHEETS_LABEL_CACHE_TTL_SECONDS", "60"))
+    
+    # configシート（ラベルごとの設定・同義語）
+    CONFIG_SHEET_NAME: str = os.getenv("CONFIG_SHEET_NAME", "config")
+    SHEETS_CONFIG_CACHE_TTL_SECONDS: int = int(os.getenv("SHEETS_CONFIG_CACHE_TTL_SECONDS", "600"))
+    
     # 列番号（0-indexed for gspread）
     COL_LABEL: int = 0        # A列
     COL_PORTERS_CHECK: int = 1
@@ -2,79 +2,263 @@
 Google Sheets API クライアント
 スプレッドシートの読み書き操作
 """
+import asyncio
+import hashlib
 import logging
-from typing import Optional, List, Dict, Any
+import re
+import threading
+import time
+from typing import Optional, List, Dict, Any, Tuple, Iterable
 
 import gspread
 from google.oauth2 import service_account
 from google.auth import default
 
 from .settings import get_settings
+from .executor import run_blocking
+from .rate_limit import call_with_quota, DOWNSTREAM_SHEETS_READ, DOWNSTREAM_SHEETS_WRITE
 
 logger = logging.getLogger(__name__)
 
+# configシートの synonyms 列の区切り文字
+SYNONYM_SEPARATORS = re.compile(r"[,、，/／\n]")
+
+
+class LabelIndex:
+    """A列から読み取ったラベル一覧とラベル→行番号のマッピング"""
+    
+    def __init__(self, labels: List[str], row_map: Dict[str, int], checksum: str):
+        self.labels = labels
+        self.row_map = row_map
+        self.checksum = checksum
+        self.loaded_at = time.monotonic()
+    
+    @classmethod
+    def from_column(cls, col_values: List[str], start_row: int) -> "LabelIndex":
+        """A列の値（1行目から）からインデックスを構築"""
+        data_values = col_values[start_row - 1:]
+        
+        labels = []
+        row_map = {}
+        for i, label in enumerate(data_values, start=start_row):
+            if label:
+                labels.append(label)
+                row_map[label] = i
+        
+        # 空行を含めた並びでチェックサムを取り、行の挿入・削除も検知する
+        checksum = hashlib.sha1("\n".join(data_values).encode("utf-8")).hexdigest()
+        return cls(labels, row_map, checksum)
+    
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        """読み込みから ttl_seconds 以内か"""
+        return time.monotonic() - self.loaded_at < ttl_seconds
+
 
 class SheetsClient:
-    """Google Sheets操作クライアント"""
+    """
+    Google Sheets操作クライアント
+    
+    gspreadは同期APIのため、async関数からは *_async メソッドを使用して
+    スレッドプール上で実行する。
+    """
     
     def __init__(self):
         self._client: Optional[gspread.Client] = None
+        self._client_lock = threading.Lock()
         self._settings = get_settings()
+        
+        # (sheet_id, sheet_name) 単位のキャッシュ
+        self._cache_lock = threading.Lock()
+        self._worksheets: Dict[Tuple[str, str], Tuple[gspread.Worksheet, float]] = {}
+        self._label_indexes: Dict[Tuple[str, str], LabelIndex] = {}
+        # sheet_id 単位の同義語キャッシュ（configシート）
+        self._synonyms: Dict[str, Tuple[Dict[str, List[str]], float]] = {}
     
     def _get_client(self) -> gspread.Client:
-        """gspreadクライアントを取得（遅延初期化）"""
-        if self._client is None:
-            try:
-                # Cloud Run環境ではデフォルト認証を使用
-                credentials, project = default(
-                    scopes=['https://www.googleapis.com/auth/spreadsheets']
-                )
-                self._client = gspread.authorize(credentials)
-                logger.info("Sheets client initialized with default credentials")
-            except Exception as e:
-                logger.error(f"Failed to initialize Sheets client: {e}")
-                raise
-        return self._client
+        """gspreadクライアントを取得（遅延初期化・スレッドセーフ）"""
+        with self._client_lock:
+            if self._client is None:
+                try:
+                    # Cloud Run環境ではデフォルト認証を使用
+                    credentials, project = default(
+                        scopes=['https://www.googleapis.com/auth/spreadsheets']
+                    )
+                    self._client = gspread.authorize(credentials)
+                    logger.info("Sheets client initialized with default credentials")
+                except Exception as e:
+                    logger.error(f"Failed to initialize Sheets client: {e}")
+                    raise
+            return self._client
     
     def get_sheet(self, sheet_id: str, sheet_name: str) -> gspread.Worksheet:
-        """ワークシートを取得"""
+        """ワークシートを取得（ハンドルは SHEETS_WORKSHEET_CACHE_TTL_SECONDS の間キャッシュ）"""
+        key = (sheet_id, sheet_name)
+        now = time.monotonic()
+        
+        with self._cache_lock:
+            cached = self._worksheets.get(key)
+        if cached and now - cached[1] < self._settings.SHEETS_WORKSHEET_CACHE_TTL_SECONDS:
+            return cached[0]
+        
         client = self._get_client()
         spreadsheet = client.open_by_key(sheet_id)
-        return spreadsheet.worksheet(sheet_name)
+        worksheet = spreadsheet.worksheet(sheet_name)
+        
+        with self._cache_lock:
+            self._worksheets[key] = (worksheet, now)
+        return worksheet
     
-    def get_labels(self, sheet_id: str, sheet_name: str) -> List[str]:
-        """A列のラベル一覧を取得（行3以降）"""
-        sheet = self.get_sheet(sheet_id, sheet_name)
+    def get_label_index(
+        self,
+        sheet_id: str,
+        sheet_name: str,
+        refresh: bool = False
+    ) -> LabelIndex:
+        """
+        A列のラベル一覧とラベル→行番号のマッピングを取得
         
-        # A列の全データを取得
-        col_values = sheet.col_values(1)  # 1-indexed
+        キャッシュが SHEETS_LABEL_CACHE_TTL_SECONDS 以内ならA列を読まずに返す。
+        refresh=True の場合は必ずA列を1回読み直す（ジョブ開始時に使用）。
         
-        # 行3以降を返す（index 2以降）
-        start_idx = self._settings.DATA_START_ROW - 1
-        labels = col_values[start_idx:] if len(col_values) > start_idx else []
+        Args:
+            sheet_id: スプレッドシートID
+            sheet_name: シート名
+            refresh: キャッシュを無視して再読み込みするか
         
-        # 空文字を除外
-        return [label for label in labels if label]
+        Returns:
+            LabelIndex
+        """
+        key = (sheet_id, sheet_name)
+        
+        with self._cache_lock:
+            cached = self._label_indexes.get(key)
+        if (
+            cached is not None
+            and not refresh
+            and cached.is_fresh(self._settings.SHEETS_LABEL_CACHE_TTL_SECONDS)
+        ):
+            return cached
+        
+        sheet = self.get_sheet(sheet_id, sheet_name)
+        try:
+            col_values = sheet.col_values(1)  # 1-indexed
+        except gspread.exceptions.APIError:
+            self.invalidate(sheet_id, sheet_name)
+            raise
+        index = LabelIndex.from_column(col_values, self._settings.DATA_START_ROW)
+        
+        if cached is not None and cached.checksum != index.checksum:
+            logger.info(f"Label layout changed in sheet {sheet_name}, cache replaced")
+        
+        with self._cache_lock:
+            self._label_indexes[key] = index
+        return index
+    
+    def get_labels(self, sheet_id: str, sheet_name: str) -> List[str]:
+        """A列のラベル一覧を取得（行3以降）"""
+        return self.get_label_index(sheet_id, sheet_name).labels
     
     def get_label_row_map(self, sheet_id: str, sheet_name: str) -> Dict[str, int]:
         """ラベルと行番号のマッピングを取得"""
-        sheet = self.get_sheet(sheet_id, sheet_name)
-        col_values = sheet.col_values(1)
+        return self.get_label_index(sheet_id, sheet_name).row_map
+    
+    def get_label_synonyms(self, sheet_id: str) -> Dict[str, List[str]]:
+        """
+        configシートの synonyms 列からラベルごとの同義語を取得
         
-        label_map = {}
-        start_row = self._settings.DATA_START_ROW
+        ヘッダー行に `synonyms` 列が無い場合やconfigシートが無い場合は空の辞書。
+        結果は SHEETS_CONFIG_CACHE_TTL_SECONDS の間キャッシュする。
         
-        for i, label in enumerate(col_values[start_row - 1:], start=start_row):
-            if label:
-                label_map[label] = i
+        Args:
+            sheet_id: スプレッドシートID
+        
+        Returns:
+            {label: [同義語, ...]}
+        """
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._synonyms.get(sheet_id)
+        if cached and now - cached[1] < self._settings.SHEETS_CONFIG_CACHE_TTL_SECONDS:
+            return cached[0]
+        
+        synonyms: Dict[str, List[str]] = {}
+        try:
+            sheet = self.get_sheet(sheet_id, self._settings.CONFIG_SHEET_NAME)
+            rows = sheet.get_all_values()
+        except gspread.exceptions.WorksheetNotFound:
+            rows = []
         
-        return label_map
+        if rows:
+            header = [h.strip().lower() for h in rows[0]]
+            if "label" in header and "synonyms" in header:
+                label_col = header.index("label")
+                synonyms_col = header.index("synonyms")
+                for row in rows[1:]:
+                    if len(row) <= max(label_col, synonyms_col):
+                        continue
+                    label = row[label_col].strip()
+                    words = [w.strip() for w in SYNONYM_SEPARATORS.split(row[synonyms_col])]
+                    words = [w for w in words if w]
+                    if label and words:
+                        synonyms[label] = words
+        
+        with self._cache_lock:
+            self._synonyms[sheet_id] = (synonyms, now)
+        return synonyms
+    
+    def invalidate(self, sheet_id: str, sheet_name: str) -> None:
+        """ワークシートハンドルとラベルのキャッシュを破棄"""
+        key = (sheet_id, sheet_name)
+        with self._cache_lock:
+            self._worksheets.pop(key, None)
+            self._label_indexes.pop(key, None)
+        logger.info(f"Sheets cache invalidated: {sheet_name}")
+    
+    def _resolve_row_map(
+        self,
+        sheet_id: str,
+        sheet_name: str,
+        labels: Iterable[str],
+        label_index: Optional[LabelIndex]
+    ) -> Dict[str, int]:
+        """
+        書き込み先の行番号マッピングを取得
+        
+        label_index が SHEETS_LABEL_CACHE_TTL_SECONDS より古い場合は、ジョブ中に行が
+        挿入・削除されていないかA列を読み直して確認する（TTL以内はキャッシュを共有）。
+        見つからないラベルがある場合も行構成が変わった可能性があるため、A列を1回だけ読み直す。
+        """
+        ttl = self._settings.SHEETS_LABEL_CACHE_TTL_SECONDS
+        if label_index is not None and label_index.is_fresh(ttl):
+            index = label_index
+        else:
+            index = self.get_label_index(sheet_id, sheet_name)
+            if label_index is not None and index.checksum != label_index.checksum:
+                logger.warning(
+                    f"Label rows in sheet {sheet_name} changed since the job started, "
+                    f"writing to the current rows"
+                )
+        if all(label in index.row_map for label in labels):
+            return index.row_map
+        
+        fresh = self.get_label_index(sheet_id, sheet_name, refresh=True)
+        return fresh.row_map
+    
+    def _batch_update(self, sheet_id: str, sheet_name: str, updates: List[Dict[str, Any]]) -> None:
+        """バッチ更新（失敗時はキャッシュを破棄して再送出）"""
+        sheet = self.get_sheet(sheet_id, sheet_name)
+        try:
+            sheet.batch_update(updates)
+        except gspread.exceptions.APIError:
+            self.invalidate(sheet_id, sheet_name)
+            raise
     
     def write_audio_results(
         self,
         sheet_id: str,
         sheet_name: str,
-        results: Dict[str, Dict[str, Any]]
+        results: Dict[str, Dict[str, Any]],
+        label_index: Optional[LabelIndex] = None
     ) -> int:
         """
         音声抽出結果をE列（＋J/K列）に書き込み
@@ -83,12 +267,12 @@ class SheetsClient:
             sheet_id: スプレッドシートID
             sheet_name: シート名
             results: {label: {value, confidence, evidence}} 形式の辞書
+            label_index: ジョブ開始時に取得したLabelIndex（TTL以内ならA列の再読み込みを省略）
         
         Returns:
             更新した行数
         """
-        sheet = self.get_sheet(sheet_id, sheet_name)
-        label_row_map = self.get_label_row_map(sheet_id, sheet_name)
+        label_row_map = self._resolve_row_map(sheet_id, sheet_name, results, label_index)
         
         updates = []
         updated_count = 0
@@ -128,7 +312,7 @@ class SheetsClient:
         
         # バッチ更新
         if updates:
-            sheet.batch_update(updates)
+            self._batch_update(sheet_id, sheet_name, updates)
             logger.info(f"Updated {updated_count} rows in sheet")
         
         return updated_count
@@ -150,8 +334,7 @@ class SheetsClient:
         Returns:
             更新した行数
         """
-        sheet = self.get_sheet(sheet_id, sheet_name)
-        label_row_map = self.get_label_row_map(sheet_id, sheet_name)
+        label_row_map = self._resolve_row_map(sheet_id, sheet_name, results, None)
         
         updates = []
         updated_count = 0
@@ -170,10 +353,166 @@ class SheetsClient:
         
         # バッチ更新
         if updates:
-            sheet.batch_update(updates)
+            self._batch_update(sheet_id, sheet_name, updates)
             logger.info(f"Updated {updated_count} rows with Porters data")
         
         return updated_count
+    
+    # ============================================
+    # async アダプタ（スレッドプールで実行・クォータ制御付き）
+    # ============================================
+    
+    async def get_labels_async(self, sheet_id: str, sheet_name: str) -> List[str]:
+        """get_labels の非同期版"""
+        return await call_with_quota(
+            DOWNSTREAM_SHEETS_READ,
+            lambda: run_blocking(self.get_labels, sheet_id, sheet_name)
+        )
+    
+    async def get_label_index_async(
+        self,
+        sheet_id: str,
+        sheet_name: str,
+        refresh: bool = False
+    ) -> LabelIndex:
+        """get_label_index の非同期版"""
+        return await call_with_quota(
+            DOWNSTREAM_SHEETS_READ,
+            lambda: run_blocking(self.get_label_index, sheet_id, sheet_name, refresh)
+        )
+    
+    async def get_label_synonyms_async(self, sheet_id: str) -> Dict[str, List[str]]:
+        """get_label_synonyms の非同期版"""
+        return await call_with_quota(
+            DOWNSTREAM_SHEETS_READ,
+            lambda: run_blocking(self.get_label_synonyms, sheet_id)
+        )
+    
+    async def write_audio_results_async(
+        self,
+        sheet_id: str,
+        sheet_name: str,
+        results: Dict[str, Dict[str, Any]],
+        label_index: Optional[LabelIndex] = None
+    ) -> int:
+        """write_audio_results の非同期版"""
+        return await call_with_quota(
+            DOWNSTREAM_SHEETS_WRITE,
+            lambda: run_blocking(
+                self.write_audio_results, sheet_id, sheet_name, results, label_index
+            )
+        )
+    
+    def create_write_buffer(
+        self,
+        sheet_id: str,
+        sheet_name: str,
+        label_index: Optional[LabelIndex] = None
+    ) -> "AudioResultWriteBuffer":
+        """音声抽出結果の逐次書き込みバッファを作成"""
+        return AudioResultWriteBuffer(self, sheet_id, sheet_name, label_index)
+    
+    async def write_porters_results_async(
+        self,
+        sheet_id: str,
+        sheet_name: str,
+        results: Dict[str, str]
+    ) -> int:
+        """write_porters_results の非同期版"""
+        return await call_with_quota(
+            DOWNSTREAM_SHEETS_WRITE,
+            lambda: run_blocking(self.write_porters_results, sheet_id, sheet_name, results)
+        )
+
+
+class AudioResultWriteBuffer:
+    """
+    音声抽出結果の逐次書き込みバッファ
+    
+    add() で受け取った項目を SHEETS_WRITE_BUFFER_SIZE 件ごと、または
+    SHEETS_WRITE_FLUSH_INTERVAL_SECONDS ごとにまとめてE列（＋J/K列）へ書き込む。
+    書き込みはバックグラウンドで順に行い、add() の呼び出し元（ストリーミング受信）を待たせない。
+    最初の項目は即時に書き込む。書き込みに失敗した項目は write_remaining() で再送する。
+    """
+    
+    def __init__(
+        self,
+        client: "SheetsClient",
+        sheet_id: str,
+        sheet_name: str,
+        label_index: Optional[LabelIndex] = None
+    ):
+        settings = get_settings()
+        self._client = client
+        self._sheet_id = sheet_id
+        self._sheet_name = sheet_name
+        self._label_index = label_index
+        self._batch_size = max(1, settings.SHEETS_WRITE_BUFFER_SIZE)
+        self._interval = settings.SHEETS_WRITE_FLUSH_INTERVAL_SECONDS
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._last_flush = 0.0
+        self._flush_task: Optional[asyncio.Task] = None
+        # 書き込み済みの項目
+        self.written: Dict[str, Dict[str, Any]] = {}
+        self.flushes = 0
+    
+    async def add(self, label: str, data: Dict[str, Any]) -> None:
+        """項目を追加（条件を満たせばバックグラウンドで書き込みを開始）"""
+        self._pending[label] = data
+        due = (
+            len(self._pending) >= self._batch_size
+            or time.monotonic() - self._last_flush >= self._interval
+        )
+        if due and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._flush())
+    
+    async def _flush(self, drain: bool = False) -> None:
+        while self._pending:
+            batch = self._pending
+            self._pending = {}
+            self._last_flush = time.monotonic()
+            try:
+                await self._client.write_audio_results_async(
+                    self._sheet_id, self._sheet_name, batch, self._label_index
+                )
+            except Exception as e:
+                # 失敗分は write_remaining() で最終結果として書き込む
+                logger.warning(f"Progressive sheet write failed ({len(batch)} labels): {e}")
+                return
+            self.written.update(batch)
+            self.flushes += 1
+            if not drain and len(self._pending) < self._batch_size:
+                break
+    
+    async def close(self) -> None:
+        """実行中の書き込みの完了を待ち、残りの項目を書き込む"""
+        if self._flush_task is not None:
+            await self._flush_task
+            self._flush_task = None
+        await self._flush(drain=True)
+    
+    async def write_remaining(self, results: Dict[str, Dict[str, Any]]) -> int:
+        """
+        最終結果のうち未書き込み（または値が異なる）の項目を書き込む
+        
+        Returns:
+            最終結果のうちシートに反映された行数
+        """
+        await self.close()
+        remaining = {
+            label: data for label, data in results.items()
+            if self.written.get(label) != data
+        }
+        written_count = len(results) - len(remaining)
+        if remaining:
+            written_count += await self._client.write_audio_results_async(
+                self._sheet_id, self._sheet_name, remaining, self._label_index
+            )
+        logger.info(
+            f"Sheet write: {len(results) - len(remaining)} labels written progressively "
+            f"in {self.flushes} batches, {len(remaining)} in final write"
+        )
+        return written_count
 
 
 # シングルトンインスタンス
@@ -0,0 +1,252 @@
+"""
+逐次JSONパーサー
+ストリーミング出力されるJSONオブジェクト（配列）から、値が閉じたトップレベルのメンバー（要素）を順に取り出す
+ストリーミング抽出の最初の項目までの時間（time-to-first-field）の統計
+"""
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# パーサーの状態
+_BEFORE_OBJECT = 0   # 最初の "{" を待っている（```json 等の前置きを読み飛ばす）
+_BEFORE_KEY = 1      # キー（または "}"）を待っている
+_IN_KEY = 2
+_BEFORE_COLON = 3
+_BEFORE_VALUE = 4
+_IN_VALUE = 5
+_DONE = 6
+
+
+class _IncrementalParser(ABC):
+    """トップレベルのコンテナ内の値を1つずつ読み取る共通処理"""
+
+    # コンテナの終端文字
+    _close = "}"
+
+    def __init__(self):
+        self._state = _BEFORE_OBJECT
+        self._value_chars: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def _start_value(self, ch: str, members: List[Any]) -> None:
+        self._value_chars = []
+        self._depth = 0
+        self._in_string = False
+        self._state = _IN_VALUE
+        self._consume_value_char(ch, members)
+
+    def _consume_value_char(self, ch: str, members: List[Any]) -> None:
+        if self._in_string:
+            self._value_chars.append(ch)
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if self._depth == 0:
+                    self._emit(members)
+            return
+
+        if self._depth == 0 and (ch == "," or ch == self._close):
+            # スカラー値（数値・true/false/null）の終端
+            self._emit(members)
+            self._state = _DONE if ch == self._close else _BEFORE_KEY
+            return
+
+        self._value_chars.append(ch)
+        if ch == '"':
+            self._in_string = True
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self._emit(members)
+
+    def _emit(self, members: List[Any]) -> None:
+        raw = "".join(self._value_chars).strip()
+        self._value_chars = []
+        if self._state == _IN_VALUE:
+            self._state = _BEFORE_KEY
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.debug(f"Skipping unparsable streamed value: {raw[:50]}")
+            return
+        members.append(self._member(value))
+
+    @abstractmethod
+    def _member(self, value: Any) -> Any:
+        """解析した値から feed() が返すメンバーを作る"""
+
+
+class IncrementalObjectParser(_IncrementalParser):
+    """
+    トップレベルのJSONオブジェクト {"key": value, ...} の逐次パーサー
+
+    feed() にテキスト断片を渡すと、その時点で値が完結したメンバーを
+    (key, value) のリストで返す。値の途中で断片が切れていてもよい。
+    解析できないメンバーは読み飛ばす（最終的な検証は全文の解析で行う）。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._key_chars: List[str] = []
+        self._key = ""
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """テキスト断片を追加し、完結したメンバーを返す"""
+        members: List[Tuple[str, Any]] = []
+        for ch in text:
+            state = self._state
+            if state == _DONE:
+                break
+
+            if state == _BEFORE_OBJECT:
+                if ch == "{":
+                    self._state = _BEFORE_KEY
+
+            elif state == _BEFORE_KEY:
+                if ch == '"':
+                    self._key_chars = ['"']
+                    self._state = _IN_KEY
+                elif ch == "}":
+                    self._state = _DONE
+
+            elif state == _IN_KEY:
+                self._key_chars.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._key = json.loads("".join(self._key_chars))
+                    self._state = _BEFORE_COLON
+
+            elif state == _BEFORE_COLON:
+                if ch == ":":
+                    self._state = _BEFORE_VALUE
+
+            elif state == _BEFORE_VALUE:
+                if not ch.isspace():
+                    self._start_value(ch, members)
+
+            elif state == _IN_VALUE:
+                self._consume_value_char(ch, members)
+
+        return members
+
+    def _member(self, value: Any) -> Tuple[str, Any]:
+        return (self._key, value)
+
+
+class IncrementalArrayParser(_IncrementalParser):
+    """
+    トップレベルのJSON配列 [value, ...] の逐次パーサー
+
+    feed() にテキスト断片を渡すと、その時点で完結した要素のリストを返す。
+    """
+
+    _close = "]"
+
+    def feed(self, text: str) -> List[Any]:
+        """テキスト断片を追加し、完結した要素を返す"""
+        items: List[Any] = []
+        for ch in text:
+            state = self._state
+            if state == _DONE:
+                break
+
+            if state == _BEFORE_OBJECT:
+                if ch == "[":
+                    self._state = _BEFORE_KEY
+
+            elif state == _BEFORE_KEY:
+                # 要素の開始（または区切りの "," / 終端の "]"）を待っている
+                if ch == "]":
+                    self._state = _DONE
+                elif not ch.isspace() and ch != ",":
+                    self._start_value(ch, items)
+
+            elif state == _IN_VALUE:
+                self._consume_value_char(ch, items)
+
+        return items
+
+    def _member(self, value: Any) -> Any:
+        return value
+
+
+class StreamingStats:
+    """ストリーミング抽出の最初の項目までの秒数・全体の秒数（直近 window 件で分位点を計算）"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self.streams = 0
+        self.streams_without_fields = 0
+        self.fields = 0
+        self._first_field_seconds: "deque[float]" = deque(maxlen=window)
+        self._total_seconds: "deque[float]" = deque(maxlen=window)
+
+    def record(self, first_field_seconds: Optional[float], total_seconds: float, fields: int) -> None:
+        with self._lock:
+            self.streams += 1
+            self.fields += fields
+            self._total_seconds.append(total_seconds)
+            if first_field_seconds is None:
+                self.streams_without_fields += 1
+            else:
+                self._first_field_seconds.append(first_field_seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "streams": self.streams,
+                "streams_without_fields": self.streams_without_fields,
+                "fields": self.fields,
+                "time_to_first_field_seconds": _summarize(self._first_field_seconds),
+                "total_seconds": _summarize(self._total_seconds),
+            }
+
+
+def _summarize(samples: "deque[float]") -> Optional[Dict[str, float]]:
+    """平均・p50・p95・最大（サンプルがない場合はNone）"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return {
+        "avg": round(sum(ordered) / len(ordered), 3),
+        "p50": round(ordered[len(ordered) // 2], 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+# プロセス全体の累計（/metrics 用）
+_global_stats = StreamingStats()
+
+
+def record_streamed_extraction(
+    first_field_seconds: Optional[float],
+    total_seconds: float,
+    fields: int
+) -> None:
+    """1回のストリーミング抽出の最初の項目までの秒数（項目がなければNone）・全体の秒数を記録"""
+    _global_stats.record(first_field_seconds, total_seconds, fields)
+
+
+def get_streaming_stats() -> Dict[str, Any]:
+    """ストリーミング抽出の統計"""
+    return _global_stats.to_dict()
@@ -0,0 +1,15 @@
+"""
+トークン数の概算
+レート制御や文字起こしの分割サイズの計算に使用
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    入力トークン数の概算
+
+    日本語等の非ASCII文字は1文字≒1トークン、ASCIIは4文字≒1トークンとして見積もる。
+    """
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    ascii_count = len(text) - non_ascii
+    return non_ascii + ascii_count // 4 + 1
@@ -0,0 +1,117 @@
+"""
+文字起こしキャッシュ
+GCSオブジェクトの内容（md5Hash / generation）と認識設定をキーに文字起こし結果を保存
+"""
+import hashlib
+import json
+import logging
+import time
+from typing import Optional, Dict, Any, Tuple
+
+from .settings import get_settings
+from .executor import run_blocking
+from .gcs_utils import get_object_metadata
+from .cache_store import create_cache_store
+
+logger = logging.getLogger(__name__)
+
+# 保存形式を変更した場合は上げる（旧エントリを自動的に無効化）
+TRANSCRIPT_CACHE_VERSION = 1
+
+
+def make_transcript_cache_key(
+    object_metadata: Dict[str, Any],
+    language_code: str,
+    recognition_options: Dict[str, Any]
+) -> str:
+    """
+    キャッシュキーを生成
+
+    オブジェクトの内容識別子は md5Hash を優先し、無い場合（コンポジット
+    オブジェクト等）は generation を使用する。
+    """
+    content_id = object_metadata.get("md5_hash") or f"gen:{object_metadata.get('generation')}"
+    key_source = {
+        "version": TRANSCRIPT_CACHE_VERSION,
+        "bucket": object_metadata["bucket"],
+        "name": object_metadata["name"],
+        "content": content_id,
+        "language_code": language_code,
+        "recognition": recognition_options,
+    }
+    canonical = json.dumps(key_source, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class TranscriptCache:
+    """文字起こし結果のキャッシュ（TRANSCRIPT_CACHE_BACKEND で保存先を選択）"""
+
+    def __init__(self):
+        settings = get_settings()
+        self._store = create_cache_store("transcripts", settings.TRANSCRIPT_CACHE_BACKEND)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._store is not None
+
+    async def lookup(
+        self,
+        gcs_uri: str,
+        language_code: str,
+        recognition_options: Dict[str, Any]
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        キャッシュを検索
+
+        Returns:
+            (キャッシュキー, キャッシュ値)。キャッシュ無効・メタデータ取得失敗時は (None, None)
+        """
+        if not self.enabled:
+            return None, None
+
+        try:
+            metadata = await run_blocking(get_object_metadata, gcs_uri)
+        except Exception as e:
+            logger.warning(f"Failed to read object metadata for transcript cache: {e}")
+            return None, None
+
+        key = make_transcript_cache_key(metadata, language_code, recognition_options)
+        cached = await self._store.get_async(key)
+        if cached is None:
+            self.misses += 1
+            return key, None
+
+        self.hits += 1
+        logger.info(f"Transcript cache hit: {gcs_uri}")
+        return key, cached
+
+    async def store(self, key: Optional[str], gcs_uri: str, value: Dict[str, Any]) -> None:
+        """文字起こし結果を保存"""
+        if not self.enabled or key is None:
+            return
+        await self._store.put_async(key, {
+            **value,
+            "gcs_uri": gcs_uri,
+            "cached_at": time.time(),
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# シングルトンインスタンス
+_transcript_cache: Optional[TranscriptCache] = None
+
+
+def get_transcript_cache() -> TranscriptCache:
+    """TranscriptCacheのシングルトンインスタンスを取得"""
+    global _transcript_cache
+    if _transcript_cache is None:
+        _transcript_cache = TranscriptCache()
+    return _transcript_cache
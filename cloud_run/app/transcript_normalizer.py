@@ -0,0 +1,213 @@
+"""
+文字起こしの正規化
+抽出前にフィラー・繰り返し・余分な空白を除去し、全角/半角を揃える（正規化後の位置 → 元テキストの位置の対応表を保持）
+"""
+import logging
+import re
+import unicodedata
+from array import array
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILLERS = [
+    "えーと", "えっと", "ええと", "えー", "あのー", "あの", "そのー", "うーん", "うーんと",
+    "あー", "まあ", "まー", "んー",
+]
+
+# 半角カタカナの濁点・半濁点（直前の文字と合わせて正規化する）
+_HALFWIDTH_VOICED_MARKS = "ﾞﾟ"
+# 句読点・空白（フィラーの前後の境界）
+_BOUNDARY = r"\s、。，,．.！？!?「」"
+# 繰り返しをまとめる語句の文字（ひらがな・カタカナ・長音・漢字）
+_JAPANESE_WORD = r"\u3040-\u309f\u30a0-\u30ff\u3400-\u4dbf\u4e00-\u9fff々〆"
+
+
+class NormalizedTranscript:
+    """
+    正規化後のテキストと元テキストの位置の対応表
+
+    offsets[i] は正規化後の i 文字目に対応する元テキストの位置（末尾に len(original) を持つ）。
+    """
+
+    def __init__(self, original: str, text: str, offsets: array):
+        self.original = original
+        self.text = text
+        self.offsets = offsets
+
+    def to_original_span(self, start: int, end: int) -> Tuple[int, int]:
+        """正規化後の範囲 [start, end) に対応する元テキストの範囲"""
+        if end <= start:
+            position = self.offsets[start]
+            return position, position
+        return self.offsets[start], self.offsets[end - 1] + 1
+
+    def original_excerpt(self, quote: str) -> Optional[str]:
+        """正規化後のテキスト中の引用に対応する元テキストの部分（見つからない場合はNone）"""
+        if not quote:
+            return None
+        start = self.text.find(quote)
+        if start < 0:
+            return None
+        original_start, original_end = self.to_original_span(start, start + len(quote))
+        return self.original[original_start:original_end]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "original_chars": len(self.original),
+            "normalized_chars": len(self.text),
+        }
+
+
+def _apply(text: str, offsets: List[int], pieces: List[Tuple[int, int, str]]) -> Tuple[str, List[int]]:
+    """
+    (開始, 終了, 置換文字列) の置換を適用し、対応表も更新
+
+    置換後の文字はすべて置換元の先頭文字の位置に対応させる。
+    """
+    out: List[str] = []
+    out_offsets: List[int] = []
+    position = 0
+    for start, end, replacement in pieces:
+        out.append(text[position:start])
+        out_offsets.extend(offsets[position:start])
+        out.append(replacement)
+        out_offsets.extend([offsets[start]] * len(replacement))
+        position = end
+    out.append(text[position:])
+    out_offsets.extend(offsets[position:len(text)])
+    return "".join(out), out_offsets
+
+
+def _normalize_width(text: str, offsets: List[int]) -> Tuple[str, List[int]]:
+    """NFKC正規化（全角英数字・記号 → 半角、半角カタカナ → 全角）"""
+    out: List[str] = []
+    out_offsets: List[int] = []
+    i = 0
+    while i < len(text):
+        j = i + 1
+        if j < len(text) and text[j] in _HALFWIDTH_VOICED_MARKS:
+            j += 1
+        normalized = unicodedata.normalize("NFKC", text[i:j])
+        out.append(normalized)
+        out_offsets.extend([offsets[i]] * len(normalized))
+        i = j
+    return "".join(out), out_offsets
+
+
+def _is_wide(ch: str) -> bool:
+    return ord(ch) > 127
+
+
+def _collapse_whitespace(
+    text: str,
+    offsets: List[int],
+    join_wide: bool = True
+) -> Tuple[str, List[int]]:
+    """
+    連続する空白を1つにまとめ、先頭・末尾の空白を除去
+
+    join_wide の場合は全角文字に隣接する空白も除去する（日本語の語間の空白）。
+    """
+    pieces = []
+    for match in re.finditer(r"\s+", text):
+        start, end = match.span()
+        run = match.group()
+        if "\n" in run:
+            replacement = "\n"
+        elif start == 0 or end == len(text):
+            replacement = ""
+        elif join_wide and (_is_wide(text[start - 1]) or _is_wide(text[end])):
+            replacement = ""
+        else:
+            replacement = " "
+        if replacement != run:
+            pieces.append((start, end, replacement))
+    return _apply(text, offsets, pieces)
+
+
+def _filler_pattern(fillers: List[str]) -> Optional["re.Pattern[str]"]:
+    words = sorted({f.strip() for f in fillers if f.strip()}, key=len, reverse=True)
+    if not words:
+        return None
+    alternatives = "|".join(re.escape(word) for word in words)
+    # 句読点・空白で区切られたフィラーのみ（「あの人」等の語の一部は除去しない）
+    return re.compile(
+        rf"(?<![^{_BOUNDARY}])(?:{alternatives})[ー～〜]*"
+        rf"(?:[、，,]\s*|\s+|(?=[。．.！？!?」])|$)"
+    )
+
+
+def _remove_fillers(text: str, offsets: List[int], pattern) -> Tuple[str, List[int]]:
+    pieces = [(m.start(), m.end(), "") for m in pattern.finditer(text) if m.end() > m.start()]
+    return _apply(text, offsets, pieces)
+
+
+def _collapse_repeats(text: str, offsets: List[int], min_chars: int) -> Tuple[str, List[int]]:
+    """
+    句読点・空白で区切られた同じ語句（かな・漢字のみ、min_chars 文字以上）の繰り返しを1回にまとめる
+
+    英数字・記号を含む語句（電話番号・メールアドレス・ID・年号等）や、
+    区切りなしで連続する繰り返しはまとめない。
+    """
+    pattern = re.compile(
+        rf"([{_JAPANESE_WORD}]{{{min_chars},20}})(?:[、，,\s]+\1)+"
+    )
+    pieces = [(m.start() + len(m.group(1)), m.end(), "") for m in pattern.finditer(text)]
+    return _apply(text, offsets, pieces)
+
+
+def normalize_transcript(
+    text: str,
+    fillers: Optional[List[str]] = None,
+    collapse_repeats: bool = False,
+    repeat_min_chars: int = 3
+) -> NormalizedTranscript:
+    """
+    文字起こしを正規化
+
+    1. NFKC正規化（全角英数字 → 半角、半角カタカナ → 全角）
+    2. 句読点・空白で区切られたフィラー（えー、あのー等）の除去
+    3. 句読点・空白で区切られた同じ語句（かな・漢字のみ）の繰り返しを1回に（collapse_repeats の場合）
+    4. 空白の整理（全角文字間の空白を除去、連続空白を1つに）
+
+    Args:
+        text: 文字起こしテキスト
+        fillers: 除去するフィラー（省略時は DEFAULT_FILLERS）
+        collapse_repeats: 繰り返しをまとめるか（既定は無効）
+        repeat_min_chars: まとめる繰り返しの最小文字数
+
+    Returns:
+        正規化後のテキストと元テキストの位置の対応表
+    """
+    offsets = list(range(len(text)))
+    normalized, offsets = _normalize_width(text, offsets)
+    # 語間の空白はフィラーの区切りとして使うため、フィラー除去の後で詰める
+    normalized, offsets = _collapse_whitespace(normalized, offsets, join_wide=False)
+
+    pattern = _filler_pattern(DEFAULT_FILLERS if fillers is None else fillers)
+    if pattern is not None:
+        normalized, offsets = _remove_fillers(normalized, offsets, pattern)
+
+    # 繰り返しは空白を区切りとして判定するため、空白を詰める前にまとめる
+    if collapse_repeats:
+        normalized, offsets = _collapse_repeats(normalized, offsets, max(1, repeat_min_chars))
+
+    normalized, offsets = _collapse_whitespace(normalized, offsets)
+
+    offsets.append(len(text))
+    return NormalizedTranscript(text, normalized, array("l", offsets))
+
+
+def restore_field_evidence(data: Dict[str, Any], normalized: NormalizedTranscript) -> Dict[str, Any]:
+    """引用された根拠を元テキストの表記に戻す（正規化後のテキストに見つからない場合はそのまま）"""
+    evidence = data.get("evidence")
+    if not isinstance(evidence, str):
+        return data
+    excerpt = normalized.original_excerpt(evidence)
+    if excerpt is None or excerpt == evidence:
+        return data
+    restored = dict(data)
+    restored["evidence"] = excerpt
+    return restored
+
@@ -0,0 +1,141 @@
+"""
+インメモリキャッシュユーティリティ
+TTL付きLRUキャッシュと、同一キーの同時実行をまとめるシングルフライト
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# キャッシュミスを表す番兵（None をキャッシュ値として扱えるようにする）
+MISSING = object()
+
+
+class TTLCache:
+    """
+    TTL付きLRUキャッシュ（スレッドセーフ）
+
+    maxsize を超えると最も古く参照されたエントリから破棄する。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        """値を取得（無い・期限切れの場合は MISSING）"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or now - item[0] > self.ttl:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """値を格納"""
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """エントリを削除"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """全エントリを削除"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット/ミス件数とサイズ"""
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class LeaderCancelledError(Exception):
+    """まとめた呼び出しを実行していた呼び出し元がキャンセルされた（待機者は再実行する）"""
+
+
+class SingleFlight:
+    """
+    同一キーの同時呼び出しを1回の実行にまとめる
+
+    実行中のキーに対する呼び出しは、同じ結果（または例外）を待つ。
+    実行していた呼び出し元がキャンセルされた場合は、待機者の1つが引き継いで実行する。
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """key が実行中ならその結果を待ち、そうでなければ func() を実行"""
+        waited = False
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                return await self._lead(key, func)
+            if not waited:
+                self.coalesced += 1
+                waited = True
+            try:
+                return await asyncio.shield(future)
+            except LeaderCancelledError:
+                # 最初に再開した待機者が実行を引き継ぎ、残りはその結果を待つ
+                continue
+
+    async def _lead(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            # 待機者にはキャンセルを伝播させず、再実行させる
+            future.set_exception(LeaderCancelledError())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 待機者がいない場合の "exception was never retrieved" を抑止
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def is_inflight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def inflight_count(self) -> int:
+        return len(self._inflight)
+
+
+def cache_stats(cache: Optional[TTLCache], flight: Optional[SingleFlight] = None) -> Dict[str, Any]:
+    """キャッシュとシングルフライトの統計をまとめる"""
+    stats = cache.stats() if cache else {}
+    if flight is not None:
+        stats["coalesced"] = flight.coalesced
+        stats["inflight"] = flight.inflight_count()
+    return stats
@@ -0,0 +1,191 @@
+"""
+音声区間検出（VAD）による無音トリミング
+LINEAR16 PCMから長い無音区間を除去し、圧縮後の時刻→元音声の時刻の対応表を保持する
+"""
+import bisect
+import logging
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_WIDTH = 2  # LINEAR16
+MAX_AMPLITUDE = 32768.0
+
+
+class OffsetMap:
+    """
+    圧縮後音声の時刻 → 元音声の時刻の対応表
+
+    残した区間ごとに (圧縮後の開始サンプル, 元音声の開始サンプル) を保持する。
+    """
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.compact_starts: List[int] = []
+        self.original_starts: List[int] = []
+
+    def add_segment(self, compact_start: int, original_start: int) -> None:
+        self.compact_starts.append(compact_start)
+        self.original_starts.append(original_start)
+
+    def to_original_sample(self, compact_sample: int) -> int:
+        """圧縮後のサンプル位置を元音声のサンプル位置に変換"""
+        i = bisect.bisect_right(self.compact_starts, compact_sample) - 1
+        if i < 0:
+            return compact_sample
+        return self.original_starts[i] + (compact_sample - self.compact_starts[i])
+
+    def to_original(self, compact_seconds: float) -> float:
+        """圧縮後の秒数を元音声の秒数に変換"""
+        sample = int(round(compact_seconds * self.sample_rate))
+        return self.to_original_sample(sample) / self.sample_rate
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "compact_starts": self.compact_starts,
+            "original_starts": self.original_starts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OffsetMap":
+        offset_map = cls(data["sample_rate"])
+        offset_map.compact_starts = list(data["compact_starts"])
+        offset_map.original_starts = list(data["original_starts"])
+        return offset_map
+
+
+class VoiceActivityTrimmer:
+    """
+    フレームエネルギーによる逐次VAD
+
+    feed() にPCMバイト列を順に渡すと、残すべきPCM（モノラル）を返す。
+    min_silence_seconds 以上続く無音は、前後に padding_seconds だけ残して除去する。
+    それより短い無音（発話中の間）はそのまま残す。
+    長い無音の途中はメモリに保持しない。
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        channels: int = 1,
+        threshold_db: float = -45.0,
+        min_silence_seconds: float = 1.0,
+        padding_seconds: float = 0.25,
+        frame_ms: int = 30
+    ):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frame_len = max(1, sample_rate * frame_ms // 1000)
+        self.threshold = MAX_AMPLITUDE * (10 ** (threshold_db / 20))
+        self.pad_frames = max(0, int(padding_seconds * 1000) // frame_ms)
+        self.min_silence_frames = max(
+            2 * self.pad_frames + 1, int(min_silence_seconds * 1000) // frame_ms
+        )
+
+        self.offset_map = OffsetMap(sample_rate)
+        self.input_samples = 0
+        self.output_samples = 0
+
+        self._pending = b""
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self._last_original_end: Optional[int] = None
+        # 直前の発話以降の無音フレームのうち、残すかどうか未確定のもの
+        self._held: "deque[Tuple[int, np.ndarray]]" = deque()
+        self._silence_count = 0
+
+    def feed(self, data: bytes) -> bytes:
+        """
+        PCMバイト列を追加
+
+        Args:
+            data: LINEAR16（リトルエンディアン）のPCM。サンプル境界で切れていなくてよい
+
+        Returns:
+            残すと確定したPCM（モノラル LINEAR16）
+        """
+        data = self._pending + data
+        frame_bytes = SAMPLE_WIDTH * self.channels
+        usable = len(data) - len(data) % frame_bytes
+        self._pending = data[usable:]
+
+        samples = np.frombuffer(data[:usable], dtype="<i2")
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1).astype(np.int16)
+        samples = np.concatenate([self._remainder, samples])
+
+        n_frames = len(samples) // self.frame_len
+        self._remainder = samples[n_frames * self.frame_len:]
+        if n_frames == 0:
+            return b""
+
+        frames = samples[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        rms = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+        voiced = rms > self.threshold
+
+        out: List[np.ndarray] = []
+        for i in range(n_frames):
+            position = self.input_samples
+            self.input_samples += self.frame_len
+            if voiced[i]:
+                self._close_silence(out)
+                self._emit(out, position, frames[i])
+            else:
+                self._add_silence(out, position, frames[i])
+
+        return b"".join(f.astype("<i2").tobytes() for f in out)
+
+    def flush(self) -> bytes:
+        """末尾の無音と端数サンプルを処理"""
+        out: List[np.ndarray] = []
+        if self._silence_count < self.min_silence_frames:
+            self._close_silence(out)
+        if len(self._remainder):
+            self._emit(out, self.input_samples, self._remainder)
+            self.input_samples += len(self._remainder)
+            self._remainder = np.zeros(0, dtype=np.int16)
+        self._pending = b""
+        self._held.clear()
+        self._silence_count = 0
+        return b"".join(f.astype("<i2").tobytes() for f in out)
+
+    def _add_silence(self, out: List[np.ndarray], position: int, frame: np.ndarray) -> None:
+        if self._silence_count < self.pad_frames:
+            # 発話直後の padding は無音の長さによらず残す
+            self._emit(out, position, frame)
+        else:
+            self._held.append((position, frame))
+            if self._silence_count >= self.min_silence_frames:
+                # 長い無音と確定したら、次の発話前の padding 分だけ保持する
+                while len(self._held) > self.pad_frames:
+                    self._held.popleft()
+        self._silence_count += 1
+
+    def _close_silence(self, out: List[np.ndarray]) -> None:
+        """発話の再開時に保持中の無音フレームを出力"""
+        for position, frame in self._held:
+            self._emit(out, position, frame)
+        self._held.clear()
+        self._silence_count = 0
+
+    def _emit(self, out: List[np.ndarray], position: int, frame: np.ndarray) -> None:
+        if self._last_original_end != position:
+            self.offset_map.add_segment(self.output_samples, position)
+        out.append(frame)
+        self.output_samples += len(frame)
+        self._last_original_end = position + len(frame)
+
+    def stats(self) -> Dict[str, Any]:
+        """入力/出力の秒数と削減率"""
+        input_seconds = self.input_samples / self.sample_rate
+        output_seconds = self.output_samples / self.sample_rate
+        return {
+            "input_seconds": round(input_seconds, 3),
+            "output_seconds": round(output_seconds, 3),
+            "saved_seconds": round(input_seconds - output_seconds, 3),
+            "saved_ratio": round(1 - output_seconds / input_seconds, 3) if input_seconds else 0.0,
+            "segments": len(self.offset_map.compact_starts),
+        }
@@ -0,0 +1,494 @@
+"""
+Webhook送信アウトボックス
+SQLiteに送信ペイロードを永続化し、バックグラウンドワーカーが再送・デッドレター管理を行う
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+from .settings import get_settings
+from .executor import run_blocking
+from .idempotency import get_idempotency_cache
+from .log_utils import mask_sensitive_data
+from .webhook_sender import send_webhook, send_slack_notification
+
+logger = logging.getLogger(__name__)
+
+# アウトボックスの状態
+OUTBOX_STATUS_PENDING = "pending"
+OUTBOX_STATUS_IN_FLIGHT = "in_flight"
+OUTBOX_STATUS_DELIVERED = "delivered"
+OUTBOX_STATUS_DEAD_LETTER = "dead_letter"
+
+# インスタンス停止で消えるディレクトリ（Cloud Run の /tmp はメモリ上のファイルシステム）
+EPHEMERAL_DIRS = ("/tmp", "/var/tmp", "/dev/shm")
+
+# 再送しても結果が変わらないステータス（即デッドレター）
+PERMANENT_FAILURE_STATUS_CODES = {400, 401, 403, 404, 405, 410, 413, 422}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_status_code INTEGER,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+CREATE TABLE IF NOT EXISTS dead_letter (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_status_code INTEGER,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    failed_at REAL NOT NULL
+);
+"""
+
+
+def is_ephemeral_path(path: str) -> bool:
+    """インスタンス停止で消えるディレクトリ上のパスか"""
+    resolved = os.path.realpath(path)
+    return any(resolved == d or resolved.startswith(d + os.sep) for d in EPHEMERAL_DIRS)
+
+
+def make_idempotency_key(payload: Dict[str, Any]) -> str:
+    """idempotency_keyが無いペイロード用に内容ハッシュからキーを生成"""
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return "sha256-" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class WebhookOutbox:
+    """
+    SQLiteベースのWebhookアウトボックス
+
+    - idempotency_key で一意（同じキーの再投入は既存行、デッドレター済みならその状態を返す）
+    - ワーカーが期限到来分を取り出して送信し、失敗時はバックオフして再試行
+    - 恒久的な失敗・試行回数超過はデッドレターへ移動
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self._settings = get_settings()
+        self._db_path = db_path or self._settings.OUTBOX_DB_PATH
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_purge = 0.0
+
+    # ============================================
+    # SQLite操作（同期・スレッドプールで実行）
+    # ============================================
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self._db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            logger.info(f"Webhook outbox opened: {self._db_path}")
+        return self._conn
+
+    def _recover(self) -> int:
+        """前回プロセスで送信中のまま残った行を再送対象に戻す"""
+        with self._lock:
+            conn = self._get_conn()
+            cursor = conn.execute(
+                "UPDATE outbox SET status = ?, updated_at = ? WHERE status = ?",
+                (OUTBOX_STATUS_PENDING, time.time(), OUTBOX_STATUS_IN_FLIGHT)
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def _enqueue(self, idempotency_key: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            dead_letter = conn.execute(
+                "SELECT id, attempts, last_status_code FROM dead_letter WHERE idempotency_key = ?",
+                (idempotency_key,)
+            ).fetchone()
+            if dead_letter is not None:
+                # 再登録はせず、再送はデッドレターのリプレイで行う
+                return {
+                    "outbox_id": None,
+                    "dead_letter_id": dead_letter["id"],
+                    "idempotency_key": idempotency_key,
+                    "status": OUTBOX_STATUS_DEAD_LETTER,
+                    "attempts": dead_letter["attempts"],
+                    "last_status_code": dead_letter["last_status_code"],
+                    "replay_path": f"/webhook/dead_letters/{dead_letter['id']}/replay",
+                    "duplicate": True,
+                }
+
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO outbox "
+                "(idempotency_key, payload, status, attempts, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, 0, ?, ?, ?)",
+                (
+                    idempotency_key,
+                    json.dumps(payload, ensure_ascii=False),
+                    OUTBOX_STATUS_PENDING,
+                    now, now, now
+                )
+            )
+            conn.commit()
+            duplicate = cursor.rowcount == 0
+            row = conn.execute(
+                "SELECT id, status, attempts FROM outbox WHERE idempotency_key = ?",
+                (idempotency_key,)
+            ).fetchone()
+
+        return {
+            "outbox_id": row["id"],
+            "idempotency_key": idempotency_key,
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "duplicate": duplicate,
+        }
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """期限到来の1件を取り出して送信中にする"""
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute(
+                "SELECT * FROM outbox WHERE status = ? AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at, id LIMIT 1",
+                (OUTBOX_STATUS_PENDING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE outbox SET status = ?, updated_at = ? WHERE id = ?",
+                (OUTBOX_STATUS_IN_FLIGHT, now, row["id"])
+            )
+            conn.commit()
+            return row
+
+    def _mark_delivered(self, outbox_id: int, attempts: int, status_code: int) -> None:
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, last_status_code = ?, "
+                "last_error = NULL, updated_at = ? WHERE id = ?",
+                (OUTBOX_STATUS_DELIVERED, attempts, status_code, time.time(), outbox_id)
+            )
+            conn.commit()
+
+    def _mark_retry(
+        self,
+        outbox_id: int,
+        attempts: int,
+        status_code: Optional[int],
+        error: str,
+        delay: float
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, "
+                "last_status_code = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                (OUTBOX_STATUS_PENDING, attempts, now + delay, status_code, error, now, outbox_id)
+            )
+            conn.commit()
+
+    def _move_to_dead_letter(
+        self,
+        row: sqlite3.Row,
+        attempts: int,
+        status_code: Optional[int],
+        error: str
+    ) -> None:
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO dead_letter "
+                "(idempotency_key, payload, attempts, last_status_code, last_error, created_at, failed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    row["idempotency_key"], row["payload"], attempts,
+                    status_code, error, row["created_at"], time.time()
+                )
+            )
+            conn.execute("DELETE FROM outbox WHERE id = ?", (row["id"],))
+            conn.commit()
+
+    def _list_dead_letters(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            conn = self._get_conn()
+            rows = conn.execute(
+                "SELECT * FROM dead_letter ORDER BY failed_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+
+        return [
+            {
+                "id": row["id"],
+                "idempotency_key": row["idempotency_key"],
+                "attempts": row["attempts"],
+                "last_status_code": row["last_status_code"],
+                "last_error": row["last_error"],
+                "created_at": row["created_at"],
+                "failed_at": row["failed_at"],
+                "payload": mask_sensitive_data(json.loads(row["payload"])),
+            }
+            for row in rows
+        ]
+
+    def _replay(self, dead_letter_id: int) -> Optional[Dict[str, Any]]:
+        """デッドレターをアウトボックスに戻す"""
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute(
+                "SELECT * FROM dead_letter WHERE id = ?", (dead_letter_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "INSERT OR REPLACE INTO outbox "
+                "(idempotency_key, payload, status, attempts, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, 0, ?, ?, ?)",
+                (row["idempotency_key"], row["payload"], OUTBOX_STATUS_PENDING, now, row["created_at"], now)
+            )
+            conn.execute("DELETE FROM dead_letter WHERE id = ?", (dead_letter_id,))
+            conn.commit()
+
+        return {"idempotency_key": row["idempotency_key"], "status": OUTBOX_STATUS_PENDING}
+
+    def _purge_delivered(self) -> int:
+        """保持期間を過ぎた送信済み行を削除（重複排除の有効期間）"""
+        cutoff = time.time() - self._settings.OUTBOX_DELIVERED_RETENTION_SECONDS
+        with self._lock:
+            conn = self._get_conn()
+            cursor = conn.execute(
+                "DELETE FROM outbox WHERE status = ? AND updated_at < ?",
+                (OUTBOX_STATUS_DELIVERED, cutoff)
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def _counts(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._get_conn()
+            counts = {
+                row["status"]: row["count"]
+                for row in conn.execute(
+                    "SELECT status, COUNT(*) AS count FROM outbox GROUP BY status"
+                ).fetchall()
+            }
+            counts["dead_letter"] = conn.execute(
+                "SELECT COUNT(*) FROM dead_letter"
+            ).fetchone()[0]
+        return counts
+
+    # ============================================
+    # 公開API（async）
+    # ============================================
+
+    async def enqueue(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        ペイロードをアウトボックスに登録
+
+        Args:
+            payload: 送信するJSONペイロード（idempotency_keyが無い場合は内容から生成）
+
+        Returns:
+            {outbox_id, idempotency_key, status, attempts, duplicate}
+            （デッドレター済みのキーは status="dead_letter" と dead_letter_id, replay_path）
+        """
+        idempotency_key = payload.get("idempotency_key") or make_idempotency_key(payload)
+        payload = {**payload, "idempotency_key": idempotency_key}
+
+        result = await run_blocking(self._enqueue, idempotency_key, payload)
+        if result["status"] == OUTBOX_STATUS_DEAD_LETTER:
+            logger.warning(
+                f"[AUDIT] Webhook already dead-lettered - idempotency_key={idempotency_key}, "
+                f"replay via {result['replay_path']}"
+            )
+        elif result["duplicate"]:
+            logger.info(f"[AUDIT] Webhook already queued - idempotency_key={idempotency_key}")
+        else:
+            logger.info(f"[AUDIT] Webhook queued - idempotency_key={idempotency_key}")
+            if self._wakeup:
+                self._wakeup.set()
+        return result
+
+    async def list_dead_letters(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """デッドレター一覧（ペイロードはマスキング済み）"""
+        return await run_blocking(self._list_dead_letters, limit)
+
+    async def replay_dead_letter(self, dead_letter_id: int) -> Optional[Dict[str, Any]]:
+        """デッドレターを再送キューに戻す（存在しない場合はNone）"""
+        result = await run_blocking(self._replay, dead_letter_id)
+        if result:
+            get_idempotency_cache().invalidate(result["idempotency_key"])
+            logger.info(f"[AUDIT] Dead letter replayed - idempotency_key={result['idempotency_key']}")
+            if self._wakeup:
+                self._wakeup.set()
+        return result
+
+    async def get_stats(self) -> Dict[str, int]:
+        """状態別の件数"""
+        return await run_blocking(self._counts)
+
+    # ============================================
+    # ワーカー
+    # ============================================
+
+    async def start(self) -> None:
+        """送信ワーカーを起動"""
+        if self._workers:
+            return
+
+        if is_ephemeral_path(self._db_path):
+            logger.warning(
+                f"OUTBOX_DB_PATH={self._db_path} is on an ephemeral filesystem; "
+                f"queued webhooks and dead letters are lost when the instance stops. "
+                f"Set OUTBOX_DB_PATH to a mounted volume."
+            )
+
+        recovered = await run_blocking(self._recover)
+        if recovered:
+            logger.info(f"Recovered {recovered} in-flight webhook(s) from previous run")
+
+        self._wakeup = asyncio.Event()
+        worker_count = max(1, self._settings.OUTBOX_WORKER_COUNT)
+        for i in range(worker_count):
+            self._workers.append(asyncio.create_task(self._worker(i)))
+        logger.info(f"Webhook outbox started: workers={worker_count}")
+
+    async def stop(self) -> None:
+        """送信ワーカーを停止（送信中の行は次回起動時に再送）"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+        logger.info("Webhook outbox stopped")
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            try:
+                row = await run_blocking(self._claim)
+                if row is None:
+                    await self._idle()
+                    continue
+                await self._deliver(row)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox worker {worker_id} error: {e}")
+                await asyncio.sleep(self._settings.OUTBOX_POLL_INTERVAL_SECONDS)
+
+    async def _idle(self) -> None:
+        """新規登録またはポーリング間隔まで待機"""
+        if time.monotonic() - self._last_purge > 3600:
+            self._last_purge = time.monotonic()
+            purged = await run_blocking(self._purge_delivered)
+            if purged:
+                logger.info(f"Purged {purged} delivered webhook(s) from outbox")
+
+        try:
+            await asyncio.wait_for(
+                self._wakeup.wait(),
+                timeout=self._settings.OUTBOX_POLL_INTERVAL_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    def _backoff(self, attempts: int) -> float:
+        base = self._settings.OUTBOX_BASE_BACKOFF_SECONDS * (2 ** (attempts - 1))
+        delay = min(self._settings.OUTBOX_MAX_BACKOFF_SECONDS, base)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _deliver(self, row: sqlite3.Row) -> None:
+        payload = json.loads(row["payload"])
+        attempts = row["attempts"] + 1
+        idempotency_key = row["idempotency_key"]
+
+        try:
+            result = await send_webhook(payload=payload)
+        except Exception as e:
+            result = {"status_code": 0, "success": False, "error": str(e)}
+
+        status_code = result.get("status_code") or None
+        if result.get("success"):
+            await run_blocking(self._mark_delivered, row["id"], attempts, status_code)
+            return
+
+        error = str(result.get("error", result.get("response_preview", "unknown")))[:500]
+        permanent = status_code in PERMANENT_FAILURE_STATUS_CODES
+        if permanent or attempts >= self._settings.OUTBOX_MAX_ATTEMPTS:
+            await run_blocking(self._move_to_dead_letter, row, attempts, status_code, error)
+            # キャッシュ済みの「登録済み」応答ではなくデッドレターの状態を返すようにする
+            get_idempotency_cache().invalidate(idempotency_key)
+            logger.error(
+                f"[AUDIT] Webhook moved to dead letter - "
+                f"idempotency_key={idempotency_key}, attempts={attempts}, "
+                f"status={status_code}"
+            )
+            await self._notify_dead_letter(payload, attempts, status_code, error)
+            return
+
+        delay = self._backoff(attempts)
+        await run_blocking(self._mark_retry, row["id"], attempts, status_code, error, delay)
+        logger.warning(
+            f"[AUDIT] Webhook delivery failed, retrying in {delay:.0f}s - "
+            f"idempotency_key={idempotency_key}, attempts={attempts}, status={status_code}"
+        )
+
+    async def _notify_dead_letter(
+        self,
+        payload: Dict[str, Any],
+        attempts: int,
+        status_code: Optional[int],
+        error: str
+    ) -> None:
+        try:
+            await send_slack_notification(
+                message=f"⚠️ Webhook送信エラー（デッドレター）\n"
+                        f"Record ID: {payload.get('record_id')}\n"
+                        f"Attempts: {attempts}\n"
+                        f"Status: {status_code or 'unknown'}\n"
+                        f"Error: {error[:200]}"
+            )
+        except Exception as slack_error:
+            logger.warning(f"Slack notification failed: {slack_error}")
+
+
+# シングルトンインスタンス
+_webhook_outbox: Optional[WebhookOutbox] = None
+
+
+def get_webhook_outbox() -> WebhookOutbox:
+    """WebhookOutboxのシングルトンインスタンスを取得"""
+    global _webhook_outbox
+    if _webhook_outbox is None:
+        _webhook_outbox = WebhookOutbox()
+    return _webhook_outbox
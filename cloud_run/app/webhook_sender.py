@@ -6,27 +6,32 @@ import logging
 from typing import Dict, Any, Optional
 
 import httpx
-from google.cloud import secretmanager
 
 from .settings import get_settings
 from .log_utils import safe_log_dict
+from .secret_provider import get_secret_provider
+from .http_client import (
+    get_http_client,
+    get_timeout,
+    TIMEOUT_PROFILE_WEBHOOK,
+    TIMEOUT_PROFILE_SLACK,
+)
+from .rate_limit import call_with_quota, DOWNSTREAM_WEBHOOK
 
 logger = logging.getLogger(__name__)
 
+# 受信側が明示的に「後で再送」を求めるステータス（送達済みの可能性がないもの）
+WEBHOOK_RETRY_STATUS_CODES = {429, 503}
+
 
 def get_secret(secret_name: str) -> str:
-    """Secret Managerからシークレットを取得"""
-    settings = get_settings()
-    
-    client = secretmanager.SecretManagerServiceClient()
-    name = f"projects/{settings.GCP_PROJECT}/secrets/{secret_name}/versions/latest"
-    
-    try:
-        response = client.access_secret_version(request={"name": name})
-        return response.payload.data.decode("UTF-8")
-    except Exception as e:
-        logger.error(f"Failed to get secret {secret_name}: {e}")
-        raise
+    """Secret Managerからシークレットを取得（キャッシュ経由）"""
+    return get_secret_provider().get(secret_name)
+
+
+async def get_secret_async(secret_name: str) -> str:
+    """Secret Managerからシークレットを取得（キャッシュ経由・非同期版）"""
+    return await get_secret_provider().get_async(secret_name)
 
 
 async def send_webhook(payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -54,12 +59,12 @@ async def send_webhook(payload: Dict[str, Any]) -> Dict[str, Any]:
     )
     
     # Secret ManagerからURL/Tokenを取得
-    webhook_url = get_secret(settings.WEBHOOK_URL_SECRET_NAME)
+    webhook_url = await get_secret_async(settings.WEBHOOK_URL_SECRET_NAME)
     
     # Tokenは任意
     webhook_token: Optional[str] = None
     try:
-        webhook_token = get_secret(settings.WEBHOOK_TOKEN_SECRET_NAME)
+        webhook_token = await get_secret_async(settings.WEBHOOK_TOKEN_SECRET_NAME)
     except Exception:
         logger.info("Webhook token not configured, proceeding without auth")
     
@@ -79,67 +84,80 @@ async def send_webhook(payload: Dict[str, Any]) -> Dict[str, Any]:
             headers["Authorization"] = f"Bearer {webhook_token}"
     
     # HTTPリクエスト送信
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    client = get_http_client()
+    
+    async def post() -> httpx.Response:
+        response = await client.post(
+            webhook_url,
+            json=payload,
+            headers=headers,
+            timeout=get_timeout(TIMEOUT_PROFILE_WEBHOOK)
+        )
+        if response.status_code in WEBHOOK_RETRY_STATUS_CODES:
+            # リトライ層で Retry-After を考慮して再送させる
+            response.raise_for_status()
+        return response
+    
+    try:
         try:
-            response = await client.post(
-                webhook_url,
-                json=payload,
-                headers=headers
-            )
-            
-            response_body = ""
-            try:
-                response_body = response.text[:500]  # 最初の500文字
-            except Exception:
-                pass
-            
-            result = {
-                "status_code": response.status_code,
-                "success": response.is_success,
-                "response_preview": response_body
-            }
-            
-            if response.is_success:
-                logger.info(
-                    f"[AUDIT] Webhook sent successfully - "
-                    f"record_id={record_id}, "
-                    f"status={response.status_code}, "
-                    f"idempotency_key={idempotency_key}"
-                )
-            else:
-                logger.warning(
-                    f"[AUDIT] Webhook failed - "
-                    f"record_id={record_id}, "
-                    f"status={response.status_code}, "
-                    f"idempotency_key={idempotency_key}, "
-                    f"error={response_body[:200]}"
-                )
-            
-            return result
-            
-        except httpx.TimeoutException:
-            logger.error(
-                f"[AUDIT] Webhook timeout - "
+            response = await call_with_quota(DOWNSTREAM_WEBHOOK, post)
+        except httpx.HTTPStatusError as e:
+            # リトライ上限到達: 最後のレスポンスで結果を返す
+            response = e.response
+        
+        response_body = ""
+        try:
+            response_body = response.text[:500]  # 最初の500文字
+        except Exception:
+            pass
+        
+        result = {
+            "status_code": response.status_code,
+            "success": response.is_success,
+            "response_preview": response_body
+        }
+        
+        if response.is_success:
+            logger.info(
+                f"[AUDIT] Webhook sent successfully - "
                 f"record_id={record_id}, "
+                f"status={response.status_code}, "
                 f"idempotency_key={idempotency_key}"
             )
-            return {
-                "status_code": 0,
-                "success": False,
-                "error": "Request timed out"
-            }
-        except httpx.RequestError as e:
-            logger.error(
-                f"[AUDIT] Webhook error - "
+        else:
+            logger.warning(
+                f"[AUDIT] Webhook failed - "
                 f"record_id={record_id}, "
+                f"status={response.status_code}, "
                 f"idempotency_key={idempotency_key}, "
-                f"error={str(e)}"
+                f"error={response_body[:200]}"
             )
-            return {
-                "status_code": 0,
-                "success": False,
-                "error": str(e)
-            }
+        
+        return result
+        
+    except httpx.TimeoutException:
+        logger.error(
+            f"[AUDIT] Webhook timeout - "
+            f"record_id={record_id}, "
+            f"idempotency_key={idempotency_key}"
+        )
+        return {
+            "status_code": 0,
+            "success": False,
+            "error": "Request timed out"
+        }
+    except httpx.RequestError as e:
+        logger.error(
+            f"[AUDIT] Webhook error - "
+            f"record_id={record_id}, "
+            f"idempotency_key={idempotency_key}, "
+            f"error={str(e)}"
+        )
+        return {
+            "status_code": 0,
+            "success": False,
+            "error": str(e)
+        }
 
 
 async def send_slack_notification(
@@ -169,30 +187,31 @@ async def send_slack_notification(
     if channel:
         payload["channel"] = channel
     
-    # Slack Webhook URLを取得（別のシークレット名を使用する場合は調整）
+    # Slack Webhook URLを取得
     settings = get_settings()
     
     try:
-        slack_webhook_url = get_secret("slack-webhook-url")
+        slack_webhook_url = await get_secret_async(settings.SLACK_WEBHOOK_URL_SECRET_NAME)
     except Exception:
         logger.warning("Slack webhook URL not configured")
         return {"success": False, "error": "Slack webhook not configured"}
     
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            response = await client.post(
-                slack_webhook_url,
-                json=payload
-            )
-            
-            return {
-                "status_code": response.status_code,
-                "success": response.is_success
-            }
-            
-        except Exception as e:
-            logger.error(f"Slack notification error: {e}")
-            return {
-                "success": False,
-                "error": str(e)
-            }
+    client = get_http_client()
+    try:
+        response = await client.post(
+            slack_webhook_url,
+            json=payload,
+            timeout=get_timeout(TIMEOUT_PROFILE_SLACK)
+        )
+        
+        return {
+            "status_code": response.status_code,
+            "success": response.is_success
+        }
+        
+    except Exception as e:
+        logger.error(f"Slack notification error: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
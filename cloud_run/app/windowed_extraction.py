@@ -0,0 +1,185 @@
+"""
+長い文字起こしのウィンドウ分割抽出（map-reduce）
+文字起こしを重なりのあるウィンドウに分割して並列に抽出し、ラベルごとに確信度の最も高い結果を採用
+"""
+import asyncio
+import logging
+import re
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+from .token_utils import estimate_tokens
+from .extraction_cache import PartialExtractionResult, get_failed_labels
+from .segments import has_segment_numbers, segment_prefix
+
+logger = logging.getLogger(__name__)
+
+ExtractionResult = Dict[str, Dict[str, Any]]
+# (transcript, labels, metadata) -> 抽出結果
+ExtractFunc = Callable[[str, List[str], Optional[Dict[str, Any]]], Awaitable[ExtractionResult]]
+
+# 文の区切り（句点・疑問符・感嘆符・改行）
+_SENTENCE_END = re.compile(r"(?<=[。！？!?\n])")
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    文単位に分割（区切り文字は前の文に含める）
+
+    区間番号付きのテキストは行（区間）単位に分割し、各単位が "[番号] " で始まるようにする。
+    """
+    if has_segment_numbers(text):
+        return text.splitlines(keepends=True)
+    return [s for s in _SENTENCE_END.split(text) if s]
+
+
+def _split_long_sentence(sentence: str, window_tokens: int) -> List[str]:
+    """1文がウィンドウに収まらない場合は文字数で分割"""
+    pieces = []
+    start = 0
+    tokens = 0.0
+    for i, ch in enumerate(sentence):
+        # estimate_tokens と同じ重み（非ASCII=1, ASCII=1/4）
+        cost = 1.0 if ord(ch) > 127 else 0.25
+        if i > start and tokens + cost > window_tokens - 1:
+            pieces.append(sentence[start:i])
+            start, tokens = i, 0.0
+        tokens += cost
+    pieces.append(sentence[start:])
+    return pieces
+
+
+def split_transcript_windows(
+    transcript: str,
+    window_tokens: int,
+    overlap_tokens: int = 0
+) -> List[str]:
+    """
+    文字起こしを文の境界で重なりのあるウィンドウに分割
+
+    各ウィンドウは概算で window_tokens 以下。次のウィンドウは直前のウィンドウ末尾の
+    overlap_tokens 程度の文から始まる（境界をまたぐ発話の取りこぼし防止）。
+
+    Args:
+        transcript: 文字起こしテキスト
+        window_tokens: 1ウィンドウのトークン数上限
+        overlap_tokens: ウィンドウ間で重複させるトークン数
+
+    Returns:
+        ウィンドウのリスト（入力が上限以下なら1要素）
+    """
+    if estimate_tokens(transcript) <= window_tokens:
+        return [transcript]
+
+    sentences: List[str] = []
+    for sentence in split_sentences(transcript):
+        if estimate_tokens(sentence) > window_tokens:
+            pieces = _split_long_sentence(sentence, window_tokens)
+            # 区間の途中から始まる断片にも同じ区間番号を付ける
+            prefix = segment_prefix(sentence)
+            sentences.append(pieces[0])
+            sentences.extend(prefix + piece for piece in pieces[1:])
+        else:
+            sentences.append(sentence)
+
+    windows: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for sentence in sentences:
+        tokens = estimate_tokens(sentence)
+        if current and current_tokens + tokens > window_tokens:
+            windows.append("".join(current))
+            # 末尾から overlap_tokens 分の文を次のウィンドウに引き継ぐ
+            carried: List[str] = []
+            carried_tokens = 0
+            for previous in reversed(current):
+                previous_tokens = estimate_tokens(previous)
+                if carried_tokens + previous_tokens > overlap_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous_tokens
+            if carried_tokens + tokens > window_tokens:
+                carried, carried_tokens = [], 0
+            current, current_tokens = carried, carried_tokens
+        current.append(sentence)
+        current_tokens += tokens
+
+    if current:
+        windows.append("".join(current))
+    return windows
+
+
+def _rank(entry: Dict[str, Any]) -> tuple:
+    """採用順位（確信度 → 値の有無 → 根拠の有無）"""
+    try:
+        confidence = float(entry.get("confidence") or 0.0)
+    except (TypeError, ValueError):
+        confidence = 0.0
+    return (confidence, entry.get("value") is not None, bool(entry.get("evidence")))
+
+
+def reduce_window_results(window_results: List[ExtractionResult]) -> ExtractionResult:
+    """
+    ウィンドウごとの抽出結果をラベル単位でまとめる
+
+    ラベルごとに確信度の最も高い結果（値・根拠を含む）を採用する。
+    同順位の場合は値があるもの、根拠があるもの、先のウィンドウの順に優先する。
+    入力の順序のみに依存し、同じ入力からは常に同じ結果になる。
+
+    Args:
+        window_results: ウィンドウ順の抽出結果
+
+    Returns:
+        {label: {value, confidence, evidence}}
+    """
+    reduced: ExtractionResult = {}
+    best_rank: Dict[str, tuple] = {}
+    for result in window_results:
+        for label, entry in result.items():
+            rank = _rank(entry)
+            if label not in reduced or rank > best_rank[label]:
+                reduced[label] = entry
+                best_rank[label] = rank
+    return reduced
+
+
+async def extract_windowed(
+    transcript: str,
+    labels: List[str],
+    metadata: Optional[Dict[str, Any]],
+    extract: ExtractFunc,
+    window_tokens: int,
+    overlap_tokens: int = 0,
+    concurrency: int = 4
+) -> ExtractionResult:
+    """
+    ウィンドウごとに並列に抽出し、ラベル単位で reduce
+
+    Args:
+        transcript: 文字起こしテキスト
+        labels: 抽出する項目のラベル一覧
+        metadata: メタデータ
+        extract: 1ウィンドウ分の抽出関数（テスト時は偽のモデルを渡せる）
+        window_tokens: 1ウィンドウのトークン数上限
+        overlap_tokens: ウィンドウ間で重複させるトークン数
+        concurrency: 同時に抽出するウィンドウ数
+
+    Returns:
+        {label: {value, confidence, evidence}}
+    """
+    windows = split_transcript_windows(transcript, window_tokens, overlap_tokens)
+    logger.info(f"Windowed extraction: {len(windows)} windows (<= {window_tokens} tokens each)")
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(window: str) -> ExtractionResult:
+        async with semaphore:
+            return await extract(window, labels, metadata)
+
+    window_results = await asyncio.gather(*(run(window) for window in windows))
+
+    reduced = reduce_window_results(window_results)
+    if any(isinstance(result, PartialExtractionResult) for result in window_results):
+        # 失敗したウィンドウに値があった可能性があるため、他のウィンドウの結果も確定扱いしない
+        failed_labels = set().union(*(get_failed_labels(result) for result in window_results))
+        return PartialExtractionResult(reduced, failed_labels)
+    return reduced
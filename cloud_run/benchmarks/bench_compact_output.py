@@ -0,0 +1,113 @@
+"""
+抽出結果の出力形式（json / compact）の計測
+同じ内容の記録済みレスポンス（100ラベル）を両形式で再生し、出力トークン数（概算）・解析時間・
+モデルの出力速度から見積もった応答時間を比較する
+
+    cd cloud_run
+    python benchmarks/bench_compact_output.py --labels 100 --ms-per-output-token 15
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.extract_schema import (  # noqa: E402
+    create_extraction_system_prompt,
+    parse_extraction_response,
+)
+from app.streaming_json import IncrementalArrayParser, IncrementalObjectParser  # noqa: E402
+from app.token_utils import estimate_tokens  # noqa: E402
+
+LABEL_NAMES = [
+    "氏名", "フリガナ", "生年月日", "現住所", "最寄り駅", "電話番号", "メールアドレス", "最終学歴",
+    "現在の年収", "希望年収", "希望勤務地", "入社可能日", "転職理由", "現職の業務内容", "保有資格",
+]
+VALUES = ["山田太郎", "600万円", "東京都港区", "2025年4月以降", "キャリアアップのため", None, "普通自動車免許"]
+EVIDENCE = ["現在の年収は600万円くらいです", "4月以降なら入社できます", "東京か大阪で働きたいです", ""]
+
+
+def build_recorded_fields(count: int, seed: int) -> list:
+    """記録済みレスポンスの内容 [(label, {value, confidence, evidence}), ...]"""
+    rng = random.Random(seed)
+    fields = []
+    for i in range(count):
+        label = f"{LABEL_NAMES[i % len(LABEL_NAMES)]}{i // len(LABEL_NAMES) or ''}"
+        value = rng.choice(VALUES)
+        fields.append((label, {
+            "value": value,
+            "confidence": round(rng.uniform(0.5, 1.0), 2) if value is not None else 0.0,
+            "evidence": rng.choice(EVIDENCE) if value is not None else "",
+        }))
+    return fields
+
+
+def render_json(fields: list) -> str:
+    return json.dumps(dict(fields), ensure_ascii=False, indent=2)
+
+
+def render_compact(fields: list) -> str:
+    rows = [
+        [i, data["value"], data["confidence"], data["evidence"]]
+        for i, (_, data) in enumerate(fields, start=1)
+        if data["value"] is not None
+    ]
+    return "[\n" + ",\n".join(json.dumps(row, ensure_ascii=False) for row in rows) + "\n]"
+
+
+def time_ms(func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def stream_parse(text: str, parser_class, chunk_chars: int = 16) -> int:
+    """ストリーミング時と同じく断片ごとに逐次パーサーへ渡す"""
+    parser = parser_class()
+    members = 0
+    for i in range(0, len(text), chunk_chars):
+        members += len(parser.feed(text[i:i + chunk_chars]))
+    return members
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--labels", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--ms-per-output-token", type=float, default=15.0)
+    parser.add_argument("--first-token-ms", type=float, default=800.0)
+    args = parser.parse_args()
+
+    fields = build_recorded_fields(args.labels, args.seed)
+    labels = [label for label, _ in fields]
+    expected = {label: data for label, data in fields if data["value"] is not None}
+
+    formats = (
+        ("json", render_json(fields), False, IncrementalObjectParser),
+        ("compact", render_compact(fields), True, IncrementalArrayParser),
+    )
+    print(f"labels={len(labels)} (values={len(expected)})")
+    for name, response_text, compact, parser_class in formats:
+        parsed = parse_extraction_response(response_text, labels)
+        extracted = {label: data for label, data in parsed.items() if data["value"] is not None}
+        assert extracted == expected, f"{name}: decoded result differs from recorded fields"
+
+        system_tokens = estimate_tokens(create_extraction_system_prompt(labels, compact))
+        output_tokens = estimate_tokens(response_text)
+        parse_ms = time_ms(lambda: parse_extraction_response(response_text, labels), args.repeat)
+        stream_ms = time_ms(lambda: stream_parse(response_text, parser_class), args.repeat)
+        latency_ms = args.first_token_ms + output_tokens * args.ms_per_output_token + parse_ms
+        print(
+            f"{name:<8} system_tokens~{system_tokens:<6} output_tokens~{output_tokens:<6} "
+            f"parse={parse_ms:.3f}ms stream_parse={stream_ms:.3f}ms "
+            f"simulated_latency={latency_ms / 1000:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+GCS範囲読み込みのピークメモリ計測
+オブジェクト全体を download_as_bytes する場合と iter_object_range で順に読む場合のピークメモリ（tracemalloc）を比較する
+
+    cd cloud_run
+    python benchmarks/bench_gcs_range.py --size-mb 512
+    # 実際のオブジェクトで計測する場合（要認証）
+    python benchmarks/bench_gcs_range.py --gcs-uri gs://bucket/audio.wav
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import gcs_utils  # noqa: E402
+from app.executor import run_blocking, shutdown_executor  # noqa: E402
+
+MB = 1024 * 1024
+
+
+class _FakeBlob:
+    """範囲読み込みのたびに内容を生成するオブジェクト（本体をメモリに持たない）"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.generation = 1
+
+    def download_as_bytes(self, start: int = 0, end=None, if_generation_match=None) -> bytes:
+        end = self.size - 1 if end is None else end
+        return bytes(end - start + 1)
+
+
+def _measure(label: str, func) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    digest = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} peak={peak / MB:8.1f}MB time={elapsed:.2f}s sha256={digest[:12]}")
+
+
+def _full_download(gcs_uri: str) -> str:
+    blob = gcs_utils.get_existing_blob(gcs_uri)
+    return hashlib.sha256(blob.download_as_bytes()).hexdigest()
+
+
+def _ranged_read(gcs_uri: str, chunk_size: int, concurrency: int) -> str:
+    async def consume() -> str:
+        digest = hashlib.sha256()
+        async for data in gcs_utils.iter_object_range(
+            gcs_uri, chunk_size=chunk_size, concurrency=concurrency
+        ):
+            await run_blocking(digest.update, data)
+        return digest.hexdigest()
+
+    return asyncio.run(consume())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--gcs-uri", help="計測するオブジェクト（省略時は生成したデータ）")
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--chunk-mb", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    gcs_uri = args.gcs_uri
+    if gcs_uri is None:
+        fake = _FakeBlob(args.size_mb * MB)
+        gcs_utils.get_existing_blob = lambda uri: fake
+        gcs_uri = "gs://bench/object"
+        print(f"object: generated {args.size_mb}MB")
+    else:
+        print(f"object: {gcs_uri}")
+
+    try:
+        _measure("download_as_bytes", lambda: _full_download(gcs_uri))
+        _measure(
+            f"iter_object_range x{args.concurrency}",
+            lambda: _ranged_read(gcs_uri, args.chunk_mb * MB, args.concurrency),
+        )
+    finally:
+        shutdown_executor()
+
+
+if __name__ == "__main__":
+    main()
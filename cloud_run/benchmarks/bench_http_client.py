@@ -0,0 +1,108 @@
+"""
+共有HTTPクライアントの計測
+リクエストごとに httpx.AsyncClient を作る場合と、共有クライアント（コネクション再利用）の場合の
+レイテンシと新規接続数を比較する
+
+    cd cloud_run
+    python benchmarks/bench_http_client.py --requests 200
+    # TLSを含めて計測する場合は実際のエンドポイントを指定（新規接続数はローカルサーバーのみ）
+    python benchmarks/bench_http_client.py --url https://example.com/ --requests 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.http_client import close_http_client, get_http_client  # noqa: E402
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_local_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def _per_request_client(url: str, payload: dict) -> None:
+    async with httpx.AsyncClient() as client:
+        (await client.post(url, json=payload)).raise_for_status()
+
+
+async def _shared_client(url: str, payload: dict) -> None:
+    (await get_http_client().post(url, json=payload)).raise_for_status()
+
+
+async def _measure(send, url: str, requests: int) -> list:
+    payload = {"record_id": "bench", "fields": [{"label": "氏名", "value": "山田太郎"}]}
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        await send(url, payload)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def _report(name: str, latencies: list, connections) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    connections_text = f" new_connections={connections}" if connections is not None else ""
+    print(
+        f"{name:<18} p50={statistics.median(ordered):.2f}ms p95={p95:.2f}ms "
+        f"mean={statistics.mean(ordered):.2f}ms{connections_text}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="送信先（省略時はローカルのHTTPサーバー）")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = _start_local_server()
+        url = f"http://127.0.0.1:{server.server_address[1]}/webhook"
+
+    try:
+        for name, send in (("per-request client", _per_request_client), ("shared client", _shared_client)):
+            before = _Handler.connections
+            latencies = await _measure(send, url, args.requests)
+            _report(name, latencies, _Handler.connections - before if server else None)
+    finally:
+        await close_http_client()
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
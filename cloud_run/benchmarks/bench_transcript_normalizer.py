@@ -0,0 +1,75 @@
+"""
+文字起こし正規化の計測
+面談の発話を模した合成コーパスで、正規化前後の文字数・推定トークン数と正規化の所要時間を比較する
+
+    cd cloud_run
+    python benchmarks/bench_transcript_normalizer.py --transcripts 50 --sentences 400
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.token_utils import estimate_tokens  # noqa: E402
+from app.transcript_normalizer import normalize_transcript  # noqa: E402
+
+FILLERS = ["えー、", "えっと、", "あのー ", "まあ、", "うーん、", ""]
+SENTENCES = [
+    "現在の年収は ６００万円 くらいです。",
+    "転職理由は、転職理由は キャリアアップです。",
+    "希望勤務地は東京か大阪です。",
+    "入社可能日は２０２５年４月以降になります。",
+    "連絡先は 090-1212-1212 で、メールは abcabc@example.com です。",
+    "マネジメント経験は 3 年ほどあります。",
+    "そうですね そうですね、リモートワークを希望しています。",
+    "前職では営業部、営業部長をしていました。",
+]
+
+
+def build_corpus(transcripts: int, sentences: int, seed: int) -> list:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(transcripts):
+        lines = [rng.choice(FILLERS) + rng.choice(SENTENCES) for _ in range(sentences)]
+        corpus.append("\n".join(lines))
+    return corpus
+
+
+def measure(corpus: list, collapse_repeats: bool) -> dict:
+    chars = tokens = 0
+    started = time.perf_counter()
+    for text in corpus:
+        normalized = normalize_transcript(text, collapse_repeats=collapse_repeats)
+        chars += len(normalized.text)
+        tokens += estimate_tokens(normalized.text)
+    elapsed = time.perf_counter() - started
+    return {"chars": chars, "tokens": tokens, "ms_per_transcript": elapsed * 1000 / len(corpus)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transcripts", type=int, default=50)
+    parser.add_argument("--sentences", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.transcripts, args.sentences, args.seed)
+    original_chars = sum(len(text) for text in corpus)
+    original_tokens = sum(estimate_tokens(text) for text in corpus)
+    print(f"corpus: transcripts={len(corpus)} chars={original_chars} tokens~{original_tokens}")
+
+    for collapse_repeats in (False, True):
+        result = measure(corpus, collapse_repeats)
+        print(
+            f"collapse_repeats={collapse_repeats!s:<5} "
+            f"chars={result['chars']} ({1 - result['chars'] / original_chars:.1%} fewer) "
+            f"tokens~{result['tokens']} ({1 - result['tokens'] / original_tokens:.1%} fewer) "
+            f"latency={result['ms_per_transcript']:.2f}ms/transcript"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+VAD無音トリミングの計測
+面談を模した合成音声（または指定のWAV）でトリミング前後の秒数（STT課金対象の秒数）と処理速度を計測する
+
+    cd cloud_run
+    python benchmarks/bench_vad.py --minutes 30
+    python benchmarks/bench_vad.py --wav /path/to/interview.wav
+"""
+import argparse
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.vad import VoiceActivityTrimmer  # noqa: E402
+
+SAMPLE_RATE = 16000
+FEED_BYTES = 256 * 1024
+
+
+def synthesize_interview(minutes: float, seed: int) -> bytes:
+    """発話（2〜15秒）と間（0.2〜6秒）を交互に並べ、-60dB程度の背景雑音を加えた音声"""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * SAMPLE_RATE)
+    audio = rng.normal(0, 30, total)
+    position = 0
+    while position < total:
+        speech = int(rng.uniform(2, 15) * SAMPLE_RATE)
+        end = min(total, position + speech)
+        envelope = np.abs(np.sin(np.linspace(0, np.pi * rng.integers(4, 30), end - position)))
+        audio[position:end] += rng.normal(0, 4000, end - position) * envelope
+        position = end + int(rng.uniform(0.2, 6) * SAMPLE_RATE)
+    return np.clip(audio, -32768, 32767).astype("<i2").tobytes()
+
+
+def read_wav(path: str):
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError("LINEAR16 (16-bit) WAV only")
+        return w.readframes(w.getnframes()), w.getframerate(), w.getnchannels()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--wav", help="計測するWAV（省略時は合成音声）")
+    parser.add_argument("--minutes", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threshold-db", type=float, default=-45.0)
+    parser.add_argument("--min-silence-seconds", type=float, default=1.0)
+    parser.add_argument("--padding-seconds", type=float, default=0.25)
+    args = parser.parse_args()
+
+    if args.wav:
+        pcm, sample_rate, channels = read_wav(args.wav)
+    else:
+        pcm, sample_rate, channels = synthesize_interview(args.minutes, args.seed), SAMPLE_RATE, 1
+
+    trimmer = VoiceActivityTrimmer(
+        sample_rate,
+        channels=channels,
+        threshold_db=args.threshold_db,
+        min_silence_seconds=args.min_silence_seconds,
+        padding_seconds=args.padding_seconds,
+    )
+    started = time.perf_counter()
+    output = 0
+    for i in range(0, len(pcm), FEED_BYTES):
+        output += len(trimmer.feed(pcm[i:i + FEED_BYTES]))
+    output += len(trimmer.flush())
+    elapsed = time.perf_counter() - started
+
+    stats = trimmer.stats()
+    print(
+        f"input={stats['input_seconds']:.1f}s output={stats['output_seconds']:.1f}s "
+        f"saved={stats['saved_seconds']:.1f}s ({stats['saved_ratio']:.1%}) segments={stats['segments']}"
+    )
+    print(
+        f"processing={elapsed:.2f}s ({stats['input_seconds'] / elapsed:.0f}x realtime), "
+        f"output_bytes={output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
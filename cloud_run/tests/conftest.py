@@ -0,0 +1,16 @@
+"""
+テスト共通設定
+リポジトリのルートから実行した場合も app パッケージを import できるようにし、
+非同期テスト（@pytest.mark.anyio）は asyncio のイベントループで実行する
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,95 @@
+"""audio_chunker のテスト"""
+import numpy as np
+
+from app.audio_chunker import SilenceChunker, split_pcm, stitch_transcripts
+
+RATE = 1000
+CHUNK_ARGS = {"target_seconds": 4.0, "max_seconds": 6.0, "overlap_seconds": 1.0}
+
+
+def _speech(seconds: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.integers(-12000, 12000, int(seconds * RATE)).astype(np.int16)
+
+
+def _silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * RATE), dtype=np.int16)
+
+
+def _pcm(*parts: np.ndarray) -> bytes:
+    return np.concatenate(parts).astype("<i2").tobytes()
+
+
+def _reassemble(chunks) -> np.ndarray:
+    """重複区間を除いてチャンクを連結"""
+    return np.concatenate([chunk.samples[chunk.overlap_samples:] for chunk in chunks])
+
+
+def test_cuts_in_silence_without_overlap():
+    # 3.5〜4.0秒と8.0〜8.5秒に無音
+    audio = _pcm(_speech(3.5, 1), _silence(0.5), _speech(4.0, 2), _silence(0.5), _speech(3.0, 3))
+    chunks = split_pcm(audio, RATE, **CHUNK_ARGS)
+
+    assert len(chunks) == 3
+    assert 3.5 <= chunks[0].end_seconds <= 4.0
+    assert 8.0 <= chunks[1].end_seconds <= 8.5
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.overlap_samples == 0
+        assert chunk.start_sample == previous.end_sample
+
+
+def test_continuous_speech_is_force_split_with_overlap():
+    audio = _pcm(_speech(20.0))
+    chunks = split_pcm(audio, RATE, **CHUNK_ARGS)
+
+    assert len(chunks) >= 4
+    assert all(chunk.duration_seconds <= 6.0 for chunk in chunks)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        # 発話途中で切った場合は overlap_seconds だけ巻き戻して次のチャンクを始める
+        assert chunk.overlap_samples == 1 * RATE
+        assert chunk.start_sample == previous.end_sample - chunk.overlap_samples
+
+
+def test_chunk_offsets_cover_input_exactly():
+    samples = np.concatenate([_speech(7.0, 4), _silence(0.3), _speech(9.0, 5)])
+    chunks = split_pcm(_pcm(samples), RATE, **CHUNK_ARGS)
+
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    assert chunks[0].start_sample == 0
+    assert chunks[-1].end_sample == len(samples)
+    for chunk in chunks:
+        np.testing.assert_array_equal(chunk.samples, samples[chunk.start_sample:chunk.end_sample])
+    np.testing.assert_array_equal(_reassemble(chunks), samples)
+
+
+def test_streaming_feed_matches_one_shot_split():
+    audio = _pcm(_speech(5.0, 6), _silence(0.4), _speech(10.0, 7))
+    expected = split_pcm(audio, RATE, **CHUNK_ARGS)
+
+    chunker = SilenceChunker(RATE, **CHUNK_ARGS)
+    chunks = []
+    # サンプル境界で切れていない大きさで渡す
+    for i in range(0, len(audio), 333):
+        chunks.extend(chunker.feed(audio[i:i + 333]))
+    chunks.extend(chunker.flush())
+
+    assert [(c.start_sample, c.end_sample) for c in chunks] == \
+        [(c.start_sample, c.end_sample) for c in expected]
+
+
+def test_stereo_is_downmixed():
+    mono = _speech(3.0, 8)
+    stereo = np.repeat(mono, 2).astype("<i2").tobytes()
+    chunks = split_pcm(stereo, RATE, channels=2, **CHUNK_ARGS)
+
+    assert len(chunks) == 1
+    np.testing.assert_array_equal(chunks[0].samples, mono)
+
+
+def test_stitch_removes_overlapping_text():
+    parts = [
+        ("希望年収は600万円です。勤務地は", False),
+        ("勤務地は東京を希望しています。", True),
+        ("入社は4月です。", False),
+    ]
+    assert stitch_transcripts(parts) == "希望年収は600万円です。勤務地は 東京を希望しています。 入社は4月です。"
@@ -0,0 +1,77 @@
+"""compact_output とコンパクト形式の行の解析のテスト"""
+import json
+
+import pytest
+
+from app.compact_output import EMPTY_FIELD, decode_compact_row, decode_compact_rows, number_labels
+from app.extract_schema import ExtractionResponseError, parse_extraction_json
+from app.streaming_json import IncrementalArrayParser
+
+LABELS = ["氏名", "希望年収", "連絡先"]
+
+
+def test_number_labels_is_one_based():
+    assert number_labels(LABELS) == "1. 氏名\n2. 希望年収\n3. 連絡先"
+
+
+def test_decode_row_with_optional_columns():
+    assert decode_compact_row([2, "600万円"], LABELS) == (
+        "希望年収", {"value": "600万円", "confidence": 0.0, "evidence": ""}
+    )
+    assert decode_compact_row(["1", "山田", 0.9, "山田です"], LABELS) == (
+        "氏名", {"value": "山田", "confidence": 0.9, "evidence": "山田です"}
+    )
+
+
+@pytest.mark.parametrize("row", [[0, "x"], [4, "x"], ["a", "x"], [1], "1,x", None])
+def test_malformed_rows_are_rejected(row):
+    assert decode_compact_row(row, LABELS) is None
+
+
+def test_decode_rows_fills_missing_labels_and_keeps_first_duplicate():
+    decoded = decode_compact_rows([[1, "山田", 0.9, ""], [1, "佐藤", 0.8, ""], [9, "x"]], LABELS)
+    assert decoded["氏名"]["value"] == "山田"
+    assert decoded["希望年収"] == EMPTY_FIELD
+    assert list(decoded) == LABELS
+
+
+def test_values_containing_delimiters_round_trip():
+    rows = [
+        [1, "山田, 太郎", 0.9, "「山田, 太郎です」と名乗った"],
+        [2, "[600]万円", 0.8, "年収は[600]万円、いや\"700\"万円"],
+        [3, "a],[b", 0.7, "連絡先は a],[b\nです"],
+    ]
+    text = json.dumps(rows, ensure_ascii=False)
+
+    parsed = parse_extraction_json(text, LABELS)
+
+    assert parsed["氏名"]["value"] == "山田, 太郎"
+    assert parsed["希望年収"]["evidence"] == "年収は[600]万円、いや\"700\"万円"
+    assert parsed["連絡先"]["value"] == "a],[b"
+
+
+def test_compact_rows_in_code_fence_are_parsed():
+    text = "```json\n[[1, \"山田\", 0.9, \"山田です\"]]\n```"
+    assert parse_extraction_json(text, LABELS)["氏名"]["value"] == "山田"
+
+
+def test_invalid_json_raises():
+    with pytest.raises(ExtractionResponseError):
+        parse_extraction_json("[[1, \"山田\"", LABELS)
+
+
+def test_streaming_parser_yields_rows_split_across_chunks():
+    rows = [
+        [1, "山田, 太郎", 0.9, "「山田, 太郎です」"],
+        [2, "[600]万円", 0.8, "\"600\"万円"],
+        [3, None, 0.0, ""],
+    ]
+    text = json.dumps(rows, ensure_ascii=False)
+    parser = IncrementalArrayParser()
+
+    emitted = []
+    for i in range(0, len(text), 3):
+        emitted.extend(parser.feed(text[i:i + 3]))
+
+    assert emitted == rows
+    assert [decode_compact_row(row, LABELS)[0] for row in emitted] == LABELS
@@ -0,0 +1,68 @@
+"""delta_extraction のテスト"""
+import pytest
+
+from app import delta_extraction
+from app.extraction_cache import PartialExtractionResult
+from app.settings import get_settings
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def snapshot_store(monkeypatch):
+    monkeypatch.setattr(get_settings(), "EXTRACTION_DELTA_ENABLED", True)
+    monkeypatch.setattr(get_settings(), "EXTRACTION_SNAPSHOT_BACKEND", "none")
+    monkeypatch.setattr(delta_extraction, "_snapshot_store", None)
+
+
+def _field(value):
+    return {"value": value, "confidence": 0.9 if value else 0.0, "evidence": ""}
+
+
+def _fake_extract(results, requests):
+    async def extract(transcript, labels, metadata=None, retrieval=None, on_field=None):
+        requests.append(list(labels))
+        return results.pop(0)
+    return extract
+
+
+async def _run(labels):
+    return await delta_extraction.extract_with_delta("文字起こし", labels, "sheet_id", "sheet")
+
+
+async def test_labels_from_failed_window_are_requested_again(monkeypatch):
+    requests = []
+    # 「年齢」は解析に失敗したウィンドウにあったため、他のウィンドウの値なしの結果は確定しない
+    partial = PartialExtractionResult(
+        {"氏名": _field("山田"), "年齢": _field(None)}, failed_labels={"年齢"}
+    )
+    monkeypatch.setattr(
+        delta_extraction,
+        "extract_fields_from_transcript",
+        _fake_extract([partial, {"年齢": _field("30")}], requests),
+    )
+
+    first, first_stats = await _run(["氏名", "年齢"])
+    second, second_stats = await _run(["氏名", "年齢"])
+
+    assert first["年齢"]["value"] is None
+    assert first_stats["mode"] == delta_extraction.EXTRACTION_MODE_FULL
+    assert requests == [["氏名", "年齢"], ["年齢"]]
+    assert second_stats["mode"] == delta_extraction.EXTRACTION_MODE_DELTA
+    assert second == {"氏名": _field("山田"), "年齢": _field("30")}
+
+
+async def test_complete_result_is_reused(monkeypatch):
+    requests = []
+    monkeypatch.setattr(
+        delta_extraction,
+        "extract_fields_from_transcript",
+        _fake_extract([{"氏名": _field("山田"), "年齢": _field(None)}], requests),
+    )
+
+    await _run(["氏名", "年齢"])
+    result, stats = await _run(["氏名", "年齢"])
+
+    assert requests == [["氏名", "年齢"]]
+    assert stats["mode"] == delta_extraction.EXTRACTION_MODE_REUSE
+    assert result["年齢"]["value"] is None
@@ -0,0 +1,44 @@
+"""executor のテスト"""
+import asyncio
+import time
+
+import pytest
+
+from app.executor import run_blocking, shutdown_executor
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def executor():
+    yield
+    shutdown_executor()
+
+
+async def test_blocking_calls_overlap_and_do_not_block_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        run_blocking(time.sleep, 0.3),
+        run_blocking(time.sleep, 0.3),
+    )
+    elapsed = time.perf_counter() - started
+    ticker_task.cancel()
+
+    assert results == [None, None]
+    # 直列なら0.6秒以上かかる
+    assert elapsed < 0.5
+    # ブロッキング呼び出し中もイベントループは他のコルーチンを処理している
+    assert ticks >= 10
+
+
+async def test_arguments_are_passed_through():
+    assert await run_blocking(sorted, [3, 1, 2], reverse=True) == [3, 2, 1]
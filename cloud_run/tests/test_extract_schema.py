@@ -0,0 +1,236 @@
+"""extract_schema のシャード抽出のテスト"""
+import asyncio
+import json
+
+import pytest
+
+from app import extract_schema
+from app.extraction_cache import PartialExtractionResult
+from app.settings import get_settings
+
+
+@pytest.fixture(autouse=True)
+def shard_settings(monkeypatch):
+    monkeypatch.setattr(get_settings(), "EXTRACTION_SHARD_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(get_settings(), "EXTRACTION_SHARD_CONCURRENCY", 4)
+
+
+def _fake_request(fail_labels, calls):
+    """fail_labels を含むシャードは常に失敗する _request_extraction"""
+    async def request(transcript, labels, metadata=None, on_field=None, model=None):
+        calls.append(list(labels))
+        if set(labels) & fail_labels:
+            raise ConnectionError("connection reset")
+        body = {label: {"value": f"{label}の値", "confidence": 0.9, "evidence": ""} for label in labels}
+        return json.dumps(body, ensure_ascii=False), "end_turn"
+    return request
+
+
+async def _extract(labels, shard_size=2):
+    return await extract_schema._extract_sharded(
+        lambda group: "文字起こし", labels, None, shard_size
+    )
+
+
+@pytest.mark.anyio
+async def test_failed_shard_keeps_other_shards(monkeypatch):
+    calls = []
+    monkeypatch.setattr(extract_schema, "_request_extraction", _fake_request({"c"}, calls))
+
+    result = await _extract(["a", "b", "c", "d", "e"])
+
+    assert isinstance(result, PartialExtractionResult)
+    assert set(result) == {"a", "b", "e"}
+    assert result.failed_labels == {"c", "d"}
+    # 失敗したシャードのみ EXTRACTION_SHARD_MAX_ATTEMPTS 回試行
+    assert calls.count(["c", "d"]) == 2
+    assert calls.count(["a", "b"]) == 1
+
+
+@pytest.mark.anyio
+async def test_transient_error_is_retried(monkeypatch):
+    attempts = {"count": 0}
+    succeed = _fake_request(set(), [])
+
+    async def flaky(transcript, labels, metadata=None, on_field=None, model=None):
+        if labels == ["a", "b"] and attempts["count"] == 0:
+            attempts["count"] += 1
+            raise TimeoutError("timed out")
+        return await succeed(transcript, labels, metadata, on_field, model)
+
+    monkeypatch.setattr(extract_schema, "_request_extraction", flaky)
+
+    result = await _extract(["a", "b", "c"])
+
+    assert not isinstance(result, PartialExtractionResult)
+    assert set(result) == {"a", "b", "c"}
+
+
+@pytest.mark.anyio
+async def test_all_shards_failing_raises(monkeypatch):
+    monkeypatch.setattr(extract_schema, "_request_extraction", _fake_request({"a", "c"}, []))
+
+    with pytest.raises(ConnectionError):
+        await _extract(["a", "b", "c", "d"])
+
+
+@pytest.mark.anyio
+async def test_truncated_shard_is_split_and_keeps_successful_half(monkeypatch):
+    succeed = _fake_request({"b"}, [])
+
+    async def truncating(transcript, labels, metadata=None, on_field=None, model=None):
+        if len(labels) > 1:
+            return "", "max_tokens"
+        return await succeed(transcript, labels, metadata, on_field, model)
+
+    monkeypatch.setattr(extract_schema, "_request_extraction", truncating)
+
+    result = await _extract(["a", "b", "c"], shard_size=2)
+
+    assert isinstance(result, PartialExtractionResult)
+    assert set(result) == {"a", "c"}
+    assert result.failed_labels == {"b"}
+
+
+class _FakeStream:
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    async def get_final_message(self):
+        return "final"
+
+
+class _FakeClient:
+    def __init__(self, chunks):
+        self.messages = self
+        self._chunks = chunks
+
+    def stream(self, **request):
+        return _FakeStream(self._chunks)
+
+
+@pytest.mark.anyio
+async def test_stream_extraction_emits_fields_and_records_time_to_first_field(monkeypatch):
+    body = json.dumps({
+        "a": {"value": "1", "confidence": 0.9, "evidence": ""},
+        "b": {"value": "2", "confidence": 0.8, "evidence": ""},
+    })
+    chunks = [body[i:i + 10] for i in range(0, len(body), 10)]
+    recorded = []
+    monkeypatch.setattr(extract_schema, "record_streamed_extraction", lambda *args: recorded.append(args))
+    fields = []
+
+    async def on_field(label, data):
+        fields.append(label)
+
+    message = await extract_schema._stream_extraction(
+        _FakeClient(chunks), {}, ["a", "b"], on_field
+    )
+
+    assert message == "final"
+    assert fields == ["a", "b"]
+    first_field_seconds, total_seconds, emitted = recorded[0]
+    assert emitted == 2
+    assert 0 < first_field_seconds < total_seconds
+
+
+@pytest.mark.anyio
+async def test_unparseable_window_is_partial_and_not_cached(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "EXTRACTION_SHARD_SIZE", 0)
+    monkeypatch.setattr(settings, "EXTRACTION_WINDOW_TOKENS", 100)
+    monkeypatch.setattr(settings, "EXTRACTION_WINDOW_OVERLAP_TOKENS", 0)
+    monkeypatch.setattr(settings, "CLAUDE_FAST_MODEL", "")
+    monkeypatch.setattr(settings, "RETRIEVAL_ENABLED", False)
+    transcript = "".join(f"ウィンドウ解析失敗のテスト{i:03d}です。" for i in range(40))
+    calls = []
+    succeed = _fake_request(set(), [])
+
+    async def garbage_first_window(text, labels, metadata=None, on_field=None, model=None):
+        calls.append(text)
+        if "テスト000" in text:
+            return "申し訳ありませんが、抽出できませんでした。", "end_turn"
+        return await succeed(text, labels, metadata, on_field, model)
+
+    monkeypatch.setattr(extract_schema, "_request_extraction", garbage_first_window)
+
+    result = await extract_schema.extract_fields_from_transcript(transcript, ["a", "b"])
+    first_calls = len(calls)
+    await extract_schema.extract_fields_from_transcript(transcript, ["a", "b"])
+
+    assert first_calls > 1
+    assert isinstance(result, PartialExtractionResult)
+    assert set(result) == {"a", "b"}
+    assert result.failed_labels == {"a", "b"}
+    # 部分的な結果はキャッシュされず、次回は再抽出される
+    assert len(calls) == 2 * first_calls
+
+
+class _FakeAnthropic:
+    instances = []
+
+    def __init__(self, api_key, max_retries):
+        self.api_key = api_key
+        self.closed = False
+        _FakeAnthropic.instances.append(self)
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def rotating_key(monkeypatch):
+    key = {"value": "key-1"}
+
+    async def get_key():
+        return key["value"]
+
+    _FakeAnthropic.instances = []
+    monkeypatch.setattr(extract_schema.anthropic, "AsyncAnthropic", _FakeAnthropic)
+    monkeypatch.setattr(extract_schema, "get_anthropic_api_key_async", get_key)
+    monkeypatch.setattr(extract_schema, "_anthropic_client", None)
+    monkeypatch.setattr(extract_schema, "_anthropic_client_key", None)
+    monkeypatch.setattr(extract_schema, "_anthropic_client_lock", asyncio.Lock())
+    monkeypatch.setattr(extract_schema, "_anthropic_client_users", {})
+    monkeypatch.setattr(extract_schema, "_retired_anthropic_clients", set())
+    return key
+
+
+@pytest.mark.anyio
+async def test_key_rotation_waits_for_in_flight_requests(rotating_key):
+    async with extract_schema.use_anthropic_client() as old:
+        rotating_key["value"] = "key-2"
+        async with extract_schema.use_anthropic_client() as new:
+            assert new.api_key == "key-2"
+            # 実行中のリクエストが使っている旧クライアントはクローズしない
+            assert not old.closed
+        assert not new.closed
+        assert not old.closed
+    assert old.closed
+
+    await extract_schema.close_anthropic_client()
+    assert new.closed
+
+
+@pytest.mark.anyio
+async def test_concurrent_callers_share_one_client_after_rotation(rotating_key):
+    first = await extract_schema.get_anthropic_client()
+    rotating_key["value"] = "key-2"
+
+    clients = await asyncio.gather(*(extract_schema.get_anthropic_client() for _ in range(5)))
+
+    assert first.closed
+    assert len({id(client) for client in clients}) == 1
+    assert len(_FakeAnthropic.instances) == 2
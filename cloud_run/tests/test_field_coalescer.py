@@ -0,0 +1,84 @@
+"""field_coalescer のテスト"""
+import asyncio
+
+import pytest
+
+from app.field_coalescer import SingleFieldCoalescer
+
+pytestmark = pytest.mark.anyio
+
+
+class _FakeExtract:
+    """呼び出しを記録し、ラベルごとの値を返す抽出"""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = []
+        self.delay = delay
+
+    async def __call__(self, transcript, labels, metadata):
+        self.calls.append(list(labels))
+        await asyncio.sleep(self.delay)
+        return {label: {"value": f"{label}の値", "confidence": 0.9, "evidence": ""} for label in labels}
+
+
+async def test_requests_within_window_share_one_extraction():
+    extract = _FakeExtract()
+    coalescer = SingleFieldCoalescer(extract, window_seconds=0.01, max_labels=10)
+
+    results = await asyncio.gather(
+        coalescer.extract("文字起こし", "年収"),
+        coalescer.extract("文字起こし", "勤務地"),
+        coalescer.extract("文字起こし", "年収"),
+    )
+
+    assert len(extract.calls) == 1
+    assert [r["value"] for r in results] == ["年収の値", "勤務地の値", "年収の値"]
+
+
+@pytest.mark.parametrize("order", [["b", "c", "a"], ["c", "a", "b"]])
+async def test_labels_are_sorted_regardless_of_arrival_order(order):
+    extract = _FakeExtract()
+    coalescer = SingleFieldCoalescer(extract, window_seconds=0.01, max_labels=10)
+
+    await asyncio.gather(*(coalescer.extract("文字起こし", label) for label in order))
+
+    assert extract.calls == [["a", "b", "c"]]
+
+
+async def test_max_labels_dispatches_without_waiting_for_window():
+    coalescer = SingleFieldCoalescer(_FakeExtract(), window_seconds=10, max_labels=2)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(coalescer.extract("t", "a"), coalescer.extract("t", "b")),
+        timeout=1,
+    )
+
+    assert len(results) == 2
+
+
+async def test_cancelled_batch_is_rerun_for_waiting_callers():
+    extract = _FakeExtract(delay=0.05)
+    coalescer = SingleFieldCoalescer(extract, window_seconds=0.0, max_labels=10)
+    waiters = [asyncio.create_task(coalescer.extract("t", label)) for label in ("a", "b")]
+    await asyncio.sleep(0.01)
+
+    # 実行中のバッチ（シャットダウン等）をキャンセル
+    for task in list(coalescer._tasks):
+        task.cancel()
+    results = await asyncio.gather(*waiters)
+
+    assert extract.calls == [["a", "b"], ["a", "b"]]
+    assert [r["value"] for r in results] == ["aの値", "bの値"]
+
+
+async def test_caller_cancellation_does_not_affect_other_callers():
+    coalescer = SingleFieldCoalescer(_FakeExtract(delay=0.02), window_seconds=0.0, max_labels=10)
+    first = asyncio.create_task(coalescer.extract("t", "a"))
+    second = asyncio.create_task(coalescer.extract("t", "a"))
+    await asyncio.sleep(0.005)
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    assert (await second)["value"] == "aの値"
@@ -0,0 +1,100 @@
+"""jobs のテスト"""
+import asyncio
+
+import pytest
+
+from app.jobs import (
+    JOB_STATUS_FAILED,
+    JOB_STATUS_QUEUED,
+    JOB_STATUS_RUNNING,
+    JOB_STATUS_SUCCEEDED,
+    STAGE_EXTRACTION,
+    STAGE_LABELS,
+    STAGE_STT,
+    JobManager,
+    JobQueueFullError,
+)
+from app.settings import get_settings
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def manager(monkeypatch):
+    monkeypatch.setattr(get_settings(), "JOB_WORKER_COUNT", 1)
+    monkeypatch.setattr(get_settings(), "JOB_QUEUE_MAX_SIZE", 1)
+    manager = JobManager()
+    release = asyncio.Event()
+
+    async def handler(job):
+        job.enter_stage(STAGE_LABELS)
+        job.enter_stage(STAGE_STT)
+        await release.wait()
+        if job.params.get("fail"):
+            raise RuntimeError("speech API error")
+        job.enter_stage(STAGE_EXTRACTION)
+        return {"updated_rows": 3}
+
+    manager.register_handler("process_audio", handler)
+    manager.release = release
+    await manager.start()
+    yield manager
+    await manager.stop()
+
+
+async def _wait_finished(job):
+    for _ in range(100):
+        if job.is_finished:
+            return
+        await asyncio.sleep(0.01)
+
+
+async def test_job_moves_through_stages_to_succeeded(manager):
+    job = manager.submit("process_audio", {})
+    assert job.status == JOB_STATUS_QUEUED
+
+    await asyncio.sleep(0.01)
+    assert job.status == JOB_STATUS_RUNNING
+    assert job.stage == STAGE_STT
+    assert list(job.stage_timings) == [STAGE_LABELS]
+
+    manager.release.set()
+    await _wait_finished(job)
+
+    assert job.status == JOB_STATUS_SUCCEEDED
+    assert job.result == {"updated_rows": 3}
+    assert list(job.stage_timings) == [STAGE_LABELS, STAGE_STT, STAGE_EXTRACTION]
+    assert job.to_dict()["total_seconds"] is not None
+
+
+async def test_handler_error_marks_job_failed(manager):
+    job = manager.submit("process_audio", {"fail": True})
+    manager.release.set()
+    await _wait_finished(job)
+
+    assert job.status == JOB_STATUS_FAILED
+    assert job.error == "speech API error"
+    assert job.stage == STAGE_STT
+
+
+async def test_full_queue_rejects_new_jobs(manager):
+    manager.submit("process_audio", {})
+    await asyncio.sleep(0.01)
+    manager.submit("process_audio", {})
+
+    with pytest.raises(JobQueueFullError):
+        manager.submit("process_audio", {})
+
+
+async def test_stop_fails_running_and_queued_jobs(manager):
+    running = manager.submit("process_audio", {})
+    await asyncio.sleep(0.01)
+    queued = manager.submit("process_audio", {})
+
+    await manager.stop()
+
+    assert running.status == JOB_STATUS_FAILED
+    assert running.error == "Job cancelled"
+    assert queued.status == JOB_STATUS_FAILED
+    assert queued.error == "Instance shutting down"
+    assert manager.get(queued.job_id) is queued
@@ -0,0 +1,122 @@
+"""main（FastAPI アプリ）のテスト"""
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from app import main
+from app.executor import shutdown_executor
+from app.jobs import STAGE_LABELS, STAGE_STT, JobManager
+from app.settings import get_settings
+from app.sheets_client import LabelIndex, SheetsClient
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def no_auth():
+    main.app.dependency_overrides[main.verify_api_key] = lambda: True
+    yield
+    main.app.dependency_overrides.clear()
+    shutdown_executor()
+
+
+@pytest.fixture
+async def client():
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def job_manager(monkeypatch):
+    monkeypatch.setattr(get_settings(), "JOB_WORKER_COUNT", 1)
+    monkeypatch.setattr(get_settings(), "JOB_QUEUE_MAX_SIZE", 1)
+    manager = JobManager()
+    release = asyncio.Event()
+
+    async def run_job(job):
+        job.enter_stage(STAGE_LABELS)
+        job.enter_stage(STAGE_STT)
+        await release.wait()
+        return {"gcs_uri": job.params["gcs_uri"]}
+
+    manager.register_handler("process_audio", run_job)
+    manager.release = release
+    await manager.start()
+    monkeypatch.setattr(main, "get_job_manager", lambda: manager)
+    yield manager
+    await manager.stop()
+
+
+def _submit(client, index=0):
+    return client.post("/process_audio", json={
+        "sheet_id": "sheet",
+        "gcs_uri": f"gs://bucket/audio{index}.wav",
+        "async_mode": True,
+    })
+
+
+async def test_async_process_audio_returns_202_and_reports_progress(client, job_manager):
+    response = await _submit(client)
+
+    assert response.status_code == 202
+    data = response.json()["data"]
+    assert data["status_url"] == f"/jobs/{data['job_id']}"
+
+    await asyncio.sleep(0.01)
+    running = (await client.get(data["status_url"])).json()
+    assert running["status"] == "running"
+    assert running["data"]["stage"] == STAGE_STT
+
+    job_manager.release.set()
+    await asyncio.sleep(0.01)
+    finished = (await client.get(data["status_url"])).json()
+    assert finished["status"] == "succeeded"
+    assert finished["data"]["result"] == {"gcs_uri": "gs://bucket/audio0.wav"}
+    assert set(finished["data"]["stage_timings"]) == {STAGE_LABELS, STAGE_STT}
+
+
+async def test_full_job_queue_returns_503(client, job_manager):
+    assert (await _submit(client, 0)).status_code == 202
+    await asyncio.sleep(0.01)
+    assert (await _submit(client, 1)).status_code == 202
+
+    response = await _submit(client, 2)
+
+    assert response.status_code == 503
+
+
+async def test_unknown_job_returns_404(client):
+    response = await client.get("/jobs/missing")
+    assert response.status_code == 404
+
+
+async def test_health_responds_while_process_audio_is_in_flight(client, monkeypatch):
+    release = threading.Event()
+    entered = threading.Event()
+
+    def slow_label_index(self, sheet_id, sheet_name, refresh=False):
+        # 同期の gspread 呼び出しに相当（イベントループ外のスレッドで実行される）
+        entered.set()
+        release.wait(timeout=5)
+        return LabelIndex([], {}, "")
+
+    monkeypatch.setattr(SheetsClient, "get_label_index", slow_label_index)
+
+    processing = asyncio.create_task(client.post(
+        "/process_audio", json={"sheet_id": "sheet", "gcs_uri": "gs://bucket/audio.wav"}
+    ))
+    while not entered.is_set():
+        await asyncio.sleep(0.01)
+
+    health = await asyncio.wait_for(client.get("/health"), timeout=2)
+
+    assert health.status_code == 200
+    assert not processing.done()
+
+    release.set()
+    response = await processing
+    # ラベルが空のためパイプラインはエラーで終了する
+    assert response.status_code == 500
@@ -0,0 +1,40 @@
+"""rate_limit のテスト"""
+import asyncio
+
+import pytest
+
+from app.rate_limit import TokenBucket
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_cost_within_capacity_is_not_throttled():
+    bucket = TokenBucket(rate_per_minute=6000, burst_seconds=0.1)
+    assert await bucket.acquire(5) == 0.0
+
+
+async def test_cost_above_capacity_is_charged_in_full():
+    # 100 tokens/秒、容量10
+    bucket = TokenBucket(rate_per_minute=6000, burst_seconds=0.1)
+
+    first = await bucket.acquire(30)
+    debt = bucket._tokens
+    second = await bucket.acquire(1)
+
+    assert first == 0.0
+    assert debt <= -19.9
+    # 負債20 + 1トークン分の補充（約0.21秒）を待つ
+    assert second >= 0.2
+
+
+async def test_sustained_rate_holds_for_large_costs():
+    bucket = TokenBucket(rate_per_minute=6000, burst_seconds=0.1)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    for _ in range(3):
+        await bucket.acquire(20)
+
+    # 2回目・3回目はそれぞれ負債10 + 容量10分の補充（0.2秒）を待つ
+    # （コストを容量で打ち切っていた場合は0.1秒ずつ）
+    assert loop.time() - started >= 0.38
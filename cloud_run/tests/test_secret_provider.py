@@ -0,0 +1,134 @@
+"""secret_provider のテスト"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.executor import shutdown_executor
+from app.secret_provider import SecretNotFoundError, SecretProvider
+from app.settings import get_settings
+
+pytestmark = pytest.mark.anyio
+
+TTL = 300
+STALE = 3600
+
+
+class _FakeSecretManager:
+    """access_secret_version の呼び出し回数を数える Secret Manager"""
+
+    def __init__(self, secrets, delay=0.0):
+        self.secrets = secrets
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def access_secret_version(self, request):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        secret_name = request["name"].split("/")[3]
+        if secret_name not in self.secrets:
+            raise google_exceptions.NotFound("not found")
+        data = self.secrets[secret_name].encode("UTF-8")
+        return SimpleNamespace(payload=SimpleNamespace(data=data))
+
+
+@pytest.fixture(autouse=True)
+def secret_settings(monkeypatch):
+    monkeypatch.setattr(get_settings(), "SECRET_CACHE_TTL_SECONDS", TTL)
+    monkeypatch.setattr(get_settings(), "SECRET_STALE_TTL_SECONDS", STALE)
+    monkeypatch.setattr(get_settings(), "SECRET_NEGATIVE_CACHE_TTL_SECONDS", TTL)
+    yield
+    shutdown_executor()
+
+
+def _provider(manager):
+    provider = SecretProvider()
+    provider._get_client = lambda: manager
+    return provider
+
+
+def _age(provider, secret_name, seconds):
+    provider._entries[secret_name].fetched_at -= seconds
+
+
+async def test_concurrent_cold_misses_fetch_once():
+    manager = _FakeSecretManager({"api-key": "v1"}, delay=0.05)
+    provider = _provider(manager)
+
+    values = await asyncio.gather(*(provider.get_async("api-key") for _ in range(5)))
+
+    assert values == ["v1"] * 5
+    assert manager.calls == 1
+    assert provider._flight.coalesced == 4
+
+
+async def test_expired_entry_is_fetched_again():
+    manager = _FakeSecretManager({"api-key": "v1"})
+    provider = _provider(manager)
+    assert await provider.get_async("api-key") == "v1"
+
+    manager.secrets["api-key"] = "v2"
+    _age(provider, "api-key", TTL - 1)
+    assert await provider.get_async("api-key") == "v1"
+
+    _age(provider, "api-key", STALE + 1)
+    assert await provider.get_async("api-key") == "v2"
+    assert manager.calls == 2
+
+
+async def test_stale_entry_is_served_while_revalidating():
+    manager = _FakeSecretManager({"api-key": "v1"})
+    provider = _provider(manager)
+    provider.get("api-key")
+
+    manager.secrets["api-key"] = "v2"
+    _age(provider, "api-key", TTL + 1)
+    # 古い値を即時に返し、更新はバックグラウンドで行う
+    assert await provider.get_async("api-key") == "v1"
+
+    for _ in range(100):
+        if provider._entries["api-key"].value == "v2":
+            break
+        await asyncio.sleep(0.01)
+    assert await provider.get_async("api-key") == "v2"
+    assert manager.calls == 2
+
+
+async def test_missing_secret_is_negative_cached():
+    manager = _FakeSecretManager({})
+    provider = _provider(manager)
+
+    for _ in range(3):
+        with pytest.raises(SecretNotFoundError):
+            await provider.get_async("webhook-token")
+    with pytest.raises(SecretNotFoundError):
+        provider.get("webhook-token")
+    assert manager.calls == 1
+
+    manager.secrets["webhook-token"] = "token"
+    _age(provider, "webhook-token", TTL + STALE + 1)
+    assert await provider.get_async("webhook-token") == "token"
+    assert manager.calls == 2
+
+
+def test_concurrent_sync_misses_fetch_once():
+    manager = _FakeSecretManager({"api-key": "v1"}, delay=0.05)
+    provider = _provider(manager)
+    values = []
+
+    threads = [
+        threading.Thread(target=lambda: values.append(provider.get("api-key")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert values == ["v1"] * 4
+    assert manager.calls == 1
@@ -0,0 +1,56 @@
+"""segments と区間番号付きテキストの分割のテスト"""
+from app.retrieval import BM25Index
+from app.segments import SegmentTable, resolve_field_evidence
+from app.windowed_extraction import split_sentences, split_transcript_windows
+
+
+def _table() -> SegmentTable:
+    table = SegmentTable()
+    table.extend([
+        ("はい。よろしくお願いします。", 0.0, 2.5),
+        ("現在の年収は600万円です。希望は700万円です。", 3.0, 9.0),
+        ("入社は4月以降を希望しています。", 70.0, 74.5),
+    ])
+    return table
+
+
+def test_segment_prompt_is_split_by_line():
+    prompt = _table().to_prompt_text()
+    units = split_sentences(prompt)
+    assert len(units) == 3
+    assert all(unit.startswith(f"[{i}] ") for i, unit in enumerate(units))
+
+
+def test_retrieval_units_keep_segment_numbers():
+    index = BM25Index.from_transcript(_table().to_prompt_text())
+    assert index.segments[1].startswith("[1] ")
+    assert "希望は700万円です。" in index.segments[1]
+
+
+def test_windows_of_segment_prompt_start_with_segment_numbers():
+    table = SegmentTable()
+    for i in range(40):
+        table.append(f"発話{i}の内容です。続きの文です。", i * 5.0, i * 5.0 + 4.0)
+    windows = split_transcript_windows(table.to_prompt_text(), window_tokens=60, overlap_tokens=20)
+    assert len(windows) > 1
+    assert all(window.startswith("[") for window in windows)
+
+
+def test_long_segment_pieces_keep_segment_number():
+    table = SegmentTable()
+    table.append("あ" * 200, 0.0, 30.0)
+    table.append("い" * 10, 30.0, 31.0)
+    windows = split_transcript_windows(table.to_prompt_text(), window_tokens=80)
+    assert all(window.startswith("[0] ") or window.startswith("[1] ") for window in windows)
+
+
+def test_resolve_field_evidence_uses_segment_text_and_times():
+    resolved = resolve_field_evidence({"value": "700万円", "evidence": "1-2"}, _table())
+    assert resolved["evidence"].startswith("[0:03-1:14] 現在の年収は")
+    assert resolved["evidence_start_seconds"] == 3.0
+    assert resolved["evidence_end_seconds"] == 74.5
+
+
+def test_quoted_evidence_is_left_as_is():
+    data = {"value": "700万円", "evidence": "希望は700万円です"}
+    assert resolve_field_evidence(data, _table()) is data
@@ -0,0 +1,79 @@
+"""sheets_client のテスト"""
+import pytest
+
+from app.sheets_client import AudioResultWriteBuffer, SheetsClient
+
+pytestmark = pytest.mark.anyio
+
+
+class _FakeWorksheet:
+    """A列の読み込みと batch_update を記録するワークシート"""
+
+    def __init__(self, labels):
+        self.column = ["ヘッダー", ""] + list(labels)
+        self.col_reads = 0
+        self.updates = []
+
+    def col_values(self, col):
+        assert col == 1
+        self.col_reads += 1
+        return list(self.column)
+
+    def batch_update(self, updates):
+        self.updates.extend(updates)
+
+    def insert_label(self, index, label):
+        self.column.insert(index, label)
+
+
+@pytest.fixture
+def sheet(monkeypatch):
+    worksheet = _FakeWorksheet(["氏名", "年齢", "転職理由"])
+    client = SheetsClient()
+    monkeypatch.setattr(client, "get_sheet", lambda sheet_id, sheet_name: worksheet)
+    return client, worksheet
+
+
+def _expire(index, client):
+    index.loaded_at -= client._settings.SHEETS_LABEL_CACHE_TTL_SECONDS
+
+
+def _ranges(worksheet):
+    return [u["range"] for u in worksheet.updates]
+
+
+def test_fresh_index_is_used_without_rereading(sheet):
+    client, worksheet = sheet
+    index = client.get_label_index("id", "sheet", refresh=True)
+
+    client.write_audio_results("id", "sheet", {"年齢": {"value": "30"}}, index)
+
+    assert worksheet.col_reads == 1
+    assert _ranges(worksheet) == ["E4"]
+
+
+def test_stale_index_is_rechecked_after_rows_are_inserted(sheet):
+    client, worksheet = sheet
+    index = client.get_label_index("id", "sheet", refresh=True)
+
+    # ジョブ中に「氏名」の上へ行が挿入される
+    worksheet.insert_label(2, "追加項目")
+    _expire(index, client)
+    client.write_audio_results("id", "sheet", {"年齢": {"value": "30"}}, index)
+
+    assert worksheet.col_reads == 2
+    assert _ranges(worksheet) == ["E5"]
+
+
+async def test_write_buffer_flush_follows_row_changes(sheet):
+    client, worksheet = sheet
+    index = await client.get_label_index_async("id", "sheet", refresh=True)
+    buffer = AudioResultWriteBuffer(client, "id", "sheet", index)
+
+    await buffer.add("氏名", {"value": "山田"})
+    await buffer.close()
+    worksheet.insert_label(2, "追加項目")
+    _expire(index, client)
+    await buffer.write_remaining({"氏名": {"value": "山田"}, "転職理由": {"value": "年収"}})
+
+    assert _ranges(worksheet) == ["E3", "E6"]
@@ -0,0 +1,40 @@
+"""streaming_json のテスト"""
+import json
+
+from app.streaming_json import IncrementalObjectParser, StreamingStats
+
+
+def test_object_members_are_emitted_as_they_close():
+    body = {
+        "氏名": {"value": "山田", "confidence": 0.9, "evidence": "山田です"},
+        "年収": {"value": "600万円", "confidence": 0.8, "evidence": "「600万円」, {括弧}"},
+    }
+    text = "```json\n" + json.dumps(body, ensure_ascii=False) + "\n```"
+    parser = IncrementalObjectParser()
+
+    emitted = []
+    for i in range(0, len(text), 5):
+        emitted.extend(parser.feed(text[i:i + 5]))
+
+    assert emitted == list(body.items())
+    assert parser.done
+
+
+def test_streaming_stats_summarizes_time_to_first_field():
+    stats = StreamingStats()
+    for seconds in (1.0, 2.0, 3.0, 4.0):
+        stats.record(first_field_seconds=seconds, total_seconds=seconds * 5, fields=10)
+    stats.record(first_field_seconds=None, total_seconds=1.0, fields=0)
+
+    result = stats.to_dict()
+    assert result["streams"] == 5
+    assert result["streams_without_fields"] == 1
+    assert result["fields"] == 40
+    assert result["time_to_first_field_seconds"] == {"avg": 2.5, "p50": 3.0, "p95": 4.0, "max": 4.0}
+    assert result["total_seconds"]["max"] == 20.0
+
+
+def test_empty_stats():
+    result = StreamingStats().to_dict()
+    assert result["time_to_first_field_seconds"] is None
+    assert result["total_seconds"] is None
@@ -0,0 +1,48 @@
+"""transcript_normalizer のテスト"""
+import pytest
+
+from app.transcript_normalizer import normalize_transcript, restore_field_evidence
+
+
+def _normalize(text: str) -> str:
+    return normalize_transcript(text, collapse_repeats=True).text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("電話番号は090-1212-1212です", "電話番号は090-1212-1212です"),
+    ("メールはabcabc@example.comです", "メールはabcabc@example.comです"),
+    ("ID は ABCABCABC です", "IDはABCABCABCです"),
+    ("入社は2020年2020年です", "入社は2020年2020年です"),
+])
+def test_repeats_with_ascii_or_digits_are_kept(text, expected):
+    assert _normalize(text) == expected
+
+
+def test_repeats_separated_by_punctuation_are_collapsed():
+    assert _normalize("転職理由は、転職理由は年収です") == "転職理由は年収です"
+    assert _normalize("そうですね そうですね 大丈夫です") == "そうですね大丈夫です"
+
+
+def test_repeats_without_separator_are_kept():
+    # 区切りのない連続（「ははは」「東京東京」等）は発話の一部の可能性があるためまとめない
+    assert _normalize("東京東京都に住んでいます") == "東京東京都に住んでいます"
+
+
+def test_repeat_mixed_with_ascii_is_kept():
+    assert _normalize("ABC商事、ABC商事です") == "ABC商事、ABC商事です"
+
+
+def test_repeats_are_kept_by_default():
+    assert normalize_transcript("転職理由は、転職理由は年収です").text == "転職理由は、転職理由は年収です"
+
+
+def test_fillers_and_width_are_normalized():
+    normalized = normalize_transcript("えー、希望年収は ６００万円 です")
+    assert normalized.text == "希望年収は600万円です"
+
+
+def test_evidence_is_restored_to_original_text():
+    original = "えー、希望年収は ６００万円 です"
+    normalized = normalize_transcript(original)
+    restored = restore_field_evidence({"value": "600万円", "evidence": "600万円"}, normalized)
+    assert restored["evidence"] == "６００万円"
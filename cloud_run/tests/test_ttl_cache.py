@@ -0,0 +1,82 @@
+"""ttl_cache のテスト"""
+import asyncio
+
+import pytest
+
+from app.ttl_cache import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert calls == 1
+    assert results == ["result"] * 5
+    assert flight.coalesced == 4
+    assert flight.inflight_count() == 0
+
+
+async def test_leader_cancellation_is_taken_over_by_follower():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    leader = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(flight.do("key", work)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    results = await asyncio.gather(*followers)
+
+    # 引き継いだ待機者が1回だけ再実行し、全待機者が同じ結果を受け取る
+    assert calls == 2
+    assert results == [2, 2, 2]
+
+
+async def test_follower_cancellation_does_not_affect_others():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.03)
+        return "result"
+
+    leader = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0.01)
+    follower.cancel()
+
+    assert await leader == "result"
+    assert follower.cancelled()
+
+
+async def test_leader_exception_is_shared():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        flight.do("key", work), flight.do("key", work), return_exceptions=True
+    )
+
+    assert all(isinstance(r, ValueError) for r in results)
@@ -0,0 +1,54 @@
+"""webhook_outbox のテスト"""
+import pytest
+
+from app.webhook_outbox import (
+    WebhookOutbox,
+    is_ephemeral_path,
+    OUTBOX_STATUS_PENDING,
+    OUTBOX_STATUS_DEAD_LETTER,
+)
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return WebhookOutbox(db_path=str(tmp_path / "outbox.sqlite3"))
+
+
+def test_ephemeral_paths():
+    assert is_ephemeral_path("/tmp/mendan/webhook_outbox.sqlite3")
+    assert is_ephemeral_path("/dev/shm/outbox.sqlite3")
+    assert not is_ephemeral_path("/mnt/outbox/webhook_outbox.sqlite3")
+
+
+@pytest.mark.anyio
+async def test_dead_lettered_key_is_reported_instead_of_requeued(outbox):
+    payload = {"record_id": "1", "idempotency_key": "key-1"}
+
+    first = await outbox.enqueue(payload)
+    row = outbox._claim()
+    outbox._move_to_dead_letter(row, attempts=8, status_code=500, error="HTTP 500")
+    again = await outbox.enqueue(payload)
+    counts = await outbox.get_stats()
+
+    assert first["status"] == OUTBOX_STATUS_PENDING and not first["duplicate"]
+    assert again["status"] == OUTBOX_STATUS_DEAD_LETTER
+    assert again["duplicate"]
+    assert again["replay_path"] == f"/webhook/dead_letters/{again['dead_letter_id']}/replay"
+    # デッドレター済みのキーで新しい行が作られていない
+    assert counts.get(OUTBOX_STATUS_PENDING, 0) == 0
+    assert counts["dead_letter"] == 1
+
+    replayed = await outbox.replay_dead_letter(again["dead_letter_id"])
+    after_replay = await outbox.enqueue(payload)
+
+    assert replayed["status"] == OUTBOX_STATUS_PENDING
+    assert after_replay["status"] == OUTBOX_STATUS_PENDING and after_replay["duplicate"]
+
+
+@pytest.mark.anyio
+async def test_duplicate_key_returns_existing_row(outbox):
+    first = await outbox.enqueue({"record_id": "1", "idempotency_key": "key-1"})
+    second = await outbox.enqueue({"record_id": "1", "idempotency_key": "key-1"})
+
+    assert second["duplicate"]
+    assert second["outbox_id"] == first["outbox_id"]
@@ -0,0 +1,151 @@
+"""windowed_extraction のテスト"""
+import asyncio
+
+import pytest
+
+from app.extraction_cache import PartialExtractionResult
+from app.token_utils import estimate_tokens
+from app.windowed_extraction import (
+    extract_windowed,
+    reduce_window_results,
+    split_sentences,
+    split_transcript_windows,
+)
+
+
+def _transcript(sentences: int) -> str:
+    return "".join(f"これは{i:03d}番目の発話です。" for i in range(sentences))
+
+
+def test_split_sentences_keeps_terminators():
+    assert split_sentences("はい。そうです！本当？\n次") == ["はい。", "そうです！", "本当？", "\n", "次"]
+
+
+def test_short_transcript_is_one_window():
+    transcript = _transcript(3)
+    assert split_transcript_windows(transcript, window_tokens=1000) == [transcript]
+
+
+def test_windows_respect_limit_and_sentence_boundaries():
+    transcript = _transcript(50)
+    windows = split_transcript_windows(transcript, window_tokens=100, overlap_tokens=0)
+
+    assert len(windows) > 1
+    assert all(estimate_tokens(window) <= 100 for window in windows)
+    # 文の途中では切らない
+    assert all(window.endswith("。") for window in windows)
+    assert "".join(windows) == transcript
+
+
+def test_windows_overlap_by_trailing_sentences():
+    transcript = _transcript(50)
+    windows = split_transcript_windows(transcript, window_tokens=100, overlap_tokens=30)
+
+    for previous, window in zip(windows, windows[1:]):
+        # 直前のウィンドウ末尾の overlap_tokens 以内の文から始まる
+        last_sentence = split_sentences(previous)[-1]
+        carried = window[:window.index(last_sentence) + len(last_sentence)]
+        assert previous.endswith(carried)
+        assert estimate_tokens(carried) <= 30
+        assert estimate_tokens(window) <= 100
+
+
+def test_long_sentence_is_split_by_characters():
+    transcript = "あ" * 250 + "。"
+    windows = split_transcript_windows(transcript, window_tokens=100)
+    assert all(estimate_tokens(window) <= 100 for window in windows)
+    assert "".join(windows) == transcript
+
+
+def test_reduce_prefers_highest_confidence():
+    reduced = reduce_window_results([
+        {"年収": {"value": "500万円", "confidence": 0.4, "evidence": "a"}},
+        {"年収": {"value": "600万円", "confidence": 0.9, "evidence": "b"}},
+        {"年収": {"value": "700万円", "confidence": 0.6, "evidence": "c"}},
+    ])
+    assert reduced["年収"]["value"] == "600万円"
+
+
+def test_reduce_tie_breaks_on_value_evidence_then_order():
+    reduced = reduce_window_results([
+        {"a": {"value": None, "confidence": 0.0, "evidence": ""},
+         "b": {"value": "x", "confidence": 0.5, "evidence": ""},
+         "c": {"value": "first", "confidence": 0.5, "evidence": "e"}},
+        {"a": {"value": "found", "confidence": 0.0, "evidence": ""},
+         "b": {"value": "y", "confidence": 0.5, "evidence": "quote"},
+         "c": {"value": "second", "confidence": 0.5, "evidence": "e"}},
+    ])
+    assert reduced["a"]["value"] == "found"
+    assert reduced["b"]["value"] == "y"
+    assert reduced["c"]["value"] == "first"
+
+
+@pytest.mark.anyio
+async def test_extract_windowed_merges_fake_model_results():
+    transcript = _transcript(40) + "希望年収は600万円です。" + _transcript(40)
+    seen_windows = []
+
+    async def fake_extract(window, labels, metadata):
+        seen_windows.append(window)
+        found = "希望年収は600万円です。" in window
+        return {
+            "年収": {
+                "value": "600万円" if found else None,
+                "confidence": 0.9 if found else 0.0,
+                "evidence": "希望年収は600万円です" if found else "",
+            },
+        }
+
+    result = await extract_windowed(
+        transcript, ["年収"], None, fake_extract, window_tokens=150, overlap_tokens=20, concurrency=2
+    )
+
+    assert len(seen_windows) > 2
+    assert result["年収"]["value"] == "600万円"
+    assert not isinstance(result, PartialExtractionResult)
+
+
+@pytest.mark.anyio
+async def test_extract_windowed_propagates_partial_results():
+    async def fake_extract(window, labels, metadata):
+        result = PartialExtractionResult() if "000" in window else {}
+        result.update({label: {"value": "v", "confidence": 0.5, "evidence": ""} for label in labels})
+        return result
+
+    result = await extract_windowed(
+        _transcript(50), ["a"], None, fake_extract, window_tokens=100
+    )
+    assert isinstance(result, PartialExtractionResult)
+
+
+@pytest.mark.anyio
+async def test_extract_windowed_limits_concurrency():
+    active = 0
+    peak = 0
+
+    async def fake_extract(window, labels, metadata):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return {}
+
+    await extract_windowed(
+        _transcript(60), ["a"], None, fake_extract, window_tokens=80, concurrency=2
+    )
+    assert peak == 2
+
+
+@pytest.mark.anyio
+async def test_extract_windowed_collects_failed_labels():
+    async def fake_extract(window, labels, metadata):
+        if "000" in window:
+            return PartialExtractionResult(failed_labels=labels)
+        return {label: {"value": None, "confidence": 0.0, "evidence": ""} for label in labels}
+
+    result = await extract_windowed(
+        _transcript(50), ["a", "b"], None, fake_extract, window_tokens=100
+    )
+    assert set(result) == {"a", "b"}
+    assert result.failed_labels == {"a", "b"}